@@ -93,12 +93,39 @@ _initialize()
 
 try:
     from ._core import (
-        DX11Renderer,
+        AutoExposureSettings,
+        GeometryMode,
+        GeometrySettings,
+        Precision,
         ProcessingParams,
         RendererStatus,
+        TemporalSettings,
     )
+    from ._core import DX11Renderer as _NativeRenderer
 
-    __all__ = ["DX11Renderer", "ProcessingParams", "RendererStatus"]
+    class DX11Renderer(_NativeRenderer):
+        """Renderer that applies this machine's autotuned workgroups when it is created
+
+        See ``dx11_renderer.autotune``; ``autotune=False`` keeps the built-in
+        defaults.
+        """
+
+        def __init__(self, *args, autotune=True, **kwargs):
+            super().__init__(*args, **kwargs)
+            if autotune and self.status.isInitialized:
+                from .autotune import apply_profile
+                apply_profile(self)
+
+    __all__ = [
+        "AutoExposureSettings",
+        "DX11Renderer",
+        "GeometryMode",
+        "GeometrySettings",
+        "Precision",
+        "ProcessingParams",
+        "RendererStatus",
+        "TemporalSettings",
+    ]
     __version__ = "1.0.0"
 
 except ImportError as e:
@@ -0,0 +1,163 @@
+"""asyncio front end for the renderer.
+
+``AsyncRenderer`` runs the blocking renderer calls on its own threads, one
+per renderer, so coroutines can ``await`` frames without stalling the event
+loop. Any number of coroutines can wait at once. Their requests queue for
+those few threads, and no thread is created per request. ``max_pending``
+bounds the queue: beyond it, ``process`` waits before submitting.
+
+``RenderPipeline.stream`` turns a source of frames (an async or plain
+iterable) into an async iterator of results, in order, with at most
+``concurrency`` frames in flight. Closing the iterator or cancelling the
+consuming task cancels the frames that have not started yet. A frame that
+is already on a renderer finishes, and its result is discarded.
+
+Usage::
+
+    async with AsyncRenderer(params={"brightness": 1.2}) as renderer:
+        graded = await renderer.process(frame)
+        async for out in RenderPipeline(renderer, concurrency=4).stream(frames):
+            await send(out)
+"""
+
+import asyncio
+import collections
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .presets import make_params
+from .process_pool import _default_renderer
+
+_DONE = object()
+
+
+class AsyncRenderer:
+    """Awaitable frame processing on ``workers`` renderers, each on its own thread
+
+    Pass ``renderer`` to wrap an existing renderer (one worker), or let
+    ``renderer_factory`` create one renderer per worker thread. ``params``
+    (a dict of ``ProcessingParams`` fields) is applied to every renderer.
+    """
+
+    def __init__(self, renderer=None, workers=1, params=None, max_pending=None,
+                 renderer_factory=None, params_factory=None):
+        if renderer is not None and workers != 1:
+            raise ValueError("A single renderer cannot back more than one worker")
+        self.workers = workers
+        self.params = params
+        self.renderer_factory = renderer_factory or _default_renderer
+        self.params_factory = params_factory
+        self._renderer = renderer
+        self._renderers = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.max_pending = max_pending
+        self._pending = None
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="dx11-async",
+                                            initializer=self._start_worker)
+        self._closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def _start_worker(self):
+        # Renderers are created on the thread that uses them. Under the lock,
+        # so a concurrent update_params cannot miss a new renderer.
+        with self._lock:
+            renderer = self._renderer if self._renderer is not None else self.renderer_factory()
+            if self.params is not None:
+                renderer.update_processing_params(make_params(self.params, self.params_factory))
+            self._renderers.append(renderer)
+        self._local.renderer = renderer
+
+    def _process(self, frame):
+        if self._closed:
+            raise RuntimeError("AsyncRenderer is closed")
+        return self._local.renderer.process_frame(frame)
+
+    @property
+    def renderers(self):
+        """Renderers started so far; worker threads start on demand"""
+        with self._lock:
+            return list(self._renderers)
+
+    async def process(self, frame):
+        """Process ``frame`` on a renderer thread and return the result"""
+        if self._closed:
+            raise RuntimeError("AsyncRenderer is closed")
+        loop = asyncio.get_running_loop()
+        if self._pending is None and self.max_pending:
+            # Created on the running loop; before Python 3.10 it binds to the loop at creation
+            self._pending = asyncio.Semaphore(self.max_pending)
+        async with self._pending or contextlib.nullcontext():
+            return await loop.run_in_executor(self._executor, self._process, frame)
+
+    def _update_params(self, params):
+        with self._lock:
+            self.params = params
+            for renderer in self._renderers:
+                renderer.update_processing_params(make_params(params, self.params_factory))
+
+    async def update_params(self, params):
+        """Apply ``params`` (a dict of fields) to every renderer, current and future"""
+        await asyncio.get_running_loop().run_in_executor(None, self._update_params, dict(params))
+
+    def close(self):
+        """Fail queued frames and wait for the running ones"""
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self):
+        self._closed = True
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+async def _iterate(source):
+    """Iterate an async or plain iterable; plain ones are advanced off the event loop"""
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield item
+        return
+    loop = asyncio.get_running_loop()
+    iterator = iter(source)
+    while True:
+        # A plain iterator may block (a camera, a decoder), so it runs on the default executor
+        item = await loop.run_in_executor(None, next, iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+
+class RenderPipeline:
+    """Stream frames through an ``AsyncRenderer`` with bounded concurrency"""
+
+    def __init__(self, renderer, concurrency=4):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.renderer = renderer
+        self.concurrency = concurrency
+
+    async def stream(self, source):
+        """Yield the processed frames of ``source`` in order
+
+        At most ``concurrency`` frames are submitted ahead of the consumer.
+        Close the iterator (``await it.aclose()``) or cancel its task to stop
+        early; frames still queued are cancelled.
+        """
+        in_flight = collections.deque()
+        try:
+            async for frame in _iterate(source):
+                in_flight.append(asyncio.ensure_future(self.renderer.process(frame)))
+                if len(in_flight) >= self.concurrency:
+                    yield await in_flight.popleft()
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
@@ -0,0 +1,376 @@
+"""Per-machine autotuning of kernel workgroups and worker counts.
+
+``autotune`` benchmarks candidate kernel workgroup shapes for every
+resolution and precision, plus the render pool's worker processes and the
+batch job's decode threads, on the current machine. A candidate only
+replaces the default when it is faster by at least ``min_gain``. Winners are
+merged into a small JSON profile (``~/.dx11_renderer/profile.json``, or the
+path in ``DX11_RENDERER_PROFILE``) keyed by a fingerprint of the host and of
+the GPU adapter::
+
+    {"version": 1, "machines": {host: {"hardware": {...}, "settings": {...},
+                                       "adapters": {adapter: {"hardware": {...},
+                                                              "workgroups": {precision: [...]}}}}}}
+
+``dx11_renderer.DX11Renderer`` applies its workgroups when it is created
+(``apply_profile``). ``ShardedRenderPool`` and ``BatchJob`` use the tuned
+worker counts when none are given (``tuned_setting``).
+
+Usage::
+
+    dx11-autotune --resolutions 1280x720 1920x1080 3840x2160 --precisions float32 uint8
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing as mp
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+
+from .precision import PRECISIONS, synthetic_frame
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "DX11_RENDERER_PROFILE"
+PROFILE_VERSION = 1
+DEFAULT_WORKGROUP = (8, 8)
+WORKGROUP_CANDIDATES = ((8, 8), (16, 8), (8, 16), (16, 16), (32, 8), (32, 4), (64, 4), (32, 16), (32, 32))
+# Smallest speedup over the default that counts as a win; below it the
+# difference is measurement noise and the default is kept
+MIN_GAIN = 0.03
+
+
+def profile_path():
+    return os.environ.get(PROFILE_ENV) or os.path.join(os.path.expanduser("~"), ".dx11_renderer", "profile.json")
+
+
+def host_hardware():
+    """What the CPU-side settings were measured on"""
+    return {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count() or 1,
+    }
+
+
+def adapter_hardware(status):
+    """What the kernel workgroups were measured on, from a RendererStatus"""
+    return {
+        "name": getattr(status, "adapterName", ""),
+        "vendor_id": int(getattr(status, "adapterVendorId", 0)),
+        "device_id": int(getattr(status, "adapterDeviceId", 0)),
+        "video_memory": int(getattr(status, "adapterVideoMemory", 0)),
+    }
+
+
+def fingerprint(hardware):
+    return hashlib.sha1(json.dumps(hardware, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _empty_profile():
+    return {"version": PROFILE_VERSION, "machines": {}}
+
+
+def load_profile(path=None):
+    """Read a profile; a missing, unreadable or outdated one is empty"""
+    path = path or profile_path()
+    try:
+        with open(path, "r") as f:
+            profile = json.load(f)
+    except FileNotFoundError:
+        return _empty_profile()
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable autotune profile %s: %s", path, e)
+        return _empty_profile()
+    if not isinstance(profile, dict) or profile.get("version") != PROFILE_VERSION:
+        logger.warning("Ignoring autotune profile %s: expected version %d", path, PROFILE_VERSION)
+        return _empty_profile()
+    return profile
+
+
+def save_profile(profile, path=None):
+    path = path or profile_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(profile, f, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+    return path
+
+
+def _host_entry(profile, create=False):
+    hardware = host_hardware()
+    machines = profile.setdefault("machines", {}) if create else profile.get("machines", {})
+    entry = machines.get(fingerprint(hardware))
+    if entry is None and create:
+        entry = machines[fingerprint(hardware)] = {"hardware": hardware, "settings": {}, "adapters": {}}
+    return entry
+
+
+def _adapter_entry(profile, status, create=False):
+    host = _host_entry(profile, create)
+    if host is None:
+        return None
+    hardware = adapter_hardware(status)
+    adapters = host.setdefault("adapters", {})
+    entry = adapters.get(fingerprint(hardware))
+    if entry is None and create:
+        entry = adapters[fingerprint(hardware)] = {"hardware": hardware, "workgroups": {}}
+    return entry
+
+
+def _precision_name(precision):
+    # Precision enum from the renderer's status, or already a name
+    return getattr(precision, "name", precision).lower()
+
+
+def tuned_setting(name, default=None, profile=None):
+    """This host's tuned value of a CPU-side setting, or ``default``"""
+    host = _host_entry(profile if profile is not None else load_profile())
+    setting = (host or {}).get("settings", {}).get(name)
+    return setting["value"] if setting else default
+
+
+def tuned_workgroups(status, profile=None):
+    """``(width, height, x, y)`` workgroup entries for this adapter and the status' precision"""
+    adapter = _adapter_entry(profile if profile is not None else load_profile(), status)
+    rows = (adapter or {}).get("workgroups", {}).get(_precision_name(status.precision), [])
+    return [(row["width"], row["height"], row["x"], row["y"]) for row in rows]
+
+
+def apply_profile(renderer, profile=None):
+    """Give ``renderer`` its tuned workgroups; returns the entries applied
+
+    A profile the renderer rejects is logged and skipped, so a bad file never
+    stops a renderer from being created.
+    """
+    entries = tuned_workgroups(renderer.status, profile)
+    if entries:
+        try:
+            renderer.set_workgroup_profile(entries)
+        except ValueError as e:
+            logger.warning("Ignoring autotuned workgroups: %s", e)
+            return []
+    return entries
+
+
+def _measure(run, repeats):
+    """Best of ``repeats`` runs of ``run()``, which returns seconds per unit of work"""
+    return min(run() for _ in range(max(1, repeats)))
+
+
+def _pick(candidates, default, measure, min_gain=MIN_GAIN):
+    """Fastest candidate by ``measure``, unless it beats ``default`` by less than ``min_gain``
+
+    Returns ``(winner, seconds by candidate)``; the default is always
+    measured, and measured first.
+    """
+    timings = {candidate: measure(candidate) for candidate in dict.fromkeys((default,) + tuple(candidates))}
+    best = min(timings, key=timings.get)
+    if timings[best] > timings[default] * (1.0 - min_gain):
+        best = default
+    return best, timings
+
+
+def _frame_time(process, frame, frames):
+    def run():
+        started = time.perf_counter()
+        for _ in range(frames):
+            process(frame)
+        return (time.perf_counter() - started) / frames
+    return run
+
+
+def tune_workgroups(renderer, resolutions, candidates=WORKGROUP_CANDIDATES, frames=30, repeats=3,
+                    min_gain=MIN_GAIN):
+    """Workgroup rows (width, height, x, y, ms, default_ms) for one renderer"""
+    rows = []
+    for width, height in resolutions:
+        frame = synthetic_frame(width, height)
+
+        def measure(workgroup):
+            renderer.set_workgroup_size(*workgroup)
+            renderer.process_frame(frame)  # warm-up: textures and the shader variant
+            return _measure(_frame_time(renderer.process_frame, frame, frames), repeats)
+
+        best, timings = _pick(candidates, DEFAULT_WORKGROUP, measure, min_gain)
+        rows.append(dict(width=width, height=height, x=best[0], y=best[1],
+                         ms=timings[best] * 1000.0, default_ms=timings[DEFAULT_WORKGROUP] * 1000.0))
+    renderer.set_workgroup_size(*DEFAULT_WORKGROUP)
+    return rows
+
+
+def tune_render_workers(candidates, resolution=(1920, 1080), frames=60, repeats=2, min_gain=MIN_GAIN,
+                        renderer_factory=None, params_factory=None):
+    """Fastest ``ShardedRenderPool`` worker count; returns ``(winner, seconds per frame by count)``"""
+    from .process_pool import ShardedRenderPool
+
+    width, height = resolution
+    frame = synthetic_frame(width, height)
+
+    def measure(workers):
+        with ShardedRenderPool(workers, renderer_factory, params_factory=params_factory,
+                               max_frame_shape=frame.shape) as pool:
+            # One stream per worker so every worker gets its share of the frames
+            streams = {}
+            stream = 0
+            while len(streams) < workers:
+                streams.setdefault(pool.worker_for(stream), stream)
+                stream += 1
+            streams = list(streams.values())
+
+            def run(count):
+                started = time.perf_counter()
+                for i in range(count):
+                    pool.submit(streams[i % workers], frame)
+                for _ in range(count):
+                    result = pool.get(timeout=60.0)
+                    if result is None or result.error:
+                        raise RuntimeError(f"Render pool with {workers} workers failed: "
+                                           f"{result.error if result else 'no answer'}")
+                return (time.perf_counter() - started) / count
+
+            run(workers)  # warm-up: worker start-up and textures
+            return _measure(lambda: run(frames), repeats)
+
+    return _pick(candidates, mp.cpu_count(), measure, min_gain)
+
+
+def tune_decode_workers(candidates, resolution=(1920, 1080), images=32, repeats=2, min_gain=MIN_GAIN,
+                        renderer_factory=None, params_factory=None):
+    """Fastest ``BatchJob`` decode thread count; returns ``(winner, seconds per image by count)``"""
+    from .batch import BatchJob
+
+    root = tempfile.mkdtemp(prefix="dx11-autotune-")
+    try:
+        source = os.path.join(root, "in")
+        os.makedirs(source)
+        for i in range(images):
+            cv2.imwrite(os.path.join(source, f"{i:04d}.jpg"), synthetic_frame(*resolution, seed=i))
+
+        def measure(workers):
+            def run():
+                output = os.path.join(root, "out")
+                shutil.rmtree(output, ignore_errors=True)
+                job = BatchJob(source, output, decode_workers=workers, renderer_factory=renderer_factory,
+                               params_factory=params_factory)
+                stats = job.run()
+                return stats.elapsed / max(1, stats.processed)
+            return _measure(run, repeats)
+
+        return _pick(candidates, os.cpu_count() or 4, measure, min_gain)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _native_renderer(precision):
+    from dx11_renderer import DX11Renderer
+    renderer = DX11Renderer(precision, autotune=False)
+    if not renderer.status.isInitialized:
+        raise RuntimeError(f"Renderer failed to initialize: {renderer.status.lastError}")
+    return renderer
+
+
+def _merge_rows(existing, rows):
+    merged = {(row["width"], row["height"]): row for row in existing}
+    merged.update({(row["width"], row["height"]): row for row in rows})
+    return sorted(merged.values(), key=lambda row: row["width"] * row["height"])
+
+
+def autotune(resolutions=((1280, 720), (1920, 1080)), precisions=("float32",),
+             workgroups=WORKGROUP_CANDIDATES, render_workers=(), decode_workers=(), frames=30, repeats=3,
+             min_gain=MIN_GAIN, path=None, renderer_factory=None, worker_renderer_factory=None,
+             params_factory=None):
+    """Tune this machine, merge the winners into the profile at ``path`` and return a report
+
+    ``renderer_factory(precision)`` creates the renderers whose workgroups
+    are tuned; it must not apply an existing profile. Worker counts are tuned
+    at the largest resolution, only for the candidate lists given, with
+    ``worker_renderer_factory()`` renderers (the default renderer otherwise).
+    """
+    profile = load_profile(path)
+    report = {"workgroups": {}, "settings": {}}
+    for precision in precisions:
+        renderer = (renderer_factory or _native_renderer)(precision)
+        rows = tune_workgroups(renderer, resolutions, workgroups, frames, repeats, min_gain)
+        adapter = _adapter_entry(profile, renderer.status, create=True)
+        adapter["workgroups"][precision] = _merge_rows(adapter["workgroups"].get(precision, []), rows)
+        report["workgroups"][precision] = rows
+
+    resolution = max(resolutions, key=lambda size: size[0] * size[1])
+    tuners = (("render_workers", render_workers, tune_render_workers, frames * 2),
+              ("decode_workers", decode_workers, tune_decode_workers, frames))
+    for name, candidates, tune, count in tuners:
+        if not candidates:
+            continue
+        best, timings = tune(candidates, resolution, count, repeats, min_gain, worker_renderer_factory,
+                             params_factory)
+        default = next(iter(timings))
+        setting = dict(value=best, ms=timings[best] * 1000.0, default=default,
+                       default_ms=timings[default] * 1000.0, resolution=list(resolution))
+        _host_entry(profile, create=True)["settings"][name] = setting
+        report["settings"][name] = setting
+
+    report["path"] = save_profile(profile, path)
+    return report
+
+
+def format_report(report):
+    lines = ["| precision | resolution | workgroup | ms/frame | default ms/frame | speedup |",
+             "|-----------|------------|-----------|---------:|-----------------:|--------:|"]
+    for precision, rows in report["workgroups"].items():
+        for row in rows:
+            lines.append(f"| {precision} | {row['width']}x{row['height']} | {row['x']}x{row['y']} "
+                         f"| {row['ms']:.2f} | {row['default_ms']:.2f} | {row['default_ms'] / row['ms']:.2f}x |")
+    for name, setting in report["settings"].items():
+        lines.append(f"{name}: {setting['value']} ({setting['ms']:.2f} ms per item; "
+                     f"default {setting['default']}: {setting['default_ms']:.2f} ms)")
+    lines.append(f"Profile written to {report['path']}")
+    return "\n".join(lines)
+
+
+def _resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def _workgroup(text):
+    x, y = text.lower().split("x")
+    return int(x), int(y)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="dx11-autotune",
+                                     description="Benchmark kernel workgroups and worker counts on this machine")
+    parser.add_argument("--resolutions", nargs="+", type=_resolution, default=[(1280, 720), (1920, 1080)])
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=["float32"])
+    parser.add_argument("--workgroups", nargs="+", type=_workgroup, default=list(WORKGROUP_CANDIDATES),
+                        help="Candidate workgroup shapes as XxY")
+    parser.add_argument("--render-workers", nargs="*", type=int, default=[],
+                        help="Candidate ShardedRenderPool worker counts")
+    parser.add_argument("--decode-workers", nargs="*", type=int, default=[],
+                        help="Candidate BatchJob decode thread counts")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per candidate; the fastest counts")
+    parser.add_argument("--min-gain", type=float, default=MIN_GAIN,
+                        help="Speedup over the default a candidate needs to be kept")
+    parser.add_argument("--profile", help=f"Profile path (default: ${PROFILE_ENV} or ~/.dx11_renderer/profile.json)")
+    args = parser.parse_args(argv)
+
+    report = autotune(args.resolutions, args.precisions, tuple(args.workgroups), args.render_workers,
+                      args.decode_workers, args.frames, args.repeats, args.min_gain, args.profile)
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
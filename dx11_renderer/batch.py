@@ -0,0 +1,275 @@
+"""Bulk processing of image directories with a preset.
+
+Images are decoded ahead of time on a thread pool, grouped by size so the
+renderer processes runs of same-size frames without reallocating its
+textures, and encoded/written by a second pool. Completed files are
+appended to a journal so an interrupted job resumes where it stopped.
+
+Usage::
+
+    dx11-batch stills/ -o graded/ --preset evening --journal graded.journal
+"""
+
+import argparse
+import collections
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from .autotune import tuned_setting
+from .presets import PARAM_FIELDS, load_preset, make_params
+from .process_pool import _default_renderer
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+
+def iter_inputs(source, extensions=IMAGE_EXTENSIONS):
+    """Yield (path, relative path) for a directory tree or a manifest file
+
+    A manifest is a text file listing one image path per line; relative
+    entries are resolved against the manifest's directory.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(extensions):
+                    path = os.path.join(root, name)
+                    yield path, os.path.relpath(path, source)
+        return
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, "r") as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith("#"):
+                continue
+            if os.path.isabs(entry):
+                # Mirror absolute entries under the output directory by their full path
+                yield entry, os.path.splitdrive(entry)[1].lstrip("/\\")
+            else:
+                yield os.path.join(base, entry), os.path.normpath(entry)
+
+
+class CompletionJournal:
+    """Append-only record of relative paths that were written successfully"""
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = set()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.completed = {line.rstrip("\n") for line in f if line.strip()}
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def __contains__(self, rel):
+        return rel in self.completed
+
+    def mark(self, rel):
+        with self._lock:
+            self.completed.add(rel)
+            self._file.write(rel + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class BatchStats:
+    def __init__(self):
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.batches = 0
+        self.peak_buffered = 0      # Most decoded images held waiting for their batch
+        self.elapsed = 0.0
+        self.errors = []
+
+    @property
+    def images_per_second(self):
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.processed} processed, {self.skipped} skipped, {self.failed} failed "
+                f"in {self.elapsed:.2f}s ({self.images_per_second:.1f} images/s, {self.batches} batches)")
+
+
+class BatchJob:
+    """Process every image of a directory or manifest into ``output_dir``
+
+    Decoded images are grouped by shape into batches of ``batch_size``. At
+    most ``max_buffered`` images (by default the larger of ``batch_size`` and
+    ``prefetch``) wait in unfinished groups; beyond that the fullest group is
+    processed early, so trees of many different sizes stay bounded in memory.
+    """
+
+    def __init__(self, source, output_dir, params=None, batch_size=16, decode_workers=None,
+                 write_workers=None, prefetch=None, output_extension=None, jpeg_quality=95,
+                 png_compression=3, journal=None, renderer_factory=None, params_factory=None,
+                 max_buffered=None):
+        cpus = os.cpu_count() or 4
+        self.source = source
+        self.output_dir = output_dir
+        self.params = params
+        self.batch_size = max(1, batch_size)
+        self.decode_workers = decode_workers or tuned_setting("decode_workers", cpus)
+        self.write_workers = write_workers or max(2, cpus // 2)
+        self.prefetch = prefetch or self.decode_workers * 4
+        self.max_buffered = max(1, max_buffered or max(self.batch_size, self.prefetch))
+        self.output_extension = output_extension
+        self.jpeg_quality = jpeg_quality
+        self.png_compression = png_compression
+        self.journal_path = journal
+        self.renderer_factory = renderer_factory or _default_renderer
+        self.params_factory = params_factory
+
+    def _output_path(self, rel):
+        path = os.path.join(self.output_dir, rel)
+        if self.output_extension:
+            path = os.path.splitext(path)[0] + self.output_extension
+        return path
+
+    def _encode_params(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension in (".jpg", ".jpeg"):
+            return [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        if extension == ".png":
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+        return []
+
+    @staticmethod
+    def _decode(path, rel):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise IOError(f"Could not decode image: {path}")
+        return rel, image
+
+    def _write(self, rel, image):
+        path = self._output_path(rel)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not cv2.imwrite(path, image, self._encode_params(path)):
+            raise IOError(f"Could not write image: {path}")
+        return rel
+
+    def run(self):
+        stats = BatchStats()
+        start_time = time.perf_counter()
+        journal = CompletionJournal(self.journal_path) if self.journal_path else None
+        renderer = self.renderer_factory()
+        renderer.update_processing_params(make_params(self.params, self.params_factory))
+
+        lock = threading.Lock()
+        # Bounds the number of processed frames waiting to be encoded
+        write_slots = threading.BoundedSemaphore(self.write_workers * 4)
+        batches = collections.OrderedDict()
+        buffered = 0
+
+        def on_written(future, rel):
+            write_slots.release()
+            error = future.exception()
+            with lock:
+                if error is not None:
+                    stats.failed += 1
+                    stats.errors.append((rel, str(error)))
+                    return
+                stats.processed += 1
+            if journal is not None:
+                journal.mark(rel)
+
+        def process_batch(items):
+            nonlocal buffered
+            buffered -= len(items)
+            stats.batches += 1
+            for rel, image in items:
+                try:
+                    result = renderer.process_frame(image)
+                except Exception as e:
+                    with lock:
+                        stats.failed += 1
+                        stats.errors.append((rel, str(e)))
+                    continue
+                write_slots.acquire()
+                future = writers.submit(self._write, rel, result)
+                future.add_done_callback(lambda f, rel=rel: on_written(f, rel))
+
+        def handle(future, rel):
+            try:
+                rel, image = future.result()
+            except Exception as e:
+                with lock:
+                    stats.failed += 1
+                    stats.errors.append((rel, str(e)))
+                return
+            nonlocal buffered
+            group = batches.setdefault(image.shape, [])
+            group.append((rel, image))
+            buffered += 1
+            stats.peak_buffered = max(stats.peak_buffered, buffered)
+            if len(group) >= self.batch_size:
+                process_batch(batches.pop(image.shape))
+            elif buffered > self.max_buffered:
+                fullest = max(batches, key=lambda shape: len(batches[shape]))
+                process_batch(batches.pop(fullest))
+
+        try:
+            with ThreadPoolExecutor(self.decode_workers, thread_name_prefix="batch-decode") as decoders, \
+                 ThreadPoolExecutor(self.write_workers, thread_name_prefix="batch-write") as writers:
+                decodes = collections.deque()
+                for path, rel in iter_inputs(self.source):
+                    if journal is not None and rel in journal:
+                        stats.skipped += 1
+                        continue
+                    while len(decodes) >= self.prefetch:
+                        handle(*decodes.popleft())
+                    decodes.append((decoders.submit(self._decode, path, rel), rel))
+                while decodes:
+                    handle(*decodes.popleft())
+                for shape in list(batches):
+                    process_batch(batches.pop(shape))
+        finally:
+            if journal is not None:
+                journal.close()
+
+        stats.elapsed = time.perf_counter() - start_time
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="dx11-batch", description="Process a directory of images with the DX11 renderer")
+    parser.add_argument("source", help="Input directory or manifest file (one image path per line)")
+    parser.add_argument("-o", "--output", required=True, help="Output directory")
+    parser.add_argument("--preset", help="Preset name (presets/<name>.json) or path to a preset file")
+    parser.add_argument("--presets-dir", default="presets")
+    for name in PARAM_FIELDS:
+        parser.add_argument(f"--{name}", type=float, help=f"Override {name}")
+    parser.add_argument("--journal", help="Completion journal for resuming interrupted jobs")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--decode-workers", type=int)
+    parser.add_argument("--write-workers", type=int)
+    parser.add_argument("--format", dest="extension", help="Output extension, e.g. .jpg (default: keep)")
+    parser.add_argument("--jpeg-quality", type=int, default=95)
+    parser.add_argument("--png-compression", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    params = load_preset(args.preset, args.presets_dir) if args.preset else {}
+    for name in PARAM_FIELDS:
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+
+    job = BatchJob(args.source, args.output, params, batch_size=args.batch_size,
+                   decode_workers=args.decode_workers, write_workers=args.write_workers,
+                   output_extension=args.extension, jpeg_quality=args.jpeg_quality,
+                   png_compression=args.png_compression, journal=args.journal)
+    stats = job.run()
+    print(stats)
+    for rel, error in stats.errors[:20]:
+        print(f"  {rel}: {error}", file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
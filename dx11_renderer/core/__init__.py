@@ -2,9 +2,14 @@
 
 try:
     from .._core import (
+        AutoExposureSettings,
         DX11Renderer,
+        GeometryMode,
+        GeometrySettings,
+        Precision,
         ProcessingParams,
-        RendererStatus
+        RendererStatus,
+        TemporalSettings,
     )
 except ImportError as e:
     import sys
@@ -0,0 +1,279 @@
+"""Columnar detection log for analytics.
+
+``DetectionLog`` appends detection arrays into a preallocated NumPy
+structured-array ring of fixed-size chunks; a background thread writes every
+full chunk as columns (one ``.npy`` file per field, or a Parquet file when
+pyarrow is installed) next to a small JSON summary. ``DetectionLogReader``
+memory-maps the columns and prunes chunks by their summaries, so queries
+only touch the columns and chunks they need.
+
+Layout::
+
+    log_dir/chunk_000000/{stream,frame,timestamp,x1,...}.npy   (npy format)
+    log_dir/chunk_000000.parquet                               (parquet format)
+    log_dir/chunk_000000.json                                  rows, min/max, streams
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: chunks are written as .npy columns without pyarrow
+    pa = pq = None
+
+DETECTION_DTYPE = np.dtype([
+    ("stream", "<u4"),
+    ("frame", "<i8"),
+    ("timestamp", "<f8"),
+    ("x1", "<f4"),
+    ("y1", "<f4"),
+    ("x2", "<f4"),
+    ("y2", "<f4"),
+    ("score", "<f4"),
+    ("class", "<i4"),
+    ("track", "<i8"),      # -1 for untracked detections
+])
+
+_CHUNK_PREFIX = "chunk_"
+
+
+def _chunk_name(index):
+    return f"{_CHUNK_PREFIX}{index:06d}"
+
+
+class DetectionLog:
+    """Append detections to a chunked columnar log on a background thread
+
+    ``append`` copies a whole ``(N, 6)`` detection array (or ``(N, 7)``
+    tracks with an id column) into the ring with a few vectorised
+    assignments. The ring holds ``ring_chunks`` chunks of ``chunk_rows``
+    rows; when the writer falls that far behind, ``append`` waits for it
+    (``stalls`` counts the waits) instead of losing detections.
+    """
+
+    def __init__(self, directory, chunk_rows=65536, ring_chunks=4, format="auto"):
+        if format == "auto":
+            format = "parquet" if pq is not None else "npy"
+        if format == "parquet" and pq is None:
+            raise ImportError("The parquet format requires pyarrow")
+        if format not in ("npy", "parquet"):
+            raise ValueError(f"Unknown detection log format {format!r}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.format = format
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self.chunks_written = 0
+        self.stalls = 0
+        self.errors = []
+
+        self._ring = np.zeros((max(2, ring_chunks), chunk_rows), dtype=DETECTION_DTYPE)
+        self._free = list(range(len(self._ring)))
+        self._current = self._free.pop(0)
+        self._fill = 0
+        self._pending = []          # (slot, rows, chunk index) waiting for the writer
+        self._next_chunk = _next_chunk_index(directory)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="detection-log", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, detections, stream=0, frame=-1, timestamp=None):
+        """Log ``(N, 6)`` detections or ``(N, 7)`` tracks of one frame"""
+        detections = np.asarray(detections)
+        if detections.size == 0:
+            return
+        if detections.ndim != 2 or detections.shape[1] not in (6, 7):
+            raise ValueError("Detections must be (N, 6) x1, y1, x2, y2, score, class rows "
+                             "or (N, 7) with a track id")
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._condition:
+            if self._closed:
+                raise ValueError("Detection log is closed")
+            offset = 0
+            while offset < len(detections):
+                # Another appender may be waiting for the writer to free a chunk
+                self._condition.wait_for(lambda: self._current is not None)
+                count = min(len(detections) - offset, self.chunk_rows - self._fill)
+                rows = self._ring[self._current, self._fill:self._fill + count]
+                block = detections[offset:offset + count]
+                rows["stream"] = stream
+                rows["frame"] = frame
+                rows["timestamp"] = timestamp
+                for column, name in enumerate(("x1", "y1", "x2", "y2", "score", "class")):
+                    rows[name] = block[:, column]
+                rows["track"] = block[:, 6] if block.shape[1] == 7 else -1
+                self._fill += count
+                self.rows += count
+                offset += count
+                if self._fill == self.chunk_rows:
+                    self._hand_off()
+
+    def _hand_off(self):
+        """Queue the current chunk for writing and move to a free one; needs the lock"""
+        self._pending.append((self._current, self._fill, self._next_chunk))
+        self._next_chunk += 1
+        self._current = None
+        self._fill = 0
+        self._condition.notify_all()
+        if not self._free:
+            self.stalls += 1
+            self._condition.wait_for(lambda: self._free)
+        self._current = self._free.pop(0)
+        self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                slot, rows, index = self._pending[0]
+            try:
+                _write_chunk(self.directory, index, self._ring[slot, :rows], self.format)
+                self.chunks_written += 1
+            except Exception as e:
+                self.errors.append(e)
+            with self._condition:
+                self._pending.pop(0)
+                self._free.append(slot)
+                self._condition.notify_all()
+
+    def flush(self):
+        """Write out everything appended so far, including a partial chunk"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._current is not None)
+            if self._fill:
+                self._hand_off()
+            self._condition.wait_for(lambda: not self._pending)
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+
+def _next_chunk_index(directory):
+    indices = [int(name[len(_CHUNK_PREFIX):-5]) for name in os.listdir(directory)
+               if name.startswith(_CHUNK_PREFIX) and name.endswith(".json")]
+    return max(indices) + 1 if indices else 0
+
+
+def _write_chunk(directory, index, rows, format):
+    name = _chunk_name(index)
+    if format == "npy":
+        temporary = os.path.join(directory, name + ".tmp")
+        os.makedirs(temporary, exist_ok=True)
+        for field in DETECTION_DTYPE.names:
+            np.save(os.path.join(temporary, f"{field}.npy"), np.ascontiguousarray(rows[field]))
+        target = os.path.join(directory, name)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(temporary, target)
+    else:
+        table = pa.table({field: rows[field] for field in DETECTION_DTYPE.names})
+        temporary = os.path.join(directory, name + ".parquet.tmp")
+        pq.write_table(table, temporary)
+        os.replace(temporary, os.path.join(directory, name + ".parquet"))
+
+    # The summary is written last: a chunk without one is incomplete
+    summary = {
+        "rows": int(len(rows)),
+        "format": format,
+        "streams": sorted(int(s) for s in np.unique(rows["stream"])),
+        "frame": [int(rows["frame"].min()), int(rows["frame"].max())],
+        "timestamp": [float(rows["timestamp"].min()), float(rows["timestamp"].max())],
+    }
+    temporary = os.path.join(directory, name + ".json.tmp")
+    with open(temporary, "w") as f:
+        json.dump(summary, f)
+    os.replace(temporary, os.path.join(directory, name + ".json"))
+
+
+class DetectionLogReader:
+    """Query a detection log through memory-mapped columns"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.chunks = []
+        for name in sorted(os.listdir(directory)):
+            if name.startswith(_CHUNK_PREFIX) and name.endswith(".json"):
+                with open(os.path.join(directory, name), "r") as f:
+                    self.chunks.append((name[:-5], json.load(f)))
+
+    def __len__(self):
+        return sum(summary["rows"] for _, summary in self.chunks)
+
+    def column(self, chunk, field):
+        """One column of one chunk; memory-mapped for the npy format"""
+        name, summary = chunk
+        if summary["format"] == "npy":
+            return np.load(os.path.join(self.directory, name, f"{field}.npy"), mmap_mode="r")
+        if pq is None:
+            raise ImportError("Reading parquet chunks requires pyarrow")
+        table = pq.read_table(os.path.join(self.directory, name + ".parquet"), columns=[field],
+                              memory_map=True)
+        return table.column(field).to_numpy()
+
+    def _may_match(self, summary, stream, frames, time_range):
+        if stream is not None and stream not in summary["streams"]:
+            return False
+        for (low, high), bounds in ((frames, summary["frame"]), (time_range, summary["timestamp"])):
+            if low is not None and bounds[1] < low:
+                return False
+            if high is not None and bounds[0] >= high:
+                return False
+        return True
+
+    def query(self, stream=None, frames=(None, None), time_range=(None, None), min_score=None,
+              classes=None, columns=None):
+        """Rows matching every given filter as a structured array
+
+        ``frames`` and ``time_range`` are half-open ``(low, high)`` ranges
+        (either end may be None). Chunks whose summary rules them out are
+        skipped without being opened; filters only read the columns they
+        test, and ``columns`` limits the returned fields.
+        """
+        columns = list(columns or DETECTION_DTYPE.names)
+        dtype = np.dtype([(name, DETECTION_DTYPE[name]) for name in columns])
+        parts = []
+        for chunk in self.chunks:
+            if not self._may_match(chunk[1], stream, frames, time_range):
+                continue
+            mask = np.ones(chunk[1]["rows"], dtype=bool)
+            if stream is not None:
+                mask &= self.column(chunk, "stream") == stream
+            for field, (low, high) in (("frame", frames), ("timestamp", time_range)):
+                if low is not None:
+                    mask &= self.column(chunk, field) >= low
+                if high is not None:
+                    mask &= self.column(chunk, field) < high
+            if min_score is not None:
+                mask &= self.column(chunk, "score") >= min_score
+            if classes is not None:
+                mask &= np.isin(self.column(chunk, "class"), list(classes))
+            count = int(mask.sum())
+            if not count:
+                continue
+            part = np.empty(count, dtype=dtype)
+            for name in columns:
+                part[name] = self.column(chunk, name)[mask]
+            parts.append(part)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
@@ -0,0 +1,246 @@
+"""Geometric correction: lens undistortion and perspective warps.
+
+The renderer corrects geometry while its kernel samples the input (see
+``DX11Renderer.set_geometry``), so correction costs no extra pass. Lens
+undistortion samples through fixed-point remap tables that are built once
+for each resolution and calibration and then cached on the GPU. A
+homography needs no table: the kernel maps every pixel through its inverse.
+This module builds the same tables (``remap_tables``) and models the
+kernel's sampling in NumPy (``emulate``). It also compares both against
+OpenCV's ``cv2.undistort`` and ``cv2.warpPerspective`` (``reference``).
+
+Calibrations are dicts (or JSON files) holding either ``camera_matrix``
+(3x3), ``dist_coeffs`` and an optional ``new_camera_matrix``, or a
+``homography`` (3x3) mapping input pixels to output pixels::
+
+    python -m dx11_renderer.geometry calibration.json --resolution 1920x1080
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from .precision import accuracy, synthetic_frame
+
+CALIBRATION_FIELDS = ("camera_matrix", "dist_coeffs", "new_camera_matrix", "homography")
+# k1, k2, p1, p2, k3, k4, k5, k6: the rational model is the largest the renderer takes
+MAX_DIST_COEFFS = 8
+# Subpixel resolution of the remap tables (cv2.INTER_BITS)
+REMAP_BITS = 5
+
+
+def _matrix(values):
+    return np.asarray(values, dtype=np.float64).reshape(3, 3)
+
+
+def _dist_coeffs(values):
+    coeffs = np.asarray(values if values is not None else (), dtype=np.float64).ravel()
+    if coeffs.size > MAX_DIST_COEFFS:
+        raise ValueError(f"At most {MAX_DIST_COEFFS} distortion coefficients are supported, got {coeffs.size}")
+    return np.pad(coeffs, (0, MAX_DIST_COEFFS - coeffs.size))
+
+
+def _mode(calibration):
+    if calibration.get("homography") is not None:
+        if calibration.get("camera_matrix") is not None:
+            raise ValueError("A calibration holds either a camera matrix or a homography, not both")
+        return "homography"
+    if calibration.get("camera_matrix") is None:
+        raise ValueError("A calibration needs a camera_matrix or a homography")
+    return "undistort"
+
+
+def load_calibration(path):
+    """Read a calibration JSON file into a dict of NumPy arrays"""
+    with open(path, "r") as f:
+        calibration = json.load(f)
+    unknown = set(calibration) - set(CALIBRATION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown calibration fields in {path}: {', '.join(sorted(unknown))}")
+    _mode(calibration)
+    return {name: np.asarray(value, dtype=np.float64) for name, value in calibration.items() if value is not None}
+
+
+def make_geometry(calibration, settings_factory=None):
+    """Build a GeometrySettings (or ``settings_factory()``) from a calibration dict
+
+    Matrices are flattened row-major. With a ``settings_factory`` the mode is
+    left as its name (``"undistort"`` or ``"homography"``).
+    """
+    mode = _mode(calibration)
+    if settings_factory is None:
+        from dx11_renderer import GeometryMode, GeometrySettings as settings_factory
+        mode_value = getattr(GeometryMode, mode.upper())
+    else:
+        mode_value = mode
+    settings = settings_factory()
+    settings.mode = mode_value
+    if mode == "homography":
+        settings.homography = _matrix(calibration["homography"]).ravel().tolist()
+    else:
+        settings.camera_matrix = _matrix(calibration["camera_matrix"]).ravel().tolist()
+        settings.distortion = _dist_coeffs(calibration.get("dist_coeffs")).tolist()
+        new_matrix = calibration.get("new_camera_matrix")
+        settings.new_camera_matrix = (_matrix(new_matrix).ravel().tolist() if new_matrix is not None
+                                      else [0.0] * 9)
+    return settings
+
+
+def remap_tables(shape, calibration):
+    """The renderer's undistortion tables for frames of ``shape`` (height, width, ...)
+
+    Returns OpenCV's fixed-point map pair, the one ``cv2.undistort`` remaps
+    through: ``(H, W, 2)`` int16 source pixels and ``(H, W)`` uint16 indices
+    of the 1/32-pixel offset in x (low five bits) and y (high five bits).
+    """
+    if _mode(calibration) != "undistort":
+        raise ValueError("Only undistortion uses remap tables; homographies are evaluated per pixel")
+    height, width = shape[:2]
+    camera_matrix = _matrix(calibration["camera_matrix"])
+    new_matrix = calibration.get("new_camera_matrix")
+    new_matrix = _matrix(new_matrix) if new_matrix is not None else camera_matrix
+    return cv2.initUndistortRectifyMap(camera_matrix, _dist_coeffs(calibration.get("dist_coeffs")), None,
+                                       new_matrix, (width, height), cv2.CV_16SC2)
+
+
+def _source_positions(shape, calibration, tables=None):
+    """Integer source pixel and float32 subpixel offset of every output pixel"""
+    if _mode(calibration) == "undistort":
+        coords, weights = tables if tables is not None else remap_tables(shape, calibration)
+        mask = (1 << REMAP_BITS) - 1
+        scale = np.float32(1 << REMAP_BITS)
+        return (coords[..., 0].astype(np.int32), coords[..., 1].astype(np.int32),
+                (weights & mask) / scale, (weights >> REMAP_BITS) / scale)
+
+    # The kernel evaluates H^-1 * (x, y, 1) in float32, as cv2.warpPerspective
+    # does for each output pixel
+    height, width = shape[:2]
+    inverse = np.linalg.inv(_matrix(calibration["homography"])).astype(np.float32)
+    x = np.arange(width, dtype=np.float32)[None, :]
+    y = np.arange(height, dtype=np.float32)[:, None]
+    w = inverse[2, 0] * x + inverse[2, 1] * y + inverse[2, 2]
+    valid = w != 0
+    w = np.where(valid, w, np.float32(1.0))
+    source_x = (inverse[0, 0] * x + inverse[0, 1] * y + inverse[0, 2]) / w
+    source_y = (inverse[1, 0] * x + inverse[1, 1] * y + inverse[1, 2]) / w
+    # Points at infinity land far outside the frame, so they come out black
+    source_x = np.where(valid, source_x, np.float32(-2.0))
+    base_x = np.floor(source_x)
+    base_y = np.floor(source_y)
+    return (base_x.astype(np.int32), base_y.astype(np.int32),
+            (source_x - base_x).astype(np.float32), (source_y - base_y).astype(np.float32))
+
+
+def _load(frame, x, y):
+    """Pixels at integer positions; outside the frame they are black"""
+    height, width = frame.shape[:2]
+    inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    values = frame[np.clip(y, 0, height - 1), np.clip(x, 0, width - 1)].astype(np.float32)
+    values[~inside] = 0.0
+    return values
+
+
+def emulate(frame, calibration, tables=None):
+    """NumPy model of the kernel's geometry sampling; returns BGR uint8
+
+    ``tables`` reuses undistortion tables from ``remap_tables``. The kernel
+    blends the four neighbouring texels in float and hands the result
+    straight to the colour adjustments; this model rounds it to 8 bits, as
+    the kernel's output does with identity colour parameters.
+    """
+    x, y, fx, fy = _source_positions(frame.shape, calibration, tables)
+    fx = fx.astype(np.float32)[..., None]
+    fy = fy.astype(np.float32)[..., None]
+    top = _load(frame, x, y) * (1 - fx) + _load(frame, x + 1, y) * fx
+    bottom = _load(frame, x, y + 1) * (1 - fx) + _load(frame, x + 1, y + 1) * fx
+    blended = top * (1 - fy) + bottom * fy
+    return np.floor(np.clip(blended, 0.0, 255.0) + 0.5).astype(np.uint8)
+
+
+def reference(frame, calibration):
+    """OpenCV's own correction of ``frame``, computed from scratch"""
+    height, width = frame.shape[:2]
+    if _mode(calibration) == "undistort":
+        new_matrix = calibration.get("new_camera_matrix")
+        return cv2.undistort(frame, _matrix(calibration["camera_matrix"]),
+                             _dist_coeffs(calibration.get("dist_coeffs")),
+                             newCameraMatrix=_matrix(new_matrix) if new_matrix is not None else None)
+    return cv2.warpPerspective(frame, _matrix(calibration["homography"]), (width, height),
+                               flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+
+
+def _native_renderer(calibration):
+    from dx11_renderer import DX11Renderer
+    renderer = DX11Renderer()
+    if not renderer.status.isInitialized:
+        raise RuntimeError(f"Renderer failed to initialize: {renderer.status.lastError}")
+    renderer.set_geometry(make_geometry(calibration))
+    return renderer
+
+
+def _time(process, frame, frames):
+    output = process(frame)  # warm-up: tables, textures, shader caches
+    started = time.perf_counter()
+    for _ in range(frames):
+        output = process(frame)
+    return output, (time.perf_counter() - started) / frames * 1000.0
+
+
+def compare(calibration, frame, frames=30, emulated=False, renderer_factory=None):
+    """Accuracy and ms/frame of the renderer (or ``emulate``) against OpenCV
+
+    For undistortion OpenCV is timed twice: computing the maps from scratch
+    every frame (``cv2.undistort``) and remapping through cached tables,
+    which is what the renderer does on the GPU (``opencv_cached_ms``, None
+    for homographies).
+    """
+    expected, reference_ms = _time(lambda f: reference(f, calibration), frame, frames)
+    tables, cached_ms = None, None
+    if _mode(calibration) == "undistort":
+        tables = remap_tables(frame.shape, calibration)
+        _, cached_ms = _time(lambda f: cv2.remap(f, tables[0], tables[1], cv2.INTER_LINEAR,
+                                                 borderMode=cv2.BORDER_CONSTANT), frame, frames)
+    if emulated:
+        process = lambda f: emulate(f, calibration, tables)
+    else:
+        process = (renderer_factory or _native_renderer)(calibration).process_frame
+    output, ms = _time(process, frame, frames)
+    return dict(accuracy(output, expected.astype(np.float64)), ms_per_frame=ms,
+                opencv_ms=reference_ms, opencv_cached_ms=cached_ms)
+
+
+def _resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the renderer's geometric correction against OpenCV")
+    parser.add_argument("calibration", help="Calibration JSON with camera_matrix/dist_coeffs or a homography")
+    parser.add_argument("--resolution", type=_resolution, default=(1920, 1080))
+    parser.add_argument("--image", help="Test image (default: a synthetic frame at --resolution)")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--emulate", action="store_true", help="Use the NumPy model instead of the GPU")
+    args = parser.parse_args(argv)
+
+    calibration = load_calibration(args.calibration)
+    frame = cv2.imread(args.image) if args.image else synthetic_frame(*args.resolution)
+    if frame is None:
+        print(f"Error: could not read {args.image}", file=sys.stderr)
+        return 1
+    result = compare(calibration, frame, args.frames, emulated=args.emulate)
+    print(f"{frame.shape[1]}x{frame.shape[0]} {_mode(calibration)}: PSNR {result['psnr']:.2f} dB, "
+          f"max error {result['max_error']} levels")
+    print(f"  renderer{' (emulated)' if args.emulate else ''}: {result['ms_per_frame']:.2f} ms/frame")
+    print(f"  OpenCV per frame: {result['opencv_ms']:.2f} ms")
+    if result["opencv_cached_ms"] is not None:
+        print(f"  OpenCV with cached tables: {result['opencv_cached_ms']:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
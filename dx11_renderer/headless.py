@@ -0,0 +1,410 @@
+"""Headless capture -> process -> detect loop without HighGUI.
+
+Parameters come from the ``processing`` section of ``config.json`` (the
+layout ``utils.Config`` reads, re-read when the file changes) and/or a
+control socket; processed frames go to pluggable sinks. Frame pacing uses
+an explicit clock instead of ``cv2.waitKey``.
+
+Usage::
+
+    python -m dx11_renderer.headless --source feed.dx11raw --config config.json \\
+        --fps 30 --video out.mp4 --control-port 50552
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import cv2
+
+from . import tracing
+from .geometry import load_calibration, make_geometry
+from .presets import PARAM_FIELDS, make_params
+from .process_pool import _default_renderer
+from .quality import AdaptiveQualityController
+from .recording import open_capture
+from .server import AUTHKEY_ENV, authenticate, resolve_authkey, status_to_dict, write_authkey
+from .sinks import ImageSequenceSink, RecordingSink, SharedMemorySink, VideoFileSink
+from .streaming import StreamingSink
+
+DEFAULT_CONTROL_ADDRESS = ("127.0.0.1", 50552)
+
+
+class FrameClock:
+    """Pace a loop at ``fps`` frames per second
+
+    ``wait`` sleeps until the next frame deadline. A loop that falls more
+    than one frame behind is counted as late and re-anchored to now instead
+    of bursting to catch up.
+    """
+
+    def __init__(self, fps=None):
+        self.interval = 1.0 / fps if fps else 0.0
+        self.late_frames = 0
+        self._next = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        if self._next is None:
+            self._next = now
+        delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+        elif -delay > self.interval:
+            self.late_frames += 1
+            self._next = now
+        self._next += self.interval
+
+
+class ConfigParams:
+    """Processing parameters from a ``config.json``, reloaded on change"""
+
+    def __init__(self, path="config.json", poll_interval=0.5):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._mtime = None
+        self._last_poll = 0.0
+
+    def poll(self):
+        """Return the parameters if the file changed since the last call, else None"""
+        now = time.monotonic()
+        if self._mtime is not None and now - self._last_poll < self.poll_interval:
+            return None
+        self._last_poll = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return None
+            with open(self.path, "r") as f:
+                processing = json.load(f).get("processing", {})
+        except (OSError, ValueError):
+            # Keep the current parameters while the file is missing or mid-write
+            return None
+        self._mtime = mtime
+        return {name: float(processing[name]) for name in PARAM_FIELDS if name in processing}
+
+
+class HeadlessRunner:
+    """Drive capture, processing, optional detection and sinks in one loop
+
+    ``detector`` is an optional callable taking the processed frame and
+    returning detections; it runs every ``detect_every`` frames and its
+    latest result is passed to the sinks in ``info["detections"]``. With a
+    ``tracker`` (:class:`dx11_renderer.tracker.Tracker`) detections go
+    through ``tracker.update`` and the frames in between get
+    ``tracker.predict()`` boxes instead of the stale result.
+
+    An optional :class:`AdaptiveQualityController` (``quality``) times the
+    capture/process/detect/sink stages and lowers detector cadence, internal
+    resolution or optional stages (sinks with ``optional = True``) to hold
+    its budget.
+
+    Each frame and stage is also recorded as a span by ``tracing.tracer``
+    (see :mod:`dx11_renderer.tracing`) while tracing is enabled.
+
+    ``control_address`` accepts control messages from clients holding
+    ``authkey`` (generated when not given; see ``runner.authkey``). Trace
+    dumps requested over the socket go to files in ``trace_dir`` only.
+    """
+
+    def __init__(self, source, sinks=(), fps=None, config=None, params=None, detector=None,
+                 detect_every=1, control_address=None, authkey=None, max_frames=None,
+                 renderer_factory=None, params_factory=None, quality=None, tracker=None, trace_dir=None):
+        self.capture = open_capture(source) if source is None or isinstance(source, (str, int)) else source
+        self.sinks = list(sinks)
+        self.clock = FrameClock(fps)
+        self.config = ConfigParams(config) if isinstance(config, str) else config
+        self.detector = detector
+        self.tracker = tracker
+        self.detect_every = max(1, detect_every)
+        self.max_frames = max_frames
+        self.quality = quality
+        self.trace_dir = trace_dir
+        self.params_factory = params_factory
+        self.renderer = tracing.attach((renderer_factory or _default_renderer)())
+        self.frames = 0
+        self.processing_time = 0.0
+        self._detections = None
+
+        self._params = dict(params or {})
+        self._pending_params = dict(self._params)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener = None
+        if control_address is not None:
+            self.authkey = resolve_authkey(authkey, generate=True)
+            # Control clients authenticate on their own thread
+            self._listener = Listener(control_address)
+            self.control_address = self._listener.address
+            threading.Thread(target=self._serve_control, name="headless-control", daemon=True).start()
+
+    def set_params(self, values):
+        """Merge parameter values; applied before the next frame"""
+        with self._lock:
+            self._pending_params = dict(self._pending_params or self._params, **values)
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        with self._lock:
+            params = dict(self._params)
+        elapsed = self.processing_time / self.frames if self.frames else 0.0
+        status = {
+            "frames": self.frames,
+            "late_frames": self.clock.late_frames,
+            "avg_processing_ms": elapsed * 1000.0,
+            "params": params,
+            "renderer": status_to_dict(self.renderer.status) if hasattr(self.renderer, "status") else {},
+        }
+        if self.quality is not None:
+            status["quality"] = self.quality.status()
+        return status
+
+    def _serve_control(self):
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._stop.is_set():
+                    break
+                continue
+            threading.Thread(target=self._serve_control_client, args=(conn,), daemon=True).start()
+
+    def _serve_control_client(self, conn):
+        try:
+            authenticate(conn, self.authkey)
+        except (AuthenticationError, EOFError, OSError):
+            # A client without the key, or one that never answered
+            conn.close()
+            return
+        try:
+            while True:
+                message = conn.recv()
+                kind = message[0]
+                if kind == "params":
+                    unknown = set(message[1]) - set(PARAM_FIELDS)
+                    if unknown:
+                        conn.send(("error", f"Unknown parameters: {', '.join(sorted(unknown))}"))
+                        continue
+                    self.set_params({name: float(value) for name, value in message[1].items()})
+                    conn.send(("ok",))
+                elif kind == "status":
+                    conn.send(("status", self.status()))
+                elif kind == "trace":
+                    # ("trace", True/False) toggles tracing, ("trace", name) dumps it to trace_dir
+                    if isinstance(message[1], str):
+                        path = self._trace_path(message[1])
+                        if path is None:
+                            conn.send(("error", "Trace dumps need a trace directory and a plain file name"))
+                        else:
+                            conn.send(("ok", tracing.dump(path)))
+                    else:
+                        (tracing.enable if message[1] else tracing.disable)()
+                        conn.send(("ok",))
+                elif kind == "stop":
+                    self.stop()
+                    conn.send(("ok",))
+                else:
+                    conn.send(("error", f"Unknown command {kind!r}"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _trace_path(self, name):
+        """``name`` inside ``trace_dir``, or None when it would leave it"""
+        if self.trace_dir is None or not name or os.path.basename(name) != name or name in (".", ".."):
+            return None
+        return os.path.join(self.trace_dir, name)
+
+    def _apply_params(self):
+        if self.config is not None:
+            values = self.config.poll()
+            if values is not None:
+                self.set_params(values)
+        with self._lock:
+            pending, self._pending_params = self._pending_params, None
+            if pending is None:
+                return
+            self._params = pending
+        self.renderer.update_processing_params(make_params(pending, self.params_factory))
+
+    @contextlib.contextmanager
+    def _stage(self, name):
+        with tracing.span(name):
+            if self.quality is None:
+                yield
+            else:
+                with self.quality.stage(name):
+                    yield
+
+    def _process(self, frame, scale):
+        if scale >= 1.0:
+            return self.renderer.process_frame(frame)
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        return cv2.resize(self.renderer.process_frame(small), (width, height), interpolation=cv2.INTER_LINEAR)
+
+    def _run_frame(self, start_time):
+        """Capture, process and publish one frame; False once the source ends"""
+        self.clock.wait()
+        level = self.quality.level if self.quality is not None else None
+        if self.quality is not None:
+            self.quality.begin_frame()
+        with self._stage("capture"):
+            ok, frame = self.capture.read()
+        if not ok or frame is None:
+            return False
+        self._apply_params()
+
+        started = time.perf_counter()
+        with self._stage("process"):
+            processed = self._process(frame, level.scale if level else 1.0)
+        detect_every = self.detect_every * (level.detect_every if level else 1)
+        if (self.detector is not None and self.frames % detect_every == 0
+                and not (level and level.skip_optional)):
+            with self._stage("detect"):
+                self._detections = self.detector(processed)
+                if self.tracker is not None:
+                    self._detections = self.tracker.update(self._detections)
+        elif self.tracker is not None and self.detector is not None:
+            with self._stage("track"):
+                self._detections = self.tracker.predict()
+        self.processing_time += time.perf_counter() - started
+
+        info = {"index": self.frames, "timestamp": started - start_time, "detections": self._detections}
+        with self._stage("sinks"):
+            for sink in self.sinks:
+                if level and level.skip_optional and getattr(sink, "optional", False):
+                    continue
+                sink.write(processed, info)
+        if self.quality is not None:
+            self.quality.end_frame()
+        self.frames += 1
+        return True
+
+    def run(self):
+        """Run until the source ends, ``max_frames`` is reached or ``stop()``"""
+        self._detections = None
+        start_time = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                if self.max_frames is not None and self.frames >= self.max_frames:
+                    break
+                with tracing.frame(self.frames):
+                    if not self._run_frame(start_time):
+                        break
+        finally:
+            self.close()
+        return self.status()
+
+    def close(self):
+        self._stop.set()
+        tracing.detach(self.renderer)
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        for sink in self.sinks:
+            sink.close()
+        self.sinks = []
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+
+def send_control(message, address=DEFAULT_CONTROL_ADDRESS, authkey=None):
+    """Send one control message to a running headless runner and return the reply
+
+    ``authkey`` is the runner's key; without one ``$DX11_RENDER_AUTHKEY`` is used.
+    """
+    with Client(address, authkey=resolve_authkey(authkey)) as conn:
+        conn.send(message)
+        return conn.recv()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the DX11 processing loop without a GUI")
+    parser.add_argument("--source", help="Camera index, video file or .dx11raw recording (default: camera 0, then 1)")
+    parser.add_argument("--config", default="config.json", help="Config file with a 'processing' section")
+    parser.add_argument("--fps", type=float, help="Pace the loop at this rate (default: as fast as possible)")
+    parser.add_argument("--frames", type=int, help="Stop after N frames")
+    parser.add_argument("--budget-ms", type=float,
+                        help="Adapt quality to hold this frame-time budget (default with --adaptive: 1000/fps)")
+    parser.add_argument("--adaptive", action="store_true", help="Enable adaptive quality control")
+    parser.add_argument("--control-port", type=int, help="Accept control messages on 127.0.0.1:PORT")
+    parser.add_argument("--authkey-file", help="Write the control key here (owner-only) for control clients")
+    parser.add_argument("--trace-dir", help="Directory for trace dumps requested over the control socket")
+    parser.add_argument("--video", help="Write processed frames to a video file")
+    parser.add_argument("--images", help="Write processed frames to an image directory")
+    parser.add_argument("--image-every", type=int, default=1)
+    parser.add_argument("--record", help="Write processed frames to a .dx11raw recording")
+    parser.add_argument("--shared-memory", help="Publish the latest frame in this shared-memory block")
+    parser.add_argument("--mjpeg-port", type=int, help="Serve an MJPEG stream on HOST:PORT/stream.mjpg")
+    parser.add_argument("--raw-port", type=int, help="Serve length-prefixed raw frames over TCP")
+    parser.add_argument("--stream-host", default="127.0.0.1")
+    parser.add_argument("--trace", help="Record per-frame spans and write Chrome trace JSON here on exit")
+    parser.add_argument("--calibration", help="Correct lens distortion or perspective with this calibration JSON")
+    args = parser.parse_args(argv)
+    if args.control_port and args.authkey_file is None and not os.environ.get(AUTHKEY_ENV):
+        parser.error(f"control clients need the key: pass --authkey-file or set ${AUTHKEY_ENV}")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+
+    sinks = []
+    output_fps = args.fps or 30.0
+    if args.video:
+        sinks.append(VideoFileSink(args.video, output_fps))
+    if args.images:
+        sinks.append(ImageSequenceSink(args.images, every=args.image_every))
+    if args.record:
+        sinks.append(RecordingSink(args.record, output_fps))
+    if args.shared_memory:
+        sinks.append(SharedMemorySink(args.shared_memory))
+    if args.mjpeg_port is not None or args.raw_port is not None:
+        sinks.append(StreamingSink(
+            (args.stream_host, args.mjpeg_port) if args.mjpeg_port is not None else None,
+            (args.stream_host, args.raw_port) if args.raw_port is not None else None))
+
+    if args.trace:
+        tracing.enable()
+    control = (DEFAULT_CONTROL_ADDRESS[0], args.control_port) if args.control_port else None
+    config = args.config if os.path.exists(args.config) else None
+    quality = None
+    if args.adaptive or args.budget_ms:
+        quality = AdaptiveQualityController(target_fps=args.fps or 30.0, budget_ms=args.budget_ms)
+    runner = HeadlessRunner(args.source, sinks, fps=args.fps, config=config,
+                            control_address=control, max_frames=args.frames, quality=quality,
+                            trace_dir=args.trace_dir)
+    if control is not None and args.authkey_file:
+        write_authkey(args.authkey_file, runner.authkey)
+    if runner.capture is None or not runner.capture.isOpened():
+        print(f"Error: could not open video source {args.source or '0/1'}", file=sys.stderr)
+        runner.close()
+        return 1
+    if args.calibration:
+        runner.renderer.set_geometry(make_geometry(load_calibration(args.calibration)))
+    try:
+        status = runner.run()
+    except KeyboardInterrupt:
+        status = runner.status()
+    if args.trace:
+        print(f"Wrote {tracing.dump(args.trace)} trace events to {args.trace}")
+    print(f"Processed {status['frames']} frames ({status['late_frames']} late, "
+          f"{status['avg_processing_ms']:.2f} ms/frame)")
+    for change in status.get("quality", {}).get("changes", []):
+        print(f"  quality {change['from']} -> {change['to']} ({change['reason']}, {change['average_ms']:.2f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
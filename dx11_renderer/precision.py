@@ -0,0 +1,226 @@
+"""Accuracy and speed of the renderer's precision modes.
+
+``reference_process`` is a float64 implementation of the kernel's
+brightness/contrast/saturation/hue/gamma math; every precision mode is measured
+against it (PSNR and maximum error in 8-bit levels). ``emulate`` reproduces
+each mode's arithmetic in NumPy so accuracy can be checked without a GPU.
+
+Bench report::
+
+    python -m dx11_renderer.precision --resolutions 1280x720 1920x1080 3840x2160 --min-psnr 40
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from .presets import PARAM_DEFAULTS, PARAM_FIELDS, make_params
+
+PRECISIONS = ("float32", "float16", "uint8")
+
+# Rec. 709 luma weights used by the kernel, in RGB order
+_LUMA = (0.2126, 0.7152, 0.0722)
+
+
+def _params_tuple(params):
+    """(brightness, contrast, saturation, gamma, hue) from a dict or ProcessingParams"""
+    if isinstance(params, dict):
+        return tuple(float(params.get(name, PARAM_DEFAULTS[name])) for name in PARAM_FIELDS)
+    return tuple(float(getattr(params, name)) for name in PARAM_FIELDS)
+
+
+def _ycbcr_matrices():
+    """Rec. 709 RGB to YCbCr and back, without offsets"""
+    wr, wg, wb = _LUMA
+    to_ycbcr = np.array([[wr, wg, wb],
+                         [-wr / (2 * (1 - wb)), -wg / (2 * (1 - wb)), 0.5],
+                         [0.5, -wg / (2 * (1 - wr)), -wb / (2 * (1 - wr))]])
+    return to_ycbcr, np.linalg.inv(to_ycbcr)
+
+
+def color_matrix(params):
+    """The RGB matrix the renderer builds from brightness, contrast, saturation and hue"""
+    brightness, contrast, saturation, _, hue = _params_tuple(params)
+    to_ycbcr, to_rgb = _ycbcr_matrices()
+    angle, k = np.radians(hue), contrast * saturation
+    chroma = np.array([[1.0, 0.0, 0.0],
+                       [0.0, k * np.cos(angle), -k * np.sin(angle)],
+                       [0.0, k * np.sin(angle), k * np.cos(angle)]])
+    return brightness * (to_rgb @ chroma @ to_ycbcr)
+
+
+def reference_process(frame, params):
+    """Float64 kernel output for a BGR uint8 frame, unquantized, in 0..255"""
+    brightness, contrast, saturation, gamma, hue = _params_tuple(params)
+    to_ycbcr, to_rgb = _ycbcr_matrices()
+    rgb = frame[..., ::-1].astype(np.float64) / 255.0 * brightness
+    ycbcr = rgb @ to_ycbcr.T
+    # Contrast and saturation scale chroma around the pixel's luma; hue rotates it
+    cb, cr = ycbcr[..., 1] * contrast * saturation, ycbcr[..., 2] * contrast * saturation
+    angle = np.radians(hue)
+    ycbcr[..., 1] = cb * np.cos(angle) - cr * np.sin(angle)
+    ycbcr[..., 2] = cb * np.sin(angle) + cr * np.cos(angle)
+    rgb = ycbcr @ to_rgb.T
+    rgb = np.clip(rgb, 0.0, 1.0) ** (1.0 / gamma)
+    return rgb[..., ::-1] * 255.0
+
+
+def _emulate_float(frame, params, dtype):
+    gamma = _params_tuple(params)[3]
+    color = frame[..., ::-1].astype(np.float32) / np.float32(255.0)
+    # The matrix reaches the kernel as float32 constants
+    matrix = color_matrix(params).astype(np.float32).astype(dtype)
+    rgb = color.astype(dtype) @ matrix.T
+    rgb = np.power(np.clip(rgb, dtype(0), dtype(1)), dtype(1.0 / gamma)).astype(np.float32)
+    return np.floor(np.clip(rgb, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)[..., ::-1]
+
+
+def gamma_lut(gamma):
+    """The 256 entry table the integer pipeline uses for gamma"""
+    values = np.power(np.arange(256) / 255.0, 1.0 / gamma)
+    return np.minimum(255, np.floor(values * 255.0 + 0.5)).astype(np.int32)
+
+
+def _emulate_uint8(frame, params):
+    gamma = _params_tuple(params)[3]
+    m8 = np.round(color_matrix(params).astype(np.float32) * np.float32(256.0)).astype(np.int32)
+    c = frame[..., ::-1].astype(np.int32)
+    c = (c @ m8.T + 128) >> 8
+    c = np.clip(c, 0, 255)
+    return gamma_lut(gamma)[c].astype(np.uint8)[..., ::-1]
+
+
+def emulate(frame, params, precision="float32"):
+    """NumPy model of the kernel in one precision mode; returns BGR uint8"""
+    if precision == "float32":
+        return _emulate_float(frame, params, np.float32)
+    if precision == "float16":
+        return _emulate_float(frame, params, np.float16)
+    if precision == "uint8":
+        return _emulate_uint8(frame, params)
+    raise ValueError(f"Unknown precision {precision!r}; expected one of {', '.join(PRECISIONS)}")
+
+
+def psnr(output, reference):
+    """Peak signal-to-noise ratio in dB against a 0..255 reference"""
+    mse = np.mean((output.astype(np.float64) - reference) ** 2)
+    return float("inf") if mse == 0 else float(10.0 * np.log10(255.0 ** 2 / mse))
+
+
+def max_error(output, reference):
+    """Largest difference in 8-bit levels from the rounded reference"""
+    ideal = np.floor(reference + 0.5)
+    return int(np.max(np.abs(output.astype(np.int32) - ideal.astype(np.int32))))
+
+
+def accuracy(output, reference):
+    return {"psnr": psnr(output, reference), "max_error": max_error(output, reference)}
+
+
+def synthetic_frame(width, height, seed=0):
+    """Deterministic frame with gradients, saturated colors and noise"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 1.0, width)[None, :]
+    y = np.linspace(0.0, 1.0, height)[:, None]
+    frame = np.stack([x * np.ones_like(y), y * np.ones_like(x), (x + y) / 2.0], axis=-1) * 255.0
+    frame += rng.normal(0.0, 12.0, frame.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def _native_renderer(precision):
+    from dx11_renderer import DX11Renderer
+    renderer = DX11Renderer(precision)
+    if not renderer.status.isInitialized:
+        raise RuntimeError(f"Renderer failed to initialize: {renderer.status.lastError}")
+    return renderer
+
+
+def bench(precisions=PRECISIONS, resolutions=((1280, 720), (1920, 1080)), params=None, frames=30,
+          emulated=False, renderer_factory=None, params_factory=None):
+    """Measure ms/frame, PSNR and max error per precision and resolution
+
+    With ``emulated`` the NumPy models are timed instead of the renderer;
+    their accuracy matches the kernel but their speed says nothing about it.
+    """
+    params = params if params is not None else {"brightness": 1.2, "contrast": 1.1, "saturation": 1.3, "gamma": 0.8}
+    rows = []
+    for precision in precisions:
+        renderer = None
+        if not emulated:
+            renderer = (renderer_factory or _native_renderer)(precision)
+            renderer.update_processing_params(make_params(params, params_factory))
+        for width, height in resolutions:
+            frame = synthetic_frame(width, height)
+            reference = reference_process(frame, params)
+            if emulated:
+                process = lambda f: emulate(f, params, precision)
+            else:
+                process = renderer.process_frame
+            output = process(frame)  # warm-up: texture creation, shader caches
+            started = time.perf_counter()
+            for _ in range(frames):
+                output = process(frame)
+            elapsed = (time.perf_counter() - started) / frames
+            rows.append(dict(precision=precision, width=width, height=height,
+                             ms_per_frame=elapsed * 1000.0, **accuracy(output, reference)))
+    return rows
+
+
+def cheapest_meeting(rows, min_psnr=None, max_error_levels=None):
+    """Fastest precision per resolution that meets the quality threshold"""
+    choice = {}
+    for row in rows:
+        if min_psnr is not None and row["psnr"] < min_psnr:
+            continue
+        if max_error_levels is not None and row["max_error"] > max_error_levels:
+            continue
+        key = (row["width"], row["height"])
+        if key not in choice or row["ms_per_frame"] < choice[key]["ms_per_frame"]:
+            choice[key] = row
+    return choice
+
+
+def format_report(rows, min_psnr=None, max_error_levels=None):
+    lines = ["| precision | resolution | ms/frame | PSNR (dB) | max error |",
+             "|-----------|------------|---------:|----------:|----------:|"]
+    for row in rows:
+        lines.append(f"| {row['precision']} | {row['width']}x{row['height']} | {row['ms_per_frame']:.2f} "
+                     f"| {row['psnr']:.2f} | {row['max_error']} |")
+    if min_psnr is not None or max_error_levels is not None:
+        lines.append("")
+        choice = cheapest_meeting(rows, min_psnr, max_error_levels)
+        for width, height in dict.fromkeys((row["width"], row["height"]) for row in rows):
+            row = choice.get((width, height))
+            pick = row["precision"] if row else "none meets the threshold"
+            lines.append(f"Cheapest mode at {width}x{height}: {pick}")
+    return "\n".join(lines)
+
+
+def _resolution(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Speed/accuracy report for the renderer's precision modes")
+    parser.add_argument("--resolutions", nargs="+", type=_resolution, default=[(1280, 720), (1920, 1080)])
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--min-psnr", type=float, help="Quality threshold in dB for the recommendation")
+    parser.add_argument("--max-error", type=int, help="Quality threshold in 8-bit levels")
+    parser.add_argument("--emulate", action="store_true", help="Time the NumPy models instead of the GPU")
+    for name in PARAM_FIELDS:
+        parser.add_argument(f"--{name}", type=float)
+    args = parser.parse_args(argv)
+
+    params = {"brightness": 1.2, "contrast": 1.1, "saturation": 1.3, "gamma": 0.8}
+    params.update({name: getattr(args, name) for name in PARAM_FIELDS if getattr(args, name) is not None})
+    rows = bench(args.precisions, args.resolutions, params, args.frames, emulated=args.emulate)
+    print(format_report(rows, args.min_psnr, args.max_error))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""Processing parameter presets shared by the batch and CLI tools.
+
+Presets use the same JSON layout the demo scripts write to
+``presets/<name>.json``.
+"""
+
+import json
+import os
+
+PARAM_FIELDS = ("brightness", "contrast", "saturation", "gamma", "hue")
+# Values that leave a frame unchanged; hue is a rotation in degrees
+PARAM_DEFAULTS = {"brightness": 1.0, "contrast": 1.0, "saturation": 1.0, "gamma": 1.0, "hue": 0.0}
+
+
+def params_to_dict(params):
+    """Extract the plain float fields of a ProcessingParams-like object"""
+    return {name: float(getattr(params, name)) for name in PARAM_FIELDS if hasattr(params, name)}
+
+
+def load_preset(name, presets_dir="presets"):
+    """Load a preset by name (``presets/<name>.json``) or by file path"""
+    path = name if os.path.splitext(name)[1] == ".json" else os.path.join(presets_dir, f"{name}.json")
+    with open(path, "r") as f:
+        preset = json.load(f)
+    unknown = set(preset) - set(PARAM_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown preset fields in {path}: {', '.join(sorted(unknown))}")
+    return {name: float(value) for name, value in preset.items()}
+
+
+def make_params(values=None, params_factory=None):
+    """Build a ProcessingParams (or ``params_factory()``) from a dict of fields"""
+    if params_factory is None:
+        from dx11_renderer import ProcessingParams as params_factory
+    params = params_factory()
+    for name, value in (values or {}).items():
+        setattr(params, name, value)
+    return params
@@ -0,0 +1,378 @@
+"""Multi-process rendering sharded over shared-memory frame rings.
+
+Each worker process owns its own renderer (and optionally a detector).
+Frames travel through ``multiprocessing.shared_memory`` slots; only small
+descriptor tuples cross the pipes, so frames are never pickled.
+"""
+
+import collections
+import itertools
+import multiprocessing as mp
+import threading
+import time
+import zlib
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+from .autotune import tuned_setting
+from .presets import make_params, params_to_dict
+
+ShardResult = collections.namedtuple(
+    "ShardResult", ["stream_id", "frame_id", "frame", "detections", "error"]
+)
+
+
+def _default_renderer():
+    from dx11_renderer import DX11Renderer
+    return DX11Renderer()
+
+
+def _make_renderer(renderer_factory, memory_budget=None):
+    """Create a renderer and cap its GPU + host memory at ``memory_budget`` bytes"""
+    renderer = renderer_factory()
+    if memory_budget is not None:
+        renderer.memory_budget = int(memory_budget)
+    return renderer
+
+
+class FrameRing:
+    """Fixed number of equally sized frame slots in one shared memory block"""
+
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def view(self, slot, shape):
+        """Return a uint8 array view of ``slot`` with the given shape"""
+        nbytes = int(np.prod(shape))
+        if nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {nbytes} bytes exceeds slot size {self.slot_bytes}")
+        offset = slot * self.slot_bytes
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+
+    def write(self, slot, frame):
+        np.copyto(self.view(slot, frame.shape), frame, casting="no")
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _worker_main(index, conn, in_name, out_name, slots, slot_bytes,
+                 renderer_factory, params_factory, detector_factory, memory_budget=None):
+    """Worker loop: process descriptors until a stop message arrives"""
+    in_ring = FrameRing(slots, slot_bytes, name=in_name)
+    out_ring = FrameRing(slots, slot_bytes, name=out_name)
+    renderer = _make_renderer(renderer_factory, memory_budget)
+    detector = detector_factory() if detector_factory is not None else None
+    conn.send(("ready", index))
+
+    try:
+        while True:
+            message = conn.recv()
+            kind = message[0]
+            if kind == "stop":
+                break
+            if kind == "params":
+                renderer.update_processing_params(make_params(message[1], params_factory))
+                continue
+            if kind == "warmup":
+                try:
+                    if hasattr(renderer, "warmup"):
+                        renderer.warmup(message[1])
+                except Exception:
+                    # Sizes that could not be prepared are allocated by their
+                    # first frame instead, which reports any error
+                    pass
+                continue
+
+            _, frame_id, slot, shape = message
+            try:
+                processed = renderer.process_frame(in_ring.view(slot, shape))
+                out = out_ring.view(slot, processed.shape)
+                np.copyto(out, processed)
+                detections = detector(out) if detector is not None else None
+                conn.send(("done", frame_id, slot, processed.shape, detections, None))
+            except Exception as e:
+                conn.send(("done", frame_id, slot, None, None, f"{type(e).__name__}: {e}"))
+    finally:
+        del renderer
+        in_ring.close()
+        out_ring.close()
+        conn.close()
+
+
+class _Worker:
+    def __init__(self, index, slots, slot_bytes):
+        self.index = index
+        self.in_ring = FrameRing(slots, slot_bytes)
+        self.out_ring = FrameRing(slots, slot_bytes)
+        self.free_slots = collections.deque(range(slots))
+        self.in_flight = {}      # frame_id -> (stream_id, slot)
+        self.writing = set()     # Slots submit is filling outside the lock
+        self.process = None
+        self.conn = None
+        self.alive = False
+        self.restarts = 0
+
+
+class ShardedRenderPool:
+    """Shard frame streams across worker processes that each own a renderer
+
+    Streams are assigned to workers with a stable hash of their id, so every
+    frame of a stream is handled by the same worker (and stays in order).
+    Dead workers are respawned on the same shard; frames that were in flight
+    are reported back as failed results. ``memory_budget`` caps each worker's
+    renderer; frames that do not fit come back as failed results. Without
+    ``num_workers`` the pool uses the autotuned count (``dx11-autotune
+    --render-workers``), or one worker per CPU.
+    """
+
+    def __init__(self, num_workers=None, renderer_factory=None, detector_factory=None,
+                 params_factory=None, slots_per_worker=4, max_frame_shape=(1080, 1920, 3),
+                 respawn=True, start_method=None, memory_budget=None):
+        self.num_workers = num_workers or tuned_setting("render_workers", mp.cpu_count())
+        self.renderer_factory = renderer_factory or _default_renderer
+        self.params_factory = params_factory
+        self.detector_factory = detector_factory
+        self.slots = slots_per_worker
+        self.slot_bytes = int(np.prod(max_frame_shape))
+        self.respawn = respawn
+        self.memory_budget = memory_budget
+        self._ctx = mp.get_context(start_method)
+
+        self._lock = threading.Condition()
+        self._results = collections.deque()
+        self._frame_ids = itertools.count()
+        self._params = None
+        self._warmup = None
+        self._closed = False
+        self.stats = collections.Counter()
+
+        self._workers = [_Worker(i, self.slots, self.slot_bytes) for i in range(self.num_workers)]
+        for worker in self._workers:
+            self._start(worker)
+
+        self._collector = threading.Thread(target=self._collect, name="shard-collector", daemon=True)
+        self._collector.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start(self, worker):
+        parent_conn, child_conn = self._ctx.Pipe()
+        worker.conn = parent_conn
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.index, child_conn, worker.in_ring.name, worker.out_ring.name,
+                  self.slots, self.slot_bytes, self.renderer_factory,
+                  self.params_factory, self.detector_factory, self.memory_budget),
+            name=f"dx11-shard-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        worker.alive = True
+        child_conn.close()
+        if self._params is not None:
+            worker.conn.send(("params", self._params))
+        if self._warmup is not None:
+            worker.conn.send(("warmup", self._warmup))
+
+    def worker_for(self, stream_id):
+        """Index of the worker that owns ``stream_id``"""
+        return zlib.crc32(str(stream_id).encode("utf-8")) % self.num_workers
+
+    def submit(self, stream_id, frame, timeout=None):
+        """Queue a BGR frame for processing and return its frame id
+
+        Blocks while the owning worker has no free slot (backpressure).
+        """
+        frame = np.asarray(frame)
+        if frame.dtype != np.uint8:
+            raise TypeError("Frames must be uint8 arrays")
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes exceeds slot size {self.slot_bytes}")
+        worker = self._workers[self.worker_for(stream_id)]
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            while not worker.free_slots or not worker.alive:
+                if self._closed:
+                    raise RuntimeError("Pool is closed")
+                if not worker.alive and not self.respawn:
+                    raise RuntimeError(f"Worker {worker.index} has exited")
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No free slot on worker {worker.index}")
+                self._lock.wait(remaining)
+            slot = worker.free_slots.popleft()
+            frame_id = next(self._frame_ids)
+            worker.in_flight[frame_id] = (stream_id, slot)
+            worker.writing.add(slot)
+            self.stats["submitted"] += 1
+
+        try:
+            worker.in_ring.write(slot, frame)
+        except BaseException:
+            # Give the slot back; the frame was never sent
+            with self._lock:
+                worker.writing.discard(slot)
+                if worker.in_flight.pop(frame_id, None) is not None:
+                    self.stats["submitted"] -= 1
+                worker.free_slots.append(slot)
+                self._lock.notify_all()
+            raise
+        with self._lock:
+            worker.writing.discard(slot)
+            if frame_id not in worker.in_flight:
+                # The worker died during the write and the frame was already
+                # failed; a respawned worker must not receive it
+                worker.free_slots.append(slot)
+                self._lock.notify_all()
+                return frame_id
+            try:
+                worker.conn.send(("frame", frame_id, slot, frame.shape))
+            except (BrokenPipeError, OSError):
+                # The collector notices the dead worker and fails the frame
+                pass
+        return frame_id
+
+    def get(self, timeout=None):
+        """Return the next finished ShardResult, or None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while not self._results:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or self._closed:
+                    return None
+                self._lock.wait(remaining)
+            return self._results.popleft()
+
+    def pending(self):
+        with self._lock:
+            return sum(len(w.in_flight) for w in self._workers)
+
+    def update_processing_params(self, params):
+        """Broadcast new processing parameters to every worker"""
+        self._params = params_to_dict(params)
+        for worker in self._workers:
+            if not worker.alive:
+                continue
+            try:
+                worker.conn.send(("params", self._params))
+            except (BrokenPipeError, OSError):
+                pass
+
+    def warmup(self, resolutions):
+        """Have every worker's renderer prepare ``(width, height)`` frame sizes
+
+        Workers handle it ahead of any frame submitted afterwards; respawned
+        workers warm up again before their first frame.
+        """
+        self._warmup = [(int(width), int(height)) for width, height in resolutions]
+        for worker in self._workers:
+            if not worker.alive:
+                continue
+            try:
+                worker.conn.send(("warmup", self._warmup))
+            except (BrokenPipeError, OSError):
+                pass
+
+    def _collect(self):
+        while not self._closed:
+            conns = {w.conn: w for w in self._workers if w.alive}
+            if not conns:
+                time.sleep(0.25)
+                continue
+            for conn in connection.wait(list(conns), timeout=0.25):
+                worker = conns[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    self._mark_dead(worker)
+                    continue
+                if message[0] == "done":
+                    self._finish(worker, *message[1:])
+            for worker in self._workers:
+                if worker.alive and not worker.process.is_alive():
+                    self._mark_dead(worker)
+            if self.respawn and not self._closed:
+                for worker in self._workers:
+                    if not worker.alive:
+                        self._restart(worker)
+
+    def _finish(self, worker, frame_id, slot, shape, detections, error):
+        frame = None
+        if error is None:
+            frame = worker.out_ring.view(slot, shape).copy()
+        with self._lock:
+            if frame_id not in worker.in_flight:
+                # Already failed when its worker was marked dead
+                return
+            stream_id, _ = worker.in_flight.pop(frame_id)
+            worker.free_slots.append(slot)
+            self._results.append(ShardResult(stream_id, frame_id, frame, detections, error))
+            self.stats["failed" if error else "completed"] += 1
+            self._lock.notify_all()
+
+    def _mark_dead(self, worker):
+        """Fail every frame the worker still owned and recycle its slots"""
+        worker.process.join(timeout=1.0)
+        with self._lock:
+            worker.alive = False
+            reason = f"Worker {worker.index} exited with code {worker.process.exitcode}"
+            for frame_id, (stream_id, _) in worker.in_flight.items():
+                self._results.append(ShardResult(stream_id, frame_id, None, None, reason))
+                self.stats["failed"] += 1
+            worker.in_flight.clear()
+            # Slots still being written are returned by their submit
+            worker.free_slots = collections.deque(s for s in range(self.slots) if s not in worker.writing)
+            self._lock.notify_all()
+        worker.conn.close()
+
+    def _restart(self, worker):
+        worker.restarts += 1
+        self.stats["respawned"] += 1
+        self._start(worker)
+        with self._lock:
+            self._lock.notify_all()
+
+    def close(self, timeout=5.0):
+        """Stop all workers and release shared memory"""
+        if self._closed:
+            return
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._collector.join(timeout=timeout)
+        for worker in self._workers:
+            try:
+                worker.conn.send(("stop",))
+            except (BrokenPipeError, OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            worker.conn.close()
+            worker.in_ring.close()
+            worker.out_ring.close()
@@ -0,0 +1,166 @@
+"""Adaptive quality control against a frame-time budget.
+
+The controller collects per-stage timings for every frame and compares the
+recent average frame time with the budget. When the loop runs over budget it
+steps down a degradation ladder (detector cadence, internal resolution,
+optional stages); when there is headroom again it steps back up. Separate
+degrade/recover thresholds and a cooldown after each change provide
+hysteresis so the level does not oscillate.
+"""
+
+import collections
+import contextlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QualityLevel:
+    """One rung of the degradation ladder
+
+    ``detect_every`` multiplies the pipeline's detector interval, ``scale`` is
+    the internal processing resolution (the result is upscaled back) and
+    ``skip_optional`` drops the detector and sinks marked ``optional``.
+    """
+
+    def __init__(self, name, detect_every=1, scale=1.0, skip_optional=False):
+        self.name = name
+        self.detect_every = detect_every
+        self.scale = scale
+        self.skip_optional = skip_optional
+
+    def __repr__(self):
+        return (f"QualityLevel({self.name!r}, detect_every={self.detect_every}, "
+                f"scale={self.scale}, skip_optional={self.skip_optional})")
+
+
+DEFAULT_LADDER = (
+    QualityLevel("full"),
+    QualityLevel("detect/2", detect_every=2),
+    QualityLevel("detect/4", detect_every=4),
+    QualityLevel("detect/4 75%", detect_every=4, scale=0.75),
+    QualityLevel("detect/8 50%", detect_every=8, scale=0.5),
+    QualityLevel("minimal 50%", detect_every=8, scale=0.5, skip_optional=True),
+)
+
+
+class AdaptiveQualityController:
+    """Step through ``ladder`` to hold a frame-time budget
+
+    The budget is ``budget_ms`` or ``1000 / target_fps``. Quality degrades
+    when the average over the last ``window`` frames exceeds
+    ``degrade_ratio * budget`` and recovers once it stays below
+    ``recover_ratio * budget`` for ``recover_frames`` frames. After any
+    change the controller waits ``cooldown`` frames before judging again.
+    """
+
+    def __init__(self, target_fps=None, budget_ms=None, ladder=DEFAULT_LADDER, window=30,
+                 degrade_ratio=1.0, recover_ratio=0.7, recover_frames=90, cooldown=30, history=64):
+        if budget_ms is None:
+            if not target_fps:
+                raise ValueError("Either target_fps or budget_ms is required")
+            budget_ms = 1000.0 / target_fps
+        self.budget_ms = budget_ms
+        self.ladder = tuple(ladder)
+        self.window = window
+        self.degrade_ratio = degrade_ratio
+        self.recover_ratio = recover_ratio
+        self.recover_frames = recover_frames
+        self.cooldown = cooldown
+        self.index = 0
+        self.changes = collections.deque(maxlen=history)
+
+        self._frame_times = collections.deque(maxlen=window)
+        self._stage_times = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self._current_stages = {}
+        self._frame_start = None
+        self._since_change = 0
+        self._headroom_frames = 0
+
+    @property
+    def level(self):
+        return self.ladder[self.index]
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+        self._current_stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time one stage of the current frame"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        self._current_stages[name] = self._current_stages.get(name, 0.0) + seconds
+
+    def end_frame(self, frame_seconds=None):
+        """Close the frame and possibly change level; returns the current level"""
+        if frame_seconds is None:
+            frame_seconds = time.perf_counter() - self._frame_start if self._frame_start else 0.0
+        self._frame_times.append(frame_seconds * 1000.0)
+        for name, seconds in self._current_stages.items():
+            self._stage_times[name].append(seconds * 1000.0)
+        self._frame_start = None
+        self._since_change += 1
+        self._evaluate()
+        return self.level
+
+    def average_ms(self):
+        return sum(self._frame_times) / len(self._frame_times) if self._frame_times else 0.0
+
+    def _evaluate(self):
+        if self._since_change < self.cooldown or len(self._frame_times) < self.window:
+            return
+        average = self.average_ms()
+        if average > self.budget_ms * self.degrade_ratio:
+            self._headroom_frames = 0
+            if self.index + 1 < len(self.ladder):
+                self._change(self.index + 1, average, "over budget")
+        elif average < self.budget_ms * self.recover_ratio:
+            self._headroom_frames += 1
+            if self._headroom_frames >= self.recover_frames and self.index > 0:
+                self._change(self.index - 1, average, "headroom")
+        else:
+            self._headroom_frames = 0
+
+    def _change(self, index, average, reason):
+        previous, degraded = self.level, index > self.index
+        self.index = index
+        self._since_change = 0
+        self._headroom_frames = 0
+        # Judge the new level on its own frame times
+        self._frame_times.clear()
+        event = {
+            "time": time.time(),
+            "from": previous.name,
+            "to": self.level.name,
+            "reason": reason,
+            "average_ms": average,
+            "budget_ms": self.budget_ms,
+            "stages_ms": self.stage_averages(),
+        }
+        self.changes.append(event)
+        logger.log(logging.WARNING if degraded else logging.INFO,
+                   "Quality %s -> %s (%s: %.2f ms avg, budget %.2f ms)",
+                   previous.name, self.level.name, reason, average, self.budget_ms)
+
+    def stage_averages(self):
+        return {name: sum(times) / len(times) for name, times in self._stage_times.items() if times}
+
+    def status(self):
+        return {
+            "level": self.index,
+            "level_name": self.level.name,
+            "detect_every": self.level.detect_every,
+            "scale": self.level.scale,
+            "skip_optional": self.level.skip_optional,
+            "budget_ms": self.budget_ms,
+            "average_ms": self.average_ms(),
+            "stages_ms": self.stage_averages(),
+            "changes": list(self.changes),
+        }
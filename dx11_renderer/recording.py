@@ -0,0 +1,285 @@
+"""Raw frame recording and deterministic replay.
+
+A recording is a fixed-stride container: a 64-byte header followed by one
+record per frame holding a float64 timestamp and the raw BGR pixels at a
+64-byte aligned offset. ``ReplaySource`` maps the file with ``np.memmap`` and
+hands out views into it, so replayed frames are never copied, and mimics the
+parts of ``cv2.VideoCapture`` the demo scripts use.
+
+Usage::
+
+    python -m dx11_renderer.recording record feed.dx11raw --camera 0 --seconds 60
+    python -m dx11_renderer.recording info feed.dx11raw
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+
+import cv2
+import numpy as np
+
+MAGIC = b"DX11RAW1"
+RECORDING_EXTENSION = ".dx11raw"
+HEADER_SIZE = 64
+_ALIGNMENT = 64
+# magic, width, height, channels, frame count, nominal fps
+_HEADER = struct.Struct("<8sIIIQd")
+
+
+def _aligned(size):
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def record_dtype(shape):
+    """Structured dtype of one recorded frame: timestamp plus aligned pixels"""
+    height, width, channels = shape
+    frame_bytes = height * width * channels
+    return np.dtype({
+        "names": ["timestamp", "frame"],
+        "formats": ["<f8", ("u1", (height, width, channels))],
+        "offsets": [0, _ALIGNMENT],
+        "itemsize": _ALIGNMENT + _aligned(frame_bytes),
+    })
+
+
+def read_header(path):
+    """Return (shape, frame_count, fps) of a recording"""
+    with open(path, "rb") as f:
+        data = f.read(HEADER_SIZE)
+    if len(data) < _HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a frame recording: {path}")
+    _, width, height, channels, count, fps = _HEADER.unpack_from(data)
+    return (height, width, channels), count, fps
+
+
+class FrameRecorder:
+    """Append raw frames and timestamps to a memory-mapped recording
+
+    The file grows in chunks of ``chunk_frames`` records; ``close`` trims it
+    to the frames actually written and finalizes the header. Every growth
+    and every ``flush`` records the frames written so far in the header, so
+    a recording cut short by a crash still replays up to that point.
+    """
+
+    def __init__(self, path, shape, fps=30.0, chunk_frames=256):
+        if len(shape) != 3:
+            raise ValueError("Recordings hold (height, width, channels) uint8 frames")
+        self.path = path
+        self.shape = tuple(int(v) for v in shape)
+        self.fps = float(fps or 0.0)
+        self.dtype = record_dtype(self.shape)
+        self.chunk_frames = max(1, chunk_frames)
+        self.frame_count = 0
+        self._capacity = 0
+        self._records = None
+        self._start = None
+        with open(path, "wb") as f:
+            f.write(self._header_bytes())
+        self._grow()
+
+    def _header_bytes(self):
+        height, width, channels = self.shape
+        header = _HEADER.pack(MAGIC, width, height, channels, self.frame_count, self.fps)
+        return header.ljust(HEADER_SIZE, b"\0")
+
+    def _grow(self):
+        if self._records is not None:
+            self._records.flush()
+            self._records = None
+        self._capacity += self.chunk_frames
+        with open(self.path, "r+b") as f:
+            f.write(self._header_bytes())
+            f.truncate(HEADER_SIZE + self._capacity * self.dtype.itemsize)
+        self._records = np.memmap(self.path, dtype=self.dtype, mode="r+",
+                                  offset=HEADER_SIZE, shape=(self._capacity,))
+
+    def write(self, frame, timestamp=None):
+        """Append one frame; timestamps default to seconds since the first frame"""
+        if self._records is None:
+            raise ValueError("Recorder is closed")
+        if frame.shape != self.shape or frame.dtype != np.uint8:
+            raise ValueError(f"Frame must be uint8 with shape {self.shape}, got {frame.dtype} {frame.shape}")
+        if timestamp is None:
+            now = time.perf_counter()
+            if self._start is None:
+                self._start = now
+            timestamp = now - self._start
+        if self.frame_count == self._capacity:
+            self._grow()
+        self._records["timestamp"][self.frame_count] = timestamp
+        self._records["frame"][self.frame_count] = frame
+        self.frame_count += 1
+
+    def flush(self):
+        """Write the frames so far to disk and record their count in the header"""
+        if self._records is None:
+            raise ValueError("Recorder is closed")
+        self._records.flush()
+        with open(self.path, "r+b") as f:
+            f.write(self._header_bytes())
+
+    def close(self):
+        if self._records is None:
+            return
+        self._records.flush()
+        self._records = None
+        with open(self.path, "r+b") as f:
+            f.write(self._header_bytes())
+            f.truncate(HEADER_SIZE + self.frame_count * self.dtype.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplaySource:
+    """Serve a recording back through a ``cv2.VideoCapture``-like interface
+
+    With ``realtime`` frames are released on the original timestamps
+    (scaled by ``speed``); otherwise as fast as they are read. Frames are
+    read-only views into the memory map.
+    """
+
+    def __init__(self, path, realtime=True, speed=1.0, loop=False):
+        self.shape, self.frame_count, self.fps = read_header(path)
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        self.position = 0
+        self._clock_start = None
+        self._records = None
+        self._frames = None
+        if self.frame_count:
+            self._records = np.memmap(path, dtype=record_dtype(self.shape), mode="r",
+                                      offset=HEADER_SIZE, shape=(self.frame_count,))
+            self.timestamps = self._records["timestamp"]
+            self._frames = self._records["frame"]
+        else:
+            self.timestamps = np.zeros(0)
+
+    def isOpened(self):
+        return self._records is not None
+
+    def read(self):
+        if self._records is None:
+            return False, None
+        if self.position >= self.frame_count:
+            if not self.loop:
+                return False, None
+            self.position = 0
+            self._clock_start = None
+        index = self.position
+        if self.realtime:
+            self._wait_for(index)
+        self.position += 1
+        return True, self._frames[index]
+
+    def _wait_for(self, index):
+        offset = (self.timestamps[index] - self.timestamps[0]) / self.speed
+        now = time.perf_counter()
+        if self._clock_start is None:
+            self._clock_start = now - offset
+        delay = self._clock_start + offset - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.shape[1])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.shape[0])
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES and self._records is not None:
+            self.position = int(min(max(value, 0), self.frame_count))
+            self._clock_start = None
+            return True
+        return False
+
+    def release(self):
+        self._records = None
+        self._frames = None
+
+
+def open_capture(source=None, fallback_indices=(0, 1)):
+    """Open a recording, a video file/URL or a camera
+
+    Recordings (``*.dx11raw``) open as a :class:`ReplaySource`. Without a
+    source the camera indices are tried in order.
+    """
+    if isinstance(source, str) and source.endswith(RECORDING_EXTENSION):
+        return ReplaySource(source)
+    if source is not None:
+        return cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    cap = None
+    for index in fallback_indices:
+        cap = cv2.VideoCapture(index)
+        if cap.isOpened():
+            break
+    return cap
+
+
+def record_capture(cap, path, frames=None, seconds=None):
+    """Record from an open capture until it ends or a limit is hit"""
+    ok, frame = cap.read()
+    if not ok:
+        raise IOError("Could not read from capture")
+    deadline = time.perf_counter() + seconds if seconds else None
+    with FrameRecorder(path, frame.shape, cap.get(cv2.CAP_PROP_FPS)) as recorder:
+        while ok:
+            recorder.write(frame)
+            if frames and recorder.frame_count >= frames:
+                break
+            if deadline and time.perf_counter() >= deadline:
+                break
+            ok, frame = cap.read()
+        return recorder.frame_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or inspect raw frame recordings")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Record a camera or video file")
+    record.add_argument("output", help=f"Recording path ({RECORDING_EXTENSION})")
+    record.add_argument("--camera", default="0", help="Camera index, video file or URL")
+    record.add_argument("--frames", type=int, help="Stop after N frames")
+    record.add_argument("--seconds", type=float, help="Stop after N seconds")
+    info = commands.add_parser("info", help="Print a recording's header")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        shape, count, fps = read_header(args.path)
+        source = ReplaySource(args.path)
+        duration = float(source.timestamps[-1] - source.timestamps[0]) if count else 0.0
+        print(f"{args.path}: {count} frames of {shape[1]}x{shape[0]}x{shape[2]}, "
+              f"{fps:.2f} fps nominal, {duration:.2f}s, {os.path.getsize(args.path)} bytes")
+        return 0
+
+    cap = open_capture(args.camera)
+    if cap is None or not cap.isOpened():
+        print(f"Error: could not open {args.camera}", file=sys.stderr)
+        return 1
+    try:
+        count = record_capture(cap, args.output, args.frames, args.seconds)
+    finally:
+        cap.release()
+    print(f"Recorded {count} frames to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,449 @@
+"""Local render server shared by several client processes.
+
+The server owns one or more renderers and accepts clients over a local
+``multiprocessing.connection`` socket. Each client allocates a shared-memory
+ring of frame slots and tells the server its name; requests and replies only
+carry small descriptors. Frames are processed in place inside the slot.
+
+Connections are authenticated with a secret key. The messages are pickled,
+so anyone holding the key can run code in the server. A server without a
+given key generates a random one (``server.authkey``), which clients need
+out of band: pass it directly, write it to an owner-only file with
+``--authkey-file``, or share it as hex in ``$DX11_RENDER_AUTHKEY``.
+
+Run a server with::
+
+    python -m dx11_renderer.server --port 50551 --renderers 2 --authkey-file ~/.dx11-render.key
+"""
+
+import argparse
+import collections
+import itertools
+import os
+import queue
+import secrets
+import threading
+import types
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge
+
+import numpy as np
+
+from .presets import make_params, params_to_dict
+from .process_pool import FrameRing, _default_renderer, _make_renderer
+
+DEFAULT_ADDRESS = ("127.0.0.1", 50551)
+# Hex encoded authkey shared by a server and its clients
+AUTHKEY_ENV = "DX11_RENDER_AUTHKEY"
+# Seconds a new connection gets to complete the authentication handshake
+HANDSHAKE_TIMEOUT = 10.0
+
+
+def resolve_authkey(authkey=None, generate=False):
+    """``authkey``, else the hex key in ``$DX11_RENDER_AUTHKEY``, else a random key if ``generate``"""
+    if authkey is not None:
+        return authkey
+    value = os.environ.get(AUTHKEY_ENV)
+    if value:
+        return bytes.fromhex(value)
+    if generate:
+        return secrets.token_bytes(32)
+    raise ValueError(f"No authkey given and ${AUTHKEY_ENV} is not set")
+
+
+def write_authkey(path, authkey):
+    """Store ``authkey`` as hex in a file only its owner can read"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(authkey.hex())
+
+
+def read_authkey(path):
+    with open(path, "r") as f:
+        return bytes.fromhex(f.read().strip())
+
+
+class _TimedConnection:
+    """The handshake's view of a connection: reads fail after ``timeout`` seconds"""
+
+    def __init__(self, conn, timeout):
+        self._conn = conn
+        self._timeout = timeout
+
+    def send_bytes(self, data):
+        self._conn.send_bytes(data)
+
+    def recv_bytes(self, maxlength=None):
+        if not self._conn.poll(self._timeout):
+            raise AuthenticationError("Authentication handshake timed out")
+        return self._conn.recv_bytes(maxlength)
+
+
+def authenticate(conn, authkey, timeout=HANDSHAKE_TIMEOUT):
+    """Run the server side of the ``multiprocessing`` handshake on an accepted connection
+
+    Listeners accept without a key so that a client stalling the handshake
+    only holds its own thread; call this from the per-connection thread.
+    Raises ``AuthenticationError`` (or ``EOFError``/``OSError``) on failure.
+    """
+    timed = _TimedConnection(conn, timeout)
+    deliver_challenge(timed, authkey)
+    answer_challenge(timed, authkey)
+
+
+def status_to_dict(status):
+    """Snapshot the public, plain-valued attributes of a RendererStatus"""
+    snapshot = {}
+    for name in dir(status):
+        if name.startswith("_"):
+            continue
+        value = getattr(status, name)
+        if isinstance(value, (bool, int, float, str)):
+            snapshot[name] = value
+        elif isinstance(value, dict):
+            # Nested plain-valued tables such as the per-category memory stats
+            snapshot[name] = value
+    return snapshot
+
+
+def _valid_shape(shape):
+    return (isinstance(shape, tuple) and len(shape) in (2, 3)
+            and all(isinstance(n, int) and n > 0 for n in shape))
+
+
+class _ClientSession:
+    def __init__(self, conn, ring, quota):
+        self.conn = conn
+        self.ring = ring
+        self.quota = quota
+        self.params = None
+        self.status = {}
+        self.in_flight = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def reply(self, message):
+        with self.lock:
+            if self.closed:
+                return
+            try:
+                self.conn.send(message)
+            except (BrokenPipeError, OSError):
+                self.closed = True
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+            if self.closed and self.in_flight == 0:
+                self.ring.close()
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            if self.in_flight == 0:
+                self.ring.close()
+
+
+class RenderServer:
+    """Serve process_frame requests from local clients
+
+    Every client gets at most ``max_slots_per_client`` requests in flight
+    (its quota) and frames up to ``max_frame_bytes``; requests beyond that
+    are rejected with an error reply instead of queueing without bound.
+    ``memory_budget`` caps each renderer's GPU + host memory in bytes; a
+    frame that does not fit is answered with a ``MemoryBudgetError`` reply.
+    Without ``authkey`` (or ``$DX11_RENDER_AUTHKEY``) a random key is
+    generated; clients need ``server.authkey``. A connection that does not
+    complete the handshake within ``handshake_timeout`` seconds is dropped,
+    without delaying other clients.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, renderer_factory=None,
+                 params_factory=None, num_renderers=1, max_slots_per_client=8,
+                 max_frame_bytes=3840 * 2160 * 3, memory_budget=None,
+                 handshake_timeout=HANDSHAKE_TIMEOUT):
+        self.renderer_factory = renderer_factory or _default_renderer
+        self.params_factory = params_factory
+        self.max_slots_per_client = max_slots_per_client
+        self.max_frame_bytes = max_frame_bytes
+        self.memory_budget = memory_budget
+        self.handshake_timeout = handshake_timeout
+        self.stats = collections.Counter()
+
+        self.authkey = resolve_authkey(authkey, generate=True)
+        # Clients authenticate on their own thread, see authenticate()
+        self._listener = Listener(address)
+        self.address = self._listener.address
+        self._jobs = queue.Queue()
+        self._sessions = set()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._render_loop, name=f"render-{i}", daemon=True)
+            for i in range(num_renderers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """Accept clients on a background thread and return the server"""
+        self._acceptor = threading.Thread(target=self.serve_forever, name="render-accept", daemon=True)
+        self._acceptor.start()
+        return self
+
+    def serve_forever(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._closed:
+                    break
+                continue
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _attach_ring(name, slots, slot_bytes):
+        """Open a client's ring after checking its claimed layout against the real segment"""
+        if not isinstance(name, str) or not isinstance(slots, int) or not isinstance(slot_bytes, int) \
+                or slots < 1 or slot_bytes < 1:
+            raise ValueError("Malformed frame ring description")
+        ring = FrameRing(slots, slot_bytes, name=name)
+        if ring.shm.size < slots * slot_bytes:
+            size = ring.shm.size
+            ring.close()
+            raise ValueError(f"Shared memory {name!r} holds {size} bytes, not {slots} slots of {slot_bytes}")
+        return ring
+
+    def _serve_client(self, conn):
+        try:
+            authenticate(conn, self.authkey, self.handshake_timeout)
+        except (AuthenticationError, EOFError, OSError):
+            # A client without the key, or one that never answered
+            self.stats["unauthenticated"] += 1
+            conn.close()
+            return
+        try:
+            kind, shm_name, slots, slot_bytes = conn.recv()
+            ring = self._attach_ring(shm_name, slots, slot_bytes)
+        except (EOFError, OSError, ValueError, TypeError) as e:
+            self.stats["refused"] += 1
+            try:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+            return
+        quota = max(1, min(slots, self.max_slots_per_client))
+        session = _ClientSession(conn, ring, quota)
+        self._sessions.add(session)
+        self.stats["clients"] += 1
+        session.reply(("welcome", quota))
+
+        try:
+            while True:
+                message = conn.recv()
+                kind = message[0]
+                if kind == "process":
+                    _, request_id, slot, shape = message
+                    error = None
+                    if session.in_flight >= session.quota:
+                        error = f"Quota of {session.quota} in-flight requests exceeded"
+                    elif not isinstance(slot, int) or not 0 <= slot < slots:
+                        error = f"Invalid slot {slot}"
+                    elif not _valid_shape(shape):
+                        error = f"Invalid frame shape {shape}"
+                    elif int(np.prod(shape)) > min(slot_bytes, self.max_frame_bytes):
+                        error = "Frame exceeds the allowed frame size"
+                    if error is not None:
+                        self.stats["rejected"] += 1
+                        session.reply(("result", request_id, None, error))
+                        continue
+                    with session.lock:
+                        session.in_flight += 1
+                    self._jobs.put((session, request_id, slot, shape))
+                elif kind == "params":
+                    session.params = message[1]
+                elif kind == "status":
+                    session.reply(("status", dict(session.status)))
+                elif kind == "close":
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            self._sessions.discard(session)
+            session.shutdown()
+            conn.close()
+
+    def _render_loop(self):
+        renderer = _make_renderer(self.renderer_factory, self.memory_budget)
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            session, request_id, slot, shape = job
+            reply = None
+            try:
+                if session.closed:
+                    continue
+                # Renderers are shared, so every request carries its client's
+                # parameters (defaults when the client never set any)
+                renderer.update_processing_params(make_params(session.params, self.params_factory))
+                processed = renderer.process_frame(session.ring.view(slot, shape))
+                np.copyto(session.ring.view(slot, processed.shape), processed)
+                session.status = status_to_dict(renderer.status)
+                self.stats["processed"] += 1
+                reply = ("result", request_id, processed.shape, None)
+            except Exception as e:
+                self.stats["failed"] += 1
+                reply = ("result", request_id, None, f"{type(e).__name__}: {e}")
+            finally:
+                # Free the quota before replying so the client can reuse the slot
+                session.release()
+            session.reply(reply)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.close()
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        for session in list(self._sessions):
+            session.shutdown()
+            session.conn.close()
+
+
+class RenderClient:
+    """Client side stand-in for DX11Renderer backed by a RenderServer
+
+    Mirrors ``process_frame``, ``update_processing_params`` and ``status``,
+    and adds ``submit``/``result`` for pipelining several frames. A client
+    is meant to be used from a single thread. ``authkey`` is the server's
+    key; without one the hex key in ``$DX11_RENDER_AUTHKEY`` is used.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, slots=4,
+                 max_frame_shape=(1080, 1920, 3)):
+        authkey = resolve_authkey(authkey)
+        self._ring = FrameRing(slots, int(np.prod(max_frame_shape)))
+        try:
+            self._conn = Client(address, authkey=authkey)
+            self._conn.send(("hello", self._ring.name, slots, self._ring.slot_bytes))
+            kind, value = self._conn.recv()
+        except BaseException:
+            self._ring.close()
+            raise
+        if kind == "error":
+            self._conn.close()
+            self._ring.close()
+            raise ConnectionError(f"Render server refused the connection: {value}")
+        self.quota = value
+        self._free_slots = collections.deque(range(self.quota))
+        self._pending = {}       # request id -> slot
+        self._finished = {}      # request id -> (frame, error)
+        self._request_ids = itertools.count()
+        self._status = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, frame):
+        """Send a frame without waiting for the result; returns a request id"""
+        frame = np.asarray(frame, dtype=np.uint8)
+        while not self._free_slots:
+            self._receive()
+        slot = self._free_slots.popleft()
+        try:
+            self._ring.write(slot, frame)
+        except ValueError:
+            self._free_slots.appendleft(slot)
+            raise
+        request_id = next(self._request_ids)
+        self._pending[request_id] = slot
+        self._conn.send(("process", request_id, slot, frame.shape))
+        return request_id
+
+    def result(self, request_id):
+        """Wait for a submitted frame and return the processed copy"""
+        while request_id not in self._finished:
+            if request_id not in self._pending:
+                raise KeyError(f"Unknown request id {request_id}")
+            self._receive()
+        frame, error = self._finished.pop(request_id)
+        if error is not None:
+            raise RuntimeError(error)
+        return frame
+
+    def process_frame(self, frame):
+        return self.result(self.submit(frame))
+
+    def update_processing_params(self, params):
+        self._conn.send(("params", params_to_dict(params)))
+
+    @property
+    def status(self):
+        self._conn.send(("status",))
+        self._status = None
+        while self._status is None:
+            self._receive()
+        return types.SimpleNamespace(**self._status)
+
+    def _receive(self):
+        message = self._conn.recv()
+        if message[0] == "status":
+            self._status = message[1]
+            return
+        _, request_id, shape, error = message
+        slot = self._pending.pop(request_id)
+        frame = self._ring.view(slot, shape).copy() if error is None else None
+        self._free_slots.append(slot)
+        self._finished[request_id] = (frame, error)
+
+    def close(self):
+        try:
+            self._conn.send(("close",))
+        except (BrokenPipeError, OSError):
+            pass
+        self._conn.close()
+        self._ring.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a shared DX11 render server")
+    parser.add_argument("--host", default=DEFAULT_ADDRESS[0])
+    parser.add_argument("--port", type=int, default=DEFAULT_ADDRESS[1])
+    parser.add_argument("--renderers", type=int, default=1, help="Renderer instances / render threads")
+    parser.add_argument("--max-slots", type=int, default=8, help="Per-client in-flight request quota")
+    parser.add_argument("--memory-budget-mb", type=float, help="Per-renderer GPU + host memory budget")
+    parser.add_argument("--authkey-file", help="Write the connection key here (owner-only) for clients to read")
+    args = parser.parse_args(argv)
+    if args.authkey_file is None and not os.environ.get(AUTHKEY_ENV):
+        parser.error(f"clients need the key: pass --authkey-file or set ${AUTHKEY_ENV}")
+
+    budget = int(args.memory_budget_mb * 2 ** 20) if args.memory_budget_mb else None
+    server = RenderServer((args.host, args.port), num_renderers=args.renderers,
+                          max_slots_per_client=args.max_slots, memory_budget=budget)
+    if args.authkey_file:
+        write_authkey(args.authkey_file, server.authkey)
+        print(f"Connection key written to {args.authkey_file}")
+    print(f"Render server listening on {server.address[0]}:{server.address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Frame sinks for the headless runner.
+
+A sink receives every processed frame through ``write(frame, info)`` where
+``info`` holds the frame index, its timestamp and any detections, and
+releases its resources in ``close()``. Sinks run on the render thread, so
+anything slow (encoding, disk, network) must be handed off internally.
+"""
+
+import collections
+import os
+import struct
+import threading
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .detection_log import DetectionLog
+from .recording import FrameRecorder
+from .writer import FrameWriter, fourcc_for
+
+
+class FrameSink:
+    """Base class: sinks override ``write`` and optionally ``close``"""
+
+    def write(self, frame, info):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class CallbackSink(FrameSink):
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, frame, info):
+        self.callback(frame, info)
+
+
+class VideoFileSink(FrameSink):
+    """Encode frames into a video file on a background thread"""
+
+    def __init__(self, path, fps=30.0, fourcc=None, max_queue=8):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.dropped = 0
+        self._queue = collections.deque()
+        self._max_queue = max_queue
+        self._condition = threading.Condition()
+        self._closed = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="video-sink", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, info):
+        with self._condition:
+            if len(self._queue) >= self._max_queue:
+                self.dropped += 1
+                return
+            self._queue.append(frame)
+            self._condition.notify()
+
+    def _run(self):
+        writer = None
+        try:
+            while True:
+                with self._condition:
+                    while not self._queue and not self._closed:
+                        self._condition.wait()
+                    if not self._queue:
+                        break
+                    frame = self._queue.popleft()
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(self.path, fourcc_for(self.path, self.fourcc),
+                                             self.fps, (width, height))
+                    if not writer.isOpened():
+                        raise IOError(f"Could not open video writer: {self.path}")
+                writer.write(frame)
+        except Exception as e:
+            self._error = e
+        finally:
+            if writer is not None:
+                writer.release()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+class ImageSequenceSink(FrameSink):
+    """Write every ``every``-th frame as an image through a FrameWriter"""
+
+    def __init__(self, directory, every=1, extension=".jpg", writer=None):
+        self.directory = directory
+        self.every = max(1, every)
+        self.extension = extension
+        self._owns_writer = writer is None
+        self.writer = writer or FrameWriter()
+
+    def write(self, frame, info):
+        if info["index"] % self.every == 0:
+            self.writer.save_image(os.path.join(self.directory, f"frame_{info['index']:08d}{self.extension}"),
+                                   frame)
+
+    def close(self):
+        if self._owns_writer:
+            self.writer.close()
+
+
+class RecordingSink(FrameSink):
+    """Append frames to a raw ``.dx11raw`` recording"""
+
+    def __init__(self, path, fps=30.0):
+        self.path = path
+        self.fps = fps
+        self._recorder = None
+
+    def write(self, frame, info):
+        if self._recorder is None:
+            self._recorder = FrameRecorder(self.path, frame.shape, self.fps)
+        if frame.shape == self._recorder.shape:
+            self._recorder.write(frame, info.get("timestamp"))
+
+    def close(self):
+        if self._recorder is not None:
+            self._recorder.close()
+
+
+class DetectionLogSink(FrameSink):
+    """Append each frame's detections (or tracks) to a :class:`DetectionLog`
+
+    Only frames where the detector ran are logged unless ``every_frame`` is
+    set, so a detector running every N frames is not logged N times over.
+    """
+
+    def __init__(self, log, stream=0, every_frame=False):
+        self._owns_log = isinstance(log, str)
+        self.log = DetectionLog(log) if self._owns_log else log
+        self.stream = stream
+        self.every_frame = every_frame
+        self._last = None
+
+    def write(self, frame, info):
+        detections = info.get("detections")
+        if detections is None or (detections is self._last and not self.every_frame):
+            return
+        self._last = detections
+        self.log.append(detections, self.stream, info["index"], info.get("timestamp"))
+
+    def close(self):
+        if self._owns_log:
+            self.log.close()
+        else:
+            self.log.flush()
+
+
+# sequence, height, width, channels
+_SHM_HEADER = struct.Struct("<QIII")
+_SHM_HEADER_SIZE = 64
+
+
+class SharedMemorySink(FrameSink):
+    """Publish the latest frame in a named shared-memory block
+
+    The sequence number is odd while a frame is being copied in, so readers
+    (:class:`SharedMemoryFrameReader`) can detect and retry torn reads.
+    """
+
+    def __init__(self, name, max_frame_bytes=3840 * 2160 * 3):
+        self.name = name
+        self.sequence = 0
+        self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                               size=_SHM_HEADER_SIZE + max_frame_bytes)
+        self._max_frame_bytes = max_frame_bytes
+        _SHM_HEADER.pack_into(self._shm.buf, 0, 0, 0, 0, 0)
+
+    def write(self, frame, info):
+        if frame.nbytes > self._max_frame_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes exceeds the shared block")
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        _SHM_HEADER.pack_into(self._shm.buf, 0, self.sequence + 1, height, width, channels)
+        target = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._shm.buf, offset=_SHM_HEADER_SIZE)
+        np.copyto(target, frame)
+        self.sequence += 2
+        _SHM_HEADER.pack_into(self._shm.buf, 0, self.sequence, height, width, channels)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+class SharedMemoryFrameReader:
+    """Read the latest frame published by a :class:`SharedMemorySink`"""
+
+    def __init__(self, name):
+        self._shm = shared_memory.SharedMemory(name=name)
+
+    def read(self, last_sequence=None, retries=100):
+        """Return (sequence, frame copy) or (sequence, None) if nothing new"""
+        for _ in range(retries):
+            sequence, height, width, channels = _SHM_HEADER.unpack_from(self._shm.buf, 0)
+            if sequence % 2 or sequence == 0:
+                if sequence == 0:
+                    return 0, None
+                continue
+            if sequence == last_sequence:
+                return sequence, None
+            frame = np.ndarray((height, width, channels), dtype=np.uint8, buffer=self._shm.buf,
+                               offset=_SHM_HEADER_SIZE).copy()
+            if _SHM_HEADER.unpack_from(self._shm.buf, 0)[0] == sequence:
+                return sequence, frame
+        return last_sequence, None
+
+    def close(self):
+        self._shm.close()
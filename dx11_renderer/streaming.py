@@ -0,0 +1,241 @@
+"""Network streaming sink: MJPEG over HTTP and raw frames over TCP.
+
+Each frame is JPEG-encoded at most once, on a small worker pool, and the
+latest encoded frame is shared by every HTTP client; encode cost does not
+depend on the number of viewers. A client that cannot keep up simply gets
+the newest frame when it is ready again, so frames are dropped per client
+instead of queueing.
+
+Raw TCP clients receive ``<payload bytes, height, width, channels>`` as four
+little-endian uint32 values followed by the BGR pixels.
+"""
+
+import socketserver
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from .sinks import FrameSink
+
+RAW_HEADER = struct.Struct("<IIII")
+_BOUNDARY = b"frame"
+
+
+class _Latest:
+    """Most recent payload with a sequence number that subscribers wait on"""
+
+    def __init__(self):
+        self.sequence = 0
+        self.payload = None
+        self.closed = False
+        self.subscribers = 0
+        self._condition = threading.Condition()
+
+    def publish(self, sequence, payload):
+        with self._condition:
+            # Encode workers may finish out of order; never go backwards
+            if sequence <= self.sequence:
+                return
+            self.sequence = sequence
+            self.payload = payload
+            self._condition.notify_all()
+
+    def wait(self, last_sequence, timeout=1.0):
+        """Return (sequence, payload) newer than ``last_sequence``, or None"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.closed or self.sequence > last_sequence, timeout)
+            if self.closed or self.sequence <= last_sequence:
+                return None
+            return self.sequence, self.payload
+
+    def subscribe(self, delta):
+        with self._condition:
+            self.subscribers += delta
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class StreamingSink(FrameSink):
+    """Serve processed frames to HTTP MJPEG viewers and raw TCP consumers
+
+    ``http_address``/``raw_address`` of None disable that server; port 0
+    picks a free port (see ``http_port``/``raw_port``). Frames passed to
+    ``write`` are referenced, not copied, until they have been encoded.
+    """
+
+    def __init__(self, http_address=("127.0.0.1", 8080), raw_address=None, jpeg_quality=80,
+                 encode_workers=2):
+        self.jpeg_quality = jpeg_quality
+        self.stats = {"frames": 0, "encoded": 0, "encode_dropped": 0, "client_dropped": 0, "clients": 0}
+        self._jpeg = _Latest()
+        self._raw = _Latest()
+        self._lock = threading.Lock()
+        self._encode_workers = max(1, encode_workers)
+        self._encoding = 0
+        self._sequence = 0
+        self._encoder = ThreadPoolExecutor(self._encode_workers, thread_name_prefix="mjpeg-encode")
+        self._servers = []
+
+        self.http_port = self.raw_port = None
+        if http_address is not None:
+            server = ThreadingHTTPServer(http_address, self._http_handler())
+            server.daemon_threads = True
+            self.http_port = server.server_address[1]
+            self._start(server)
+        if raw_address is not None:
+            server = socketserver.ThreadingTCPServer(raw_address, self._raw_handler())
+            server.daemon_threads = True
+            self.raw_port = server.server_address[1]
+            self._start(server)
+
+    def _start(self, server):
+        self._servers.append(server)
+        threading.Thread(target=server.serve_forever, name="stream-server", daemon=True).start()
+
+    def write(self, frame, info):
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+            self.stats["frames"] += 1
+            encode = self._jpeg.subscribers > 0
+            if encode and self._encoding >= self._encode_workers:
+                # Every encoder is busy: skip this frame rather than queue it
+                self.stats["encode_dropped"] += 1
+                encode = False
+            if encode:
+                self._encoding += 1
+        if self._raw.subscribers > 0:
+            self._raw.publish(sequence, frame)
+        if encode:
+            self._encoder.submit(self._encode, sequence, frame)
+
+    def _encode(self, sequence, frame):
+        try:
+            ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                self._jpeg.publish(sequence, data.tobytes())
+                with self._lock:
+                    self.stats["encoded"] += 1
+        finally:
+            with self._lock:
+                self._encoding -= 1
+
+    def _serve_latest(self, latest, send):
+        """Send each new payload to one client until it disconnects"""
+        latest.subscribe(1)
+        with self._lock:
+            self.stats["clients"] += 1
+        last = 0
+        try:
+            while True:
+                item = latest.wait(last)
+                if latest.closed:
+                    break
+                if item is None:
+                    continue
+                sequence, payload = item
+                if last and sequence > last + 1:
+                    with self._lock:
+                        self.stats["client_dropped"] += sequence - last - 1
+                last = sequence
+                send(payload)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            latest.subscribe(-1)
+            with self._lock:
+                self.stats["clients"] -= 1
+
+    def _http_handler(self):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path in ("/", "/stream.mjpg"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={_BOUNDARY.decode()}")
+                    self.send_header("Cache-Control", "no-cache")
+                    self.end_headers()
+                    sink._serve_latest(sink._jpeg, self._send_part)
+                elif self.path == "/snapshot.jpg":
+                    sink._jpeg.subscribe(1)
+                    try:
+                        item = sink._jpeg.wait(0, timeout=5.0)
+                    finally:
+                        sink._jpeg.subscribe(-1)
+                    if item is None:
+                        self.send_error(503, "No frame available")
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "image/jpeg")
+                    self.send_header("Content-Length", str(len(item[1])))
+                    self.end_headers()
+                    self.wfile.write(item[1])
+                else:
+                    self.send_error(404)
+
+            def _send_part(self, data):
+                self.wfile.write(b"--" + _BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                                 + f"Content-Length: {len(data)}\r\n\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _raw_handler(self):
+        sink = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                def send(frame):
+                    frame = np.ascontiguousarray(frame)
+                    height, width = frame.shape[:2]
+                    channels = frame.shape[2] if frame.ndim == 3 else 1
+                    self.request.sendall(RAW_HEADER.pack(frame.nbytes, height, width, channels))
+                    self.request.sendall(memoryview(frame).cast("B"))
+
+                sink._serve_latest(sink._raw, send)
+
+        return Handler
+
+    def close(self):
+        self._jpeg.close()
+        self._raw.close()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+        self._encoder.shutdown(wait=True)
+
+
+def read_raw_frame(sock):
+    """Read one frame from a raw TCP stream; None when the stream ended"""
+    header = _recv_exactly(sock, RAW_HEADER.size)
+    if header is None:
+        return None
+    size, height, width, channels = RAW_HEADER.unpack(header)
+    payload = _recv_exactly(sock, size)
+    if payload is None:
+        return None
+    return np.frombuffer(payload, dtype=np.uint8).reshape(height, width, channels)
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            return None
+        received += count
+    return bytes(buffer)
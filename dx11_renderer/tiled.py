@@ -0,0 +1,209 @@
+"""Out-of-core processing of images larger than a texture or RAM.
+
+``TiledProcessor`` streams fixed-size tiles from a memory-mapped input
+(an ``np.memmap``, a ``.npy`` file or a headerless raw BGR file) through the
+renderer into a memory-mapped output. Each tile is read with ``halo`` pixels
+of surrounding context, so neighbourhood operations see their neighbours,
+and only the tile's interior is written back. At the image border the halo
+repeats the edge pixels. Every tile uses the same buffer size, so the
+renderer keeps one set of textures. Peak memory depends on the tile size and
+not on the image size.
+
+Usage::
+
+    dx11-tiled panorama.npy graded.npy --tile 4096 --preset evening
+    dx11-tiled stitched.raw graded.raw --size 65536x32768 --memory-budget-mb 512
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .presets import PARAM_FIELDS, load_preset, make_params
+from .process_pool import _default_renderer
+
+# Largest 2D texture dimension Direct3D 11 guarantees
+MAX_TEXTURE_SIZE = 16384
+# Estimated bytes held per buffer pixel: two BGR read buffers and the BGR
+# result, plus the renderer's input/output/staging textures and its BGRA
+# upload and readback frames
+BYTES_PER_PIXEL = 3 * 3 + 5 * 4
+
+
+def tile_size_for_budget(memory_budget, halo=0, align=64):
+    """Largest square tile (a multiple of ``align``) whose buffers fit ``memory_budget`` bytes"""
+    side = int((memory_budget / BYTES_PER_PIXEL) ** 0.5) - 2 * halo
+    side = min(MAX_TEXTURE_SIZE - 2 * halo, side) // align * align
+    if side < align:
+        raise ValueError(f"A memory budget of {memory_budget} bytes cannot hold one tile")
+    return side
+
+
+def _check_image(image, path):
+    if image.ndim != 3 or image.shape[2] != 3 or image.dtype != np.uint8:
+        raise ValueError(f"{path} is not an 8-bit BGR image: {image.shape} {image.dtype}")
+    return image
+
+
+def open_image(path, size=None):
+    """Memory-map a ``.npy`` image, or a raw BGR image of ``size`` (width, height), read-only"""
+    if path.endswith(".npy"):
+        return _check_image(np.load(path, mmap_mode="r"), path)
+    if size is None:
+        raise ValueError(f"Raw image {path} needs a size")
+    width, height = size
+    expected = width * height * 3
+    if os.path.getsize(path) != expected:
+        raise ValueError(f"Raw image {path} holds {os.path.getsize(path)} bytes, expected {expected}")
+    return np.memmap(path, dtype=np.uint8, mode="r", shape=(height, width, 3))
+
+
+def create_image(path, shape):
+    """Create a memory-mapped BGR output of ``shape`` (height, width[, 3]); ``.npy`` or raw"""
+    shape = (shape[0], shape[1], 3)
+    if path.endswith(".npy"):
+        return np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=shape)
+    return np.memmap(path, dtype=np.uint8, mode="w+", shape=shape)
+
+
+def iter_tiles(height, width, tile_height, tile_width):
+    """Yield ``(y, x, h, w)`` tiles covering the image row by row"""
+    for y in range(0, height, tile_height):
+        for x in range(0, width, tile_width):
+            yield y, x, min(tile_height, height - y), min(tile_width, width - x)
+
+
+class TiledStats:
+    def __init__(self):
+        self.tiles = 0
+        self.pixels = 0
+        self.elapsed = 0.0
+        self.buffer_bytes = 0   # Tile buffers held by the processor
+
+    @property
+    def megapixels_per_second(self):
+        return self.pixels / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.tiles} tiles, {self.pixels / 1e6:.1f} MP in {self.elapsed:.2f}s "
+                f"({self.megapixels_per_second:.1f} MP/s, {self.buffer_bytes / 2 ** 20:.1f} MiB tile buffers)")
+
+
+class TiledProcessor:
+    """Process arbitrarily large images tile by tile
+
+    ``tile_size`` is the interior of a tile (an int or ``(height, width)``);
+    the renderer sees frames of ``tile_size + 2 * halo``. ``memory_budget``
+    (bytes) picks the tile size with ``tile_size_for_budget`` instead. While
+    the renderer works on one tile, a reader thread fills the other buffer
+    with the next one.
+    """
+
+    def __init__(self, tile_size=4096, halo=0, params=None, memory_budget=None,
+                 renderer_factory=None, params_factory=None):
+        if memory_budget is not None:
+            tile_size = tile_size_for_budget(memory_budget, halo)
+        self.tile_height, self.tile_width = (tile_size, tile_size) if isinstance(tile_size, int) else tile_size
+        self.halo = halo
+        if max(self.tile_height, self.tile_width) + 2 * halo > MAX_TEXTURE_SIZE:
+            raise ValueError(f"Tiles plus halo exceed the {MAX_TEXTURE_SIZE} pixel texture limit")
+        self.params = params
+        self.renderer_factory = renderer_factory or _default_renderer
+        self.params_factory = params_factory
+        self._renderer = None
+
+    @property
+    def renderer(self):
+        if self._renderer is None:
+            self._renderer = self.renderer_factory()
+            self._renderer.update_processing_params(make_params(self.params, self.params_factory))
+        return self._renderer
+
+    def _read(self, source, tile, buffer):
+        """Copy a tile and its halo into ``buffer``, repeating edge pixels past the image"""
+        height, width = source.shape[:2]
+        y, x, h, w = tile
+        halo = self.halo
+        y0, y1 = max(0, y - halo), min(height, y + h + halo)
+        x0, x1 = max(0, x - halo), min(width, x + w + halo)
+        top, left = y0 - (y - halo), x0 - (x - halo)
+        bottom, right = top + (y1 - y0), left + (x1 - x0)
+        buffer[top:bottom, left:right] = source[y0:y1, x0:x1]
+        # Fill the rest of the fixed-size buffer from the nearest image pixels
+        buffer[:top, left:right] = buffer[top, left:right]
+        buffer[bottom:, left:right] = buffer[bottom - 1, left:right]
+        buffer[:, :left] = buffer[:, left:left + 1]
+        buffer[:, right:] = buffer[:, right - 1:right]
+        return buffer
+
+    def process(self, source, output):
+        """Process ``source`` into ``output``, two ``(H, W, 3)`` uint8 arrays (usually memory-mapped)"""
+        if source.shape != output.shape:
+            raise ValueError(f"Output shape {output.shape} does not match the input {source.shape}")
+        stats = TiledStats()
+        start_time = time.perf_counter()
+        height, width = source.shape[:2]
+        tile_height, tile_width = min(self.tile_height, height), min(self.tile_width, width)
+        halo = self.halo
+        buffers = [np.empty((tile_height + 2 * halo, tile_width + 2 * halo, 3), dtype=np.uint8) for _ in range(2)]
+        stats.buffer_bytes = 3 * buffers[0].nbytes
+        renderer = self.renderer
+
+        tiles = list(iter_tiles(height, width, tile_height, tile_width))
+        with ThreadPoolExecutor(1, thread_name_prefix="tiled-read") as reader:
+            pending = reader.submit(self._read, source, tiles[0], buffers[0])
+            for index, (y, x, h, w) in enumerate(tiles):
+                buffer = pending.result()
+                if index + 1 < len(tiles):
+                    pending = reader.submit(self._read, source, tiles[index + 1], buffers[(index + 1) % 2])
+                result = renderer.process_frame(buffer)
+                output[y:y + h, x:x + w] = result[halo:halo + h, halo:halo + w]
+                stats.tiles += 1
+                stats.pixels += h * w
+                if x + w == width and hasattr(output, "flush"):
+                    # Write back each finished row of tiles instead of letting
+                    # dirty pages pile up in the page cache
+                    output.flush()
+
+        stats.elapsed = time.perf_counter() - start_time
+        return stats
+
+
+def _size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="dx11-tiled", description="Process an image larger than memory tile by tile")
+    parser.add_argument("source", help="Input image: .npy or raw BGR (needs --size)")
+    parser.add_argument("output", help="Output image: .npy or raw BGR")
+    parser.add_argument("--size", type=_size, help="WIDTHxHEIGHT of a raw input")
+    parser.add_argument("--tile", type=int, default=4096, help="Tile size in pixels")
+    parser.add_argument("--halo", type=int, default=0, help="Context pixels around each tile")
+    parser.add_argument("--memory-budget-mb", type=float, help="Pick the tile size to fit this budget")
+    parser.add_argument("--preset", help="Preset name (presets/<name>.json) or path to a preset file")
+    parser.add_argument("--presets-dir", default="presets")
+    for name in PARAM_FIELDS:
+        parser.add_argument(f"--{name}", type=float, help=f"Override {name}")
+    args = parser.parse_args(argv)
+
+    params = load_preset(args.preset, args.presets_dir) if args.preset else {}
+    for name in PARAM_FIELDS:
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+
+    source = open_image(args.source, args.size)
+    output = create_image(args.output, source.shape)
+    budget = int(args.memory_budget_mb * 2 ** 20) if args.memory_budget_mb else None
+    processor = TiledProcessor(args.tile, args.halo, params, memory_budget=budget)
+    print(processor.process(source, output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Per-frame span tracing exported as Chrome trace-event JSON.
+
+Spans carry a frame id and the OS thread id and are written into a
+preallocated ring buffer, so a long run keeps only the most recent events.
+Open the dumped file in https://ui.perfetto.dev or ``chrome://tracing``.
+
+While tracing is disabled ``span()`` returns a shared no-op context manager
+and ``traced`` functions cost one attribute check. Renderers passed to
+``attach`` record their own upload/dispatch/readback spans natively; those
+are merged into the dump and take the frame id of the enclosing Python span
+on the same thread.
+
+Usage::
+
+    from dx11_renderer import tracing
+
+    tracing.enable()
+    tracing.attach(renderer)
+    with tracing.frame(index):
+        with tracing.span("capture"):
+            ok, image = capture.read()
+        with tracing.span("process"):
+            output = renderer.process_frame(image)
+    tracing.dump("trace.json")
+"""
+
+import bisect
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+
+DEFAULT_CAPACITY = 65536
+# Category given to spans recorded inside the native renderer
+NATIVE_CATEGORY = "dx11"
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "frame_id", "start")
+
+    def __init__(self, tracer, name, category, frame_id):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.frame_id = frame_id
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.frame_id, self.category)
+        return False
+
+
+class _FrameScope:
+    __slots__ = ("tracer", "frame_id", "previous", "span")
+
+    def __init__(self, tracer, frame_id, name):
+        self.tracer = tracer
+        self.frame_id = frame_id
+        self.span = _Span(tracer, name, "frame", frame_id) if tracer.enabled else None
+
+    def __enter__(self):
+        local = self.tracer._local
+        self.previous = getattr(local, "frame_id", None)
+        local.frame_id = self.frame_id
+        if self.span is not None:
+            self.span.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        if self.span is not None:
+            self.span.__exit__(*exc)
+        self.tracer._local.frame_id = self.previous
+        return False
+
+
+class Tracer:
+    """Record spans into a ring of ``capacity`` events
+
+    Recording is lock-free: slots are claimed from an ``itertools.count``,
+    whose ``next`` is atomic under the GIL, so threads never wait on each
+    other. ``dropped`` counts events overwritten before a dump.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, enabled=False, native_capacity=4096):
+        self.capacity = capacity
+        self.native_capacity = native_capacity
+        self.enabled = False
+        self._ring = [None] * capacity
+        self._counter = itertools.count()
+        self._written = 0
+        self._local = threading.local()
+        self._renderers = []
+        self._native_events = collections.deque(maxlen=capacity)
+        if enabled:
+            self.enable()
+
+    @property
+    def dropped(self):
+        return max(0, self._written - self.capacity)
+
+    def enable(self):
+        self.enabled = True
+        for renderer in self._renderers:
+            self._set_native(renderer, True)
+
+    def disable(self):
+        self.enabled = False
+        for renderer in self._renderers:
+            self._collect_native(renderer)
+            self._set_native(renderer, False)
+
+    def _set_native(self, renderer, enabled):
+        if hasattr(renderer, "set_tracing"):
+            renderer.set_tracing(enabled, self.native_capacity)
+
+    def _collect_native(self, renderer):
+        if hasattr(renderer, "drain_trace_events"):
+            self._native_events.extend(renderer.drain_trace_events())
+
+    def attach(self, renderer):
+        """Include ``renderer``'s native spans; tracing follows this tracer's state"""
+        if renderer not in self._renderers:
+            self._renderers.append(renderer)
+            self._set_native(renderer, self.enabled)
+        return renderer
+
+    def detach(self, renderer):
+        if renderer in self._renderers:
+            self._collect_native(renderer)
+            self._set_native(renderer, False)
+            self._renderers.remove(renderer)
+
+    def current_frame(self):
+        return getattr(self._local, "frame_id", None)
+
+    def record(self, name, start_ns, end_ns, frame_id=None, category="python"):
+        """Store one completed span; timestamps are ``time.perf_counter_ns`` values"""
+        if frame_id is None:
+            frame_id = getattr(self._local, "frame_id", None)
+        index = next(self._counter)
+        self._ring[index % self.capacity] = (name, category, start_ns, end_ns - start_ns,
+                                             threading.get_native_id(), frame_id)
+        self._written = max(self._written, index + 1)
+
+    def span(self, name, frame_id=None, category="python"):
+        """Context manager timing one span; a shared no-op while disabled"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, frame_id)
+
+    def frame(self, frame_id, name="frame"):
+        """Set the current thread's frame id for nested spans and time the frame"""
+        return _FrameScope(self, frame_id, name)
+
+    def traced(self, name=None, category="python"):
+        """Decorator form of ``span``; the span defaults to the function's qualified name"""
+        def decorate(func):
+            span_name = name or func.__qualname__
+
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, span_name, category, None):
+                    return func(*args, **kwargs)
+
+            wrapper.__name__ = func.__name__
+            wrapper.__qualname__ = func.__qualname__
+            wrapper.__doc__ = func.__doc__
+            wrapper.__wrapped__ = func
+            return wrapper
+
+        return decorate
+
+    def events(self):
+        """Python spans currently in the ring, oldest first"""
+        written = self._written
+        start = max(0, written - self.capacity)
+        spans = (self._ring[index % self.capacity] for index in range(start, written))
+        return [span for span in spans if span is not None]
+
+    def clear(self):
+        self._ring = [None] * self.capacity
+        self._counter = itertools.count()
+        self._written = 0
+        self._native_events.clear()
+        for renderer in self._renderers:
+            if hasattr(renderer, "drain_trace_events"):
+                renderer.drain_trace_events()
+
+    def trace_events(self):
+        """All spans as Chrome trace-event dicts, native spans included"""
+        for renderer in self._renderers:
+            self._collect_native(renderer)
+        python_spans = self.events()
+        pid = os.getpid()
+        events = [_complete_event(name, category, start, duration, pid, tid,
+                                  {"frame": frame_id} if frame_id is not None else {})
+                  for name, category, start, duration, tid, frame_id in python_spans]
+
+        # Native spans inherit the frame id of the innermost enclosing Python span
+        by_thread = {}
+        for name, category, start, duration, tid, frame_id in python_spans:
+            if frame_id is not None:
+                by_thread.setdefault(tid, []).append((start, start + duration, frame_id))
+        for spans in by_thread.values():
+            spans.sort()
+        for name, start, duration, tid, sequence in self._native_events:
+            args = {"renderer_frame": sequence}
+            frame_id = _enclosing_frame(by_thread.get(tid, ()), start, start + duration)
+            if frame_id is not None:
+                args["frame"] = frame_id
+            events.append(_complete_event(name, NATIVE_CATEGORY, start, duration, pid, tid, args))
+
+        names = {thread.native_id: thread.name for thread in threading.enumerate()}
+        for tid in sorted({event["tid"] for event in events}):
+            if tid in names:
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                               "args": {"name": names[tid]}})
+        return events
+
+    def dump(self, path):
+        """Write the trace as Chrome trace-event JSON; returns the number of events"""
+        events = self.trace_events()
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped": self.dropped}}, f)
+        return len(events)
+
+
+def _complete_event(name, category, start_ns, duration_ns, pid, tid, args):
+    return {"name": name, "cat": category, "ph": "X", "ts": start_ns / 1000.0, "dur": duration_ns / 1000.0,
+            "pid": pid, "tid": tid, "args": args}
+
+
+def _enclosing_frame(spans, start, end):
+    """Frame id of the latest-starting span in ``spans`` that contains [start, end]"""
+    index = bisect.bisect_right(spans, (start, float("inf"), float("inf")))
+    for position in range(index - 1, -1, -1):
+        span_start, span_end, frame_id = spans[position]
+        if span_end >= end:
+            return frame_id
+    return None
+
+
+# Process-wide tracer used by the module-level helpers and the package's
+# own instrumentation; set DX11_TRACE=1 to start with tracing enabled
+tracer = Tracer(enabled=os.environ.get("DX11_TRACE", "") not in ("", "0"))
+
+enable = tracer.enable
+disable = tracer.disable
+attach = tracer.attach
+detach = tracer.detach
+span = tracer.span
+frame = tracer.frame
+traced = tracer.traced
+dump = tracer.dump
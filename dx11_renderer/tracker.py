@@ -0,0 +1,268 @@
+"""Multi-object tracker carrying detections between inference runs.
+
+Detections are ``(N, 6)`` arrays of ``x1, y1, x2, y2, score, class`` rows,
+the layout of ``result.boxes.data`` from ultralytics. Tracks are returned
+in the same layout with a seventh column holding a stable track id.
+
+Association is IoU first, then centroid distance for what is left (small or
+fast-moving objects whose boxes no longer overlap), both computed as NumPy
+matrices. Between inference runs every track advances with a per-frame
+constant-velocity model, so detection can run at a fraction of the frame
+rate::
+
+    tracker = Tracker()
+    for index, frame in enumerate(frames):
+        if index % 4 == 0:
+            tracks = tracker.update(detector(frame))
+        else:
+            tracks = tracker.predict()
+"""
+
+import itertools
+
+import cv2
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # Optional: greedy assignment is used without SciPy
+    linear_sum_assignment = None
+
+EMPTY_TRACKS = np.zeros((0, 7), dtype=np.float64)
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU of ``(N, 4)`` and ``(M, 4)`` xyxy boxes as an ``(N, M)`` array
+
+    Computed in float32 with in-place operations: at a few hundred boxes the
+    temporaries, not the arithmetic, dominate the cost.
+    """
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    ax1, ay1, ax2, ay2 = (a[:, i:i + 1] for i in range(4))
+    bx1, by1, bx2, by2 = (b[:, i] for i in range(4))
+    intersection = np.minimum(ax2, bx2)
+    intersection -= np.maximum(ax1, bx1)
+    np.maximum(intersection, 0, out=intersection)
+    height = np.minimum(ay2, by2)
+    height -= np.maximum(ay1, by1)
+    np.maximum(height, 0, out=height)
+    intersection *= height
+    union = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1)
+    union -= intersection
+    np.maximum(union, 1e-9, out=union)
+    intersection /= union
+    return intersection
+
+
+def greedy_assignment(scores, threshold):
+    """Match rows to columns by descending score, keeping pairs above ``threshold``
+
+    Returns ``(rows, cols)`` index arrays. Every mutual-best pair (each the
+    other's highest score) is one sequential greedy would also pick, so they
+    are accepted together and the loop only repeats for the rows and columns
+    they displaced; tracking problems usually settle in one or two rounds.
+    """
+    scores = np.where(scores > threshold, scores, -1.0)
+    all_rows, all_cols = [], []
+    while scores.size:
+        best_col = scores.argmax(axis=1)
+        best_row = scores.argmax(axis=0)
+        rows = np.nonzero((best_row[best_col] == np.arange(scores.shape[0]))
+                          & (scores[np.arange(scores.shape[0]), best_col] >= 0))[0]
+        if rows.size == 0:
+            break
+        cols = best_col[rows]
+        all_rows.append(rows)
+        all_cols.append(cols)
+        scores[rows, :] = -1.0
+        scores[:, cols] = -1.0
+    if not all_rows:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+    return np.concatenate(all_rows), np.concatenate(all_cols)
+
+
+def optimal_assignment(scores, threshold):
+    """Maximum-total-score matching (SciPy) restricted to pairs above ``threshold``"""
+    if linear_sum_assignment is None:
+        raise ImportError("Optimal assignment requires scipy")
+    if scores.size == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    rows, cols = linear_sum_assignment(-np.where(scores > threshold, scores, 0.0))
+    keep = scores[rows, cols] > threshold
+    return rows[keep], cols[keep]
+
+
+def _to_cxcywh(boxes):
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    return np.stack([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], axis=1)
+
+
+def _to_xyxy(state):
+    cx, cy, w, h = state[:, 0], state[:, 1], state[:, 2], state[:, 3]
+    return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
+class Tracker:
+    """IoU/centroid tracker with a constant-velocity predictor
+
+    Track state lives in parallel arrays (box centre/size, per-frame
+    velocity, score, class, id, hit count, frames since the last match), so
+    prediction and association are a handful of vectorised operations.
+
+    ``iou_threshold`` is the minimum IoU for a match; unmatched pairs within
+    ``centroid_threshold`` box diagonals of each other are matched next.
+    Tracks unmatched for more than ``max_age`` frames are dropped; tracks are
+    reported once they have ``min_hits`` matches. ``velocity_smoothing`` is
+    the weight of the newest velocity measurement. ``optimal=True`` uses the
+    Hungarian algorithm (requires SciPy) instead of greedy matching.
+    """
+
+    def __init__(self, iou_threshold=0.3, centroid_threshold=1.0, max_age=30, min_hits=1,
+                 velocity_smoothing=0.5, class_aware=True, optimal=False):
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.velocity_smoothing = velocity_smoothing
+        self.class_aware = class_aware
+        self._assign = optimal_assignment if optimal else greedy_assignment
+        if optimal and linear_sum_assignment is None:
+            raise ImportError("Tracker(optimal=True) requires scipy")
+        self._ids = itertools.count(1)
+        self.frame = 0
+        self._reset_state()
+
+    def _reset_state(self):
+        self.state = np.zeros((0, 4))          # cx, cy, w, h
+        self.velocity = np.zeros((0, 4))       # per frame
+        self.scores = np.zeros(0)
+        self.classes = np.zeros(0)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.age = np.zeros(0, dtype=np.int64)     # frames since the last match
+        self._measured = np.zeros((0, 4))      # state at the last match
+        self._measured_frame = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def reset(self):
+        self._reset_state()
+
+    def _advance(self):
+        self.frame += 1
+        self.state = self.state + self.velocity
+        # Sizes follow the model too but must stay positive
+        np.maximum(self.state[:, 2:], 1e-3, out=self.state[:, 2:])
+        self.age += 1
+
+    def predict(self):
+        """Advance every track one frame without detections and return the tracks"""
+        self._advance()
+        self._drop_stale()
+        return self.tracks()
+
+    def update(self, detections):
+        """Advance one frame, associate ``detections`` and return the tracks"""
+        self._advance()
+        detections = np.asarray(detections, dtype=np.float64).reshape(-1, 6)
+        track_rows, det_cols = self._associate(detections)
+        self._apply_matches(detections, track_rows, det_cols)
+
+        unmatched = np.ones(len(detections), dtype=bool)
+        unmatched[det_cols] = False
+        self._spawn(detections[unmatched])
+        self._drop_stale()
+        return self.tracks()
+
+    def _associate(self, detections):
+        if len(self.ids) == 0 or len(detections) == 0:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        predicted = _to_xyxy(self.state)
+        same_class = (self.classes[:, None] == detections[None, :, 5]) if self.class_aware else True
+
+        iou = np.where(same_class, iou_matrix(predicted, detections), 0.0)
+        rows, cols = self._assign(iou, self.iou_threshold)
+        if not self.centroid_threshold:
+            return rows, cols
+
+        # Second pass on what IoU left unmatched: centre distance in units of
+        # the track's box diagonal, turned into a similarity in (0, 1]
+        free_rows = np.setdiff1d(np.arange(len(self.ids)), rows)
+        free_cols = np.setdiff1d(np.arange(len(detections)), cols)
+        if free_rows.size and free_cols.size:
+            centres = (detections[free_cols, :2] + detections[free_cols, 2:4]) / 2
+            offset = self.state[free_rows, None, :2] - centres[None, :, :]
+            diagonal = np.hypot(self.state[free_rows, 2], self.state[free_rows, 3])[:, None]
+            distance = np.hypot(offset[..., 0], offset[..., 1]) / np.maximum(diagonal, 1e-6)
+            similarity = 1.0 / (1.0 + distance)
+            if self.class_aware:
+                similarity = np.where(same_class[np.ix_(free_rows, free_cols)], similarity, 0.0)
+            more_rows, more_cols = self._assign(similarity, 1.0 / (1.0 + self.centroid_threshold))
+            rows = np.concatenate([rows, free_rows[more_rows]])
+            cols = np.concatenate([cols, free_cols[more_cols]])
+        return rows, cols
+
+    def _apply_matches(self, detections, rows, cols):
+        if rows.size == 0:
+            return
+        measured = _to_cxcywh(detections[cols])
+        # Velocity over the frames since the previous match, blended with the
+        # running estimate so one noisy box does not fling the track
+        elapsed = np.maximum(self.frame - self._measured_frame[rows], 1)[:, None]
+        observed = (measured - self._measured[rows]) / elapsed
+        fresh = (self.hits[rows] == 1)[:, None]
+        blended = (self.velocity_smoothing * observed
+                   + (1.0 - self.velocity_smoothing) * self.velocity[rows])
+        self.velocity[rows] = np.where(fresh, observed, blended)
+        self.state[rows] = measured
+        self._measured[rows] = measured
+        self._measured_frame[rows] = self.frame
+        self.scores[rows] = detections[cols, 4]
+        self.classes[rows] = detections[cols, 5]
+        self.hits[rows] += 1
+        self.age[rows] = 0
+
+    def _spawn(self, detections):
+        count = len(detections)
+        if count == 0:
+            return
+        measured = _to_cxcywh(detections)
+        ids = np.fromiter(itertools.islice(self._ids, count), dtype=np.int64, count=count)
+        self.state = np.concatenate([self.state, measured])
+        self.velocity = np.concatenate([self.velocity, np.zeros((count, 4))])
+        self.scores = np.concatenate([self.scores, detections[:, 4]])
+        self.classes = np.concatenate([self.classes, detections[:, 5]])
+        self.ids = np.concatenate([self.ids, ids])
+        self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int64)])
+        self.age = np.concatenate([self.age, np.zeros(count, dtype=np.int64)])
+        self._measured = np.concatenate([self._measured, measured])
+        self._measured_frame = np.concatenate([self._measured_frame, np.full(count, self.frame, dtype=np.int64)])
+
+    def _drop_stale(self):
+        keep = self.age <= self.max_age
+        if keep.all():
+            return
+        for name in ("state", "velocity", "scores", "classes", "ids", "hits", "age", "_measured", "_measured_frame"):
+            setattr(self, name, getattr(self, name)[keep])
+
+    def tracks(self):
+        """Confirmed tracks as ``(M, 7)``: x1, y1, x2, y2, score, class, track id"""
+        confirmed = self.hits >= self.min_hits
+        if not confirmed.any():
+            return EMPTY_TRACKS
+        return np.column_stack([_to_xyxy(self.state[confirmed]), self.scores[confirmed],
+                                self.classes[confirmed], self.ids[confirmed]])
+
+
+def draw_tracks(frame, tracks, names=None, color=(0, 255, 0)):
+    """Draw track boxes labelled with class name and track id"""
+    for x1, y1, x2, y2, score, class_id, track_id in tracks:
+        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
+        name = names[int(class_id)] if names is not None else str(int(class_id))
+        cv2.putText(frame, f"{name} #{int(track_id)}", (int(x1), int(y1 - 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
@@ -0,0 +1,302 @@
+"""Offline video transcoding through the DX11 renderer.
+
+Decode, process and encode run on separate threads connected by bounded
+queues. Long files can be split into segments (aligned to keyframes when
+``ffprobe`` is available) that are transcoded by parallel worker processes
+and reassembled in order.
+
+Usage::
+
+    dx11-render in.mp4 -o out.mp4 --preset evening --segments 4
+"""
+
+import argparse
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from .presets import PARAM_FIELDS, load_preset, make_params
+from .process_pool import _default_renderer
+from .writer import fourcc_for
+
+_END = object()
+
+
+class TranscodeStats:
+    """Throughput of a transcode run"""
+
+    def __init__(self, frames, elapsed, source_fps, segments=1):
+        self.frames = frames
+        self.elapsed = elapsed
+        self.source_fps = source_fps
+        self.segments = segments
+
+    @property
+    def fps(self):
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def realtime_factor(self):
+        """Seconds of video produced per second of wall time"""
+        if self.elapsed <= 0 or not self.source_fps:
+            return 0.0
+        return (self.frames / self.source_fps) / self.elapsed
+
+    def __str__(self):
+        return (f"{self.frames} frames in {self.elapsed:.2f}s "
+                f"({self.fps:.1f} frames/s, {self.realtime_factor:.2f}x realtime, "
+                f"{self.segments} segment(s))")
+
+
+def probe(path):
+    """Return (frame_count, fps, (width, height)) of a video file"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {path}")
+    try:
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    finally:
+        cap.release()
+    return frames, fps, size
+
+
+def keyframe_indices(path, fps):
+    """Frame indices of keyframes via ffprobe, or None when unavailable"""
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return None
+    try:
+        output = subprocess.run(
+            [ffprobe, "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+             "-show_entries", "frame=pts_time", "-of", "csv=p=0", path],
+            capture_output=True, text=True, check=True, timeout=120,
+        ).stdout
+    except (subprocess.SubprocessError, OSError):
+        return None
+    indices = []
+    for line in output.split():
+        try:
+            indices.append(int(round(float(line.strip(",")) * fps)))
+        except ValueError:
+            continue
+    return sorted(set(indices)) or None
+
+
+def plan_segments(frame_count, segments, keyframes=None, min_segment_frames=120):
+    """Split [0, frame_count) into up to ``segments`` (start, end) ranges
+
+    Boundaries snap to the nearest keyframe when keyframes are known. The
+    last range ends at None so it runs to the end of the stream even when
+    the container's frame count is approximate.
+    """
+    segments = max(1, min(segments, frame_count // max(1, min_segment_frames)))
+    boundaries = [0]
+    for k in range(1, segments):
+        target = frame_count * k // segments
+        if keyframes:
+            target = min(keyframes, key=lambda index: abs(index - target))
+        if target > boundaries[-1]:
+            boundaries.append(target)
+    ranges = [(start, end) for start, end in zip(boundaries, boundaries[1:])]
+    ranges.append((boundaries[-1], None))
+    return ranges
+
+
+def transcode_range(src, dst, start=0, end=None, params=None, fourcc=None,
+                    renderer_factory=None, params_factory=None, queue_size=8):
+    """Transcode frames [start, end) of ``src`` into ``dst``; returns frame count"""
+    cap = cv2.VideoCapture(src)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {src}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    renderer = (renderer_factory or _default_renderer)()
+    renderer.update_processing_params(make_params(params, params_factory))
+
+    decoded = queue.Queue(maxsize=queue_size)
+    processed = queue.Queue(maxsize=queue_size)
+    errors = []
+    frames = 0
+    # Set when processing stops, so the decoder does not read the rest of the input
+    stop = threading.Event()
+
+    def put_decoded(item):
+        while not stop.is_set():
+            try:
+                decoded.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def decode():
+        try:
+            index = start
+            while end is None or index < end:
+                ok, frame = cap.read()
+                if not ok or not put_decoded(frame):
+                    break
+                index += 1
+        except Exception as e:
+            errors.append(e)
+        finally:
+            put_decoded(_END)
+
+    def encode():
+        writer = None
+        try:
+            while True:
+                frame = processed.get()
+                if frame is _END:
+                    break
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(dst, fourcc_for(dst, fourcc), fps, (width, height))
+                    if not writer.isOpened():
+                        raise IOError(f"Could not open video writer: {dst}")
+                writer.write(frame)
+        except Exception as e:
+            errors.append(e)
+            # Keep draining so the processing thread never blocks
+            while processed.get() is not _END:
+                pass
+        finally:
+            if writer is not None:
+                writer.release()
+
+    decoder = threading.Thread(target=decode, name="transcode-decode", daemon=True)
+    encoder = threading.Thread(target=encode, name="transcode-encode", daemon=True)
+    decoder.start()
+    encoder.start()
+    try:
+        while True:
+            frame = decoded.get()
+            if frame is _END:
+                break
+            processed.put(renderer.process_frame(frame))
+            frames += 1
+    finally:
+        stop.set()
+        processed.put(_END)
+        decoder.join()
+        encoder.join()
+        cap.release()
+
+    if errors:
+        raise errors[0]
+    return frames
+
+
+def _transcode_segment(args):
+    return transcode_range(*args)
+
+
+def concat_segments(parts, dst, fps, fourcc=None):
+    """Join segment files in order, stream-copying with ffmpeg when possible"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is not None:
+        list_path = dst + ".segments.txt"
+        with open(list_path, "w") as f:
+            for part in parts:
+                escaped = os.path.abspath(part).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        try:
+            subprocess.run([ffmpeg, "-y", "-v", "error", "-f", "concat", "-safe", "0",
+                            "-i", list_path, "-c", "copy", dst], check=True)
+            return
+        except (subprocess.SubprocessError, OSError):
+            pass
+        finally:
+            os.remove(list_path)
+
+    writer = None
+    try:
+        for part in parts:
+            cap = cv2.VideoCapture(part)
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(dst, fourcc_for(dst, fourcc), fps, (width, height))
+                writer.write(frame)
+            cap.release()
+    finally:
+        if writer is not None:
+            writer.release()
+
+
+def transcode(src, dst, params=None, segments=1, workers=None, fourcc=None,
+              renderer_factory=None, params_factory=None, queue_size=8,
+              min_segment_frames=120):
+    """Transcode ``src`` to ``dst``, optionally in parallel segments"""
+    frame_count, fps, _ = probe(src)
+    start_time = time.perf_counter()
+
+    ranges = [(0, None)]
+    if segments > 1 and frame_count > 0:
+        ranges = plan_segments(frame_count, segments, keyframe_indices(src, fps), min_segment_frames)
+
+    if len(ranges) == 1:
+        frames = transcode_range(src, dst, 0, None, params, fourcc,
+                                 renderer_factory, params_factory, queue_size)
+    else:
+        workdir = tempfile.mkdtemp(prefix="dx11-render-", dir=os.path.dirname(os.path.abspath(dst)))
+        extension = os.path.splitext(dst)[1] or ".mp4"
+        parts = [os.path.join(workdir, f"segment_{i:04d}{extension}") for i in range(len(ranges))]
+        jobs = [(src, part, start, end, params, fourcc, renderer_factory, params_factory, queue_size)
+                for part, (start, end) in zip(parts, ranges)]
+        try:
+            with ProcessPoolExecutor(max_workers=workers or len(jobs)) as pool:
+                frames = sum(pool.map(_transcode_segment, jobs))
+            concat_segments(parts, dst, fps, fourcc)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return TranscodeStats(frames, time.perf_counter() - start_time, fps, len(ranges))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="dx11-render", description="Process a video file with the DX11 renderer")
+    parser.add_argument("input", help="Input video file")
+    parser.add_argument("-o", "--output", required=True, help="Output video file")
+    parser.add_argument("--preset", help="Preset name (presets/<name>.json) or path to a preset file")
+    parser.add_argument("--presets-dir", default="presets")
+    for name in PARAM_FIELDS:
+        parser.add_argument(f"--{name}", type=float, help=f"Override {name}")
+    parser.add_argument("--segments", type=int, default=1, help="Split into N segments processed in parallel")
+    parser.add_argument("--workers", type=int, help="Parallel segment workers (default: one per segment)")
+    parser.add_argument("--fourcc", help="Output codec fourcc (default from the output extension)")
+    parser.add_argument("--queue-size", type=int, default=8, help="Frames buffered between pipeline stages")
+    args = parser.parse_args(argv)
+
+    params = load_preset(args.preset, args.presets_dir) if args.preset else {}
+    for name in PARAM_FIELDS:
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+
+    try:
+        stats = transcode(args.input, args.output, params, segments=args.segments,
+                          workers=args.workers, fourcc=args.fourcc, queue_size=args.queue_size)
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Wrote {args.output}: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
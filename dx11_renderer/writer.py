@@ -0,0 +1,198 @@
+"""Background screenshot and clip writing.
+
+Encoding a PNG inside the frame loop stalls the loop for tens of
+milliseconds. ``FrameWriter`` moves encoding and disk I/O onto worker
+threads behind a bounded queue; when the queue is full the request is
+dropped instead of blocking the caller. ``ClipBuffer`` keeps the last few
+seconds of frames in memory so they can be exported as a clip on demand.
+"""
+
+import collections
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .recording import RECORDING_EXTENSION, FrameRecorder
+
+_STOP = object()
+
+FOURCC_BY_EXTENSION = {
+    ".mp4": "mp4v",
+    ".m4v": "mp4v",
+    ".mov": "mp4v",
+    ".avi": "MJPG",
+    ".mkv": "XVID",
+}
+
+
+def fourcc_for(path, fourcc=None):
+    """``cv2.VideoWriter`` codec for ``path``: ``fourcc`` if given, else by extension"""
+    code = fourcc or FOURCC_BY_EXTENSION.get(os.path.splitext(path)[1].lower(), "mp4v")
+    return cv2.VideoWriter_fourcc(*code)
+
+
+class FrameWriter:
+    """Encode and write images and clips on background threads
+
+    The format follows the file extension: ``.png`` uses ``png_compression``
+    (0-9), ``.jpg``/``.jpeg`` use ``jpeg_quality`` (0-100), ``.npy`` stores the
+    raw array, anything else goes through ``cv2.imwrite``. Clips are written
+    as ``.dx11raw`` recordings or any container ``cv2.VideoWriter`` supports.
+    """
+
+    def __init__(self, max_queue=16, workers=1, png_compression=3, jpeg_quality=95, on_complete=None):
+        self.png_compression = png_compression
+        self.jpeg_quality = jpeg_quality
+        self.on_complete = on_complete
+        self.written = 0
+        self.dropped = 0
+        self.errors = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = [threading.Thread(target=self._run, name=f"frame-writer-{i}", daemon=True)
+                         for i in range(max(1, workers))]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def save_image(self, path, frame, copy=True):
+        """Queue ``frame`` for writing to ``path``; False if it was dropped"""
+        return self._submit(self._write_image, path, frame.copy() if copy else frame)
+
+    def save_clip(self, path, frames, fps=None):
+        """Queue a clip of ``(timestamp, frame)`` pairs; False if it was dropped"""
+        frames = list(frames)
+        if not frames:
+            return False
+        return self._submit(self._write_clip, path, frames, fps)
+
+    def _submit(self, func, path, *args):
+        if not self._threads:
+            raise ValueError("FrameWriter is closed")
+        try:
+            self._queue.put_nowait((func, path, args))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                func, path, args = item
+                error = None
+                try:
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    func(path, *args)
+                except Exception as e:
+                    error = e
+                with self._lock:
+                    if error is None:
+                        self.written += 1
+                    else:
+                        self.errors.append((path, str(error)))
+                if self.on_complete is not None:
+                    self.on_complete(path, error)
+            finally:
+                self._queue.task_done()
+
+    def _write_image(self, path, frame):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npy":
+            np.save(path, frame)
+            return
+        if extension == ".png":
+            encode_params = [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+        elif extension in (".jpg", ".jpeg"):
+            encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        else:
+            encode_params = []
+        if not cv2.imwrite(path, frame, encode_params):
+            raise IOError(f"Could not write image: {path}")
+
+    def _write_clip(self, path, frames, fps):
+        if fps is None:
+            span = frames[-1][0] - frames[0][0]
+            fps = (len(frames) - 1) / span if span > 0 else 30.0
+        shape = frames[0][1].shape
+        if path.endswith(RECORDING_EXTENSION):
+            with FrameRecorder(path, shape, fps) as recorder:
+                for timestamp, frame in frames:
+                    if frame.shape == shape:
+                        recorder.write(frame, timestamp - frames[0][0])
+            return
+        writer = cv2.VideoWriter(path, fourcc_for(path), fps, (shape[1], shape[0]))
+        if not writer.isOpened():
+            raise IOError(f"Could not open video writer: {path}")
+        try:
+            for _, frame in frames:
+                # A clip has one frame size; frames from before a resize are skipped
+                if frame.shape == shape:
+                    writer.write(frame)
+        finally:
+            writer.release()
+
+    def flush(self):
+        """Block until everything queued so far has been written"""
+        self._queue.join()
+
+    def close(self):
+        if not self._threads:
+            return
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ClipBuffer:
+    """Ring buffer of the most recent frames for "save last N seconds"
+
+    Frames are stored by reference; pass ``copy=True`` to ``append`` when the
+    caller keeps drawing into the same array afterwards.
+    """
+
+    def __init__(self, seconds=10.0, max_frames=None):
+        self.seconds = seconds
+        self.max_frames = max_frames
+        self._frames = collections.deque()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def append(self, frame, timestamp=None, copy=False):
+        now = time.perf_counter() if timestamp is None else timestamp
+        self._frames.append((now, frame.copy() if copy else frame))
+        while self._frames and (now - self._frames[0][0] > self.seconds
+                                or (self.max_frames and len(self._frames) > self.max_frames)):
+            self._frames.popleft()
+
+    def last(self, seconds=None):
+        """Return the ``(timestamp, frame)`` pairs of the last ``seconds``"""
+        if not self._frames:
+            return []
+        if seconds is None:
+            return list(self._frames)
+        cutoff = self._frames[-1][0] - seconds
+        return [item for item in self._frames if item[0] >= cutoff]
+
+    def clear(self):
+        self._frames.clear()
@@ -1,9 +1,14 @@
 #pragma once
 #include <d3d11.h>
 #include <opencv2/opencv.hpp>
+#include <array>
+#include <cstddef>
+#include <cstdint>
 #include <string>
+#include <utility>
 #include <stdexcept>
 #include <memory>
+#include <vector>
 
 #ifdef _WIN32
     #ifdef DX11_RENDERER_EXPORTS
@@ -20,6 +25,41 @@ namespace dx11_renderer {
 // Forward declaration
 class DX11RendererImpl;
 
+// Number of bins in the luminance histogram
+constexpr int kHistogramBins = 256;
+
+// Arithmetic precision of the processing kernel
+enum class Precision {
+    Float32,    // 32-bit float math (default)
+    Float16,    // min16float math; 32-bit on hardware without 16-bit support
+    UInt8       // 8-bit integer math with Q8 fixed-point parameters and a gamma LUT
+};
+
+// What a block of renderer memory is used for
+enum class MemoryCategory {
+    Textures,           // GPU input/output textures
+    Staging,            // CPU-readable staging copies
+    Buffers,            // Histogram, tile mask and gamma LUT buffers
+    ConstantBuffers,
+    HostFrames,         // Host-side cv::Mat scratch and cache frames
+    Count
+};
+constexpr int kMemoryCategoryCount = static_cast<int>(MemoryCategory::Count);
+
+struct DX11_API MemoryCategoryStats {
+    unsigned long long residentBytes = 0;
+    unsigned long long peakBytes = 0;
+    unsigned long long allocations = 0;
+    unsigned long long releases = 0;
+};
+
+// Thrown when an allocation would exceed the memory budget even after the
+// renderer evicted its caches; the renderer stays usable at its previous size
+class DX11_API MemoryBudgetExceeded : public std::runtime_error {
+public:
+    using std::runtime_error::runtime_error;
+};
+
 // Status information structure
 struct DX11_API RendererStatus {
     bool isInitialized = false;
@@ -27,6 +67,84 @@ struct DX11_API RendererStatus {
     int textureHeight = 0;
     float lastProcessingTime = 0.0f;
     std::string lastError;
+
+    // Auto exposure / histogram monitoring
+    bool autoExposureActive = false;
+    float meanLuminance = 0.0f;
+    float exposureContrast = 1.0f;   // Luma gain auto exposure applies around the metered mean
+    unsigned int histogramSamples = 0;
+    float lastHistogramTime = 0.0f;
+
+    // Temporal change detection
+    int dirtyTiles = 0;
+    int totalTiles = 0;
+    float dirtyTileRatio = 1.0f;
+    unsigned long long skippedFrames = 0;
+
+    // Parameter change tracking / identity fast path
+    unsigned long long paramUpdates = 0;
+    unsigned long long paramUpdatesSkipped = 0;
+    unsigned long long constantUploads = 0;
+    unsigned long long constantUploadsSkipped = 0;
+    unsigned long long identityFrames = 0;
+    unsigned long long passthroughFrames = 0;
+
+    // Precision mode
+    Precision precision = Precision::Float32;
+    bool nativeHalfPrecision = false;   // Device executes min16float at 16 bits
+
+    // Span tracing
+    bool tracingEnabled = false;
+    unsigned long long traceEventsRecorded = 0;
+    unsigned long long traceEventsDropped = 0;   // Overwritten before being drained
+
+    // Memory accounting in bytes, indexed by MemoryCategory
+    std::array<MemoryCategoryStats, kMemoryCategoryCount> memory{};
+    unsigned long long gpuMemoryUsage = 0;      // Every category except HostFrames
+    unsigned long long hostMemoryUsage = 0;
+    unsigned long long peakMemoryUsage = 0;     // High-water mark of GPU + host
+    unsigned long long memoryBudget = 0;        // 0 means unlimited
+    unsigned long long budgetEvictions = 0;     // Times the temporal cache was dropped for the budget
+    unsigned long long budgetRefusals = 0;      // Allocations refused by the budget
+
+    // Geometric correction
+    bool geometryActive = false;
+    unsigned long long remapTableBuilds = 0;
+    unsigned long long remapTableCacheHits = 0;
+    int remapTablesCached = 0;
+
+    // Kernel thread groups
+    int workgroupX = 8;                 // Shape used for the current frame size
+    int workgroupY = 8;
+    int shaderVariants = 0;             // Compiled kernel variants (one per shape)
+
+    // Adapter the device runs on
+    std::string adapterName;
+    unsigned int adapterVendorId = 0;
+    unsigned int adapterDeviceId = 0;
+    unsigned long long adapterVideoMemory = 0;
+
+    // Start-up latency in milliseconds
+    float initializationTime = 0.0f;    // Device, buffers and the default kernel
+    float timeToFirstFrame = 0.0f;      // First frame after warmup() or a frame size change
+    float warmupTime = 0.0f;            // Last warmup() call
+    unsigned long long textureCacheHits = 0;   // Size switches served by parked textures
+    int textureSetsCached = 0;          // Texture sets parked for other sizes
+
+    // Input layouts
+    unsigned long long stridedFrames = 0;   // Non-contiguous inputs read in place through their strides
+    unsigned long long inputCopies = 0;     // Inputs copied to a contiguous frame first (temporal mode only)
+};
+
+// One completed span recorded by the renderer's built-in tracing.
+// Timestamps come from std::chrono::steady_clock, which uses the same
+// performance counter as Python's time.perf_counter_ns on Windows.
+struct DX11_API TraceEvent {
+    const char* name = "";           // Static string
+    int64_t startNs = 0;
+    int64_t durationNs = 0;
+    uint32_t threadId = 0;           // OS thread id
+    uint64_t frameId = 0;            // Sequence number of the processFrame call
 };
 
 struct DX11_API ProcessingParams {
@@ -34,12 +152,85 @@ struct DX11_API ProcessingParams {
     float contrast = 1.0f;
     float saturation = 1.0f;
     float gamma = 1.0f;
+    float hue = 0.0f;           // Degrees, rotated around the grey axis at constant luma
 };
 
-// Main renderer class using PIMPL to hide implementation details
+// Automatic exposure control driven by a subsampled luminance histogram
+struct DX11_API AutoExposureSettings {
+    bool enabled = false;
+    int sampleStride = 8;            // Histogram every Nth pixel in x and y
+    float targetLuminance = 0.45f;   // Desired mean luminance (0..1)
+    float targetSpread = 0.6f;       // Desired 1st..99th percentile luma spread
+    float smoothing = 0.1f;          // Per-frame blend factor towards targets
+    float minBrightness = 0.25f;
+    float maxBrightness = 4.0f;
+    float minContrast = 0.5f;        // Bounds of the luma gain; ProcessingParams::contrast is not touched
+    float maxContrast = 2.0f;
+    float minGamma = 0.5f;
+    float maxGamma = 2.0f;
+};
+
+// Opt-in temporal mode that only reprocesses tiles that changed since the
+// previous frame and reuses the cached output for the rest
+struct DX11_API TemporalSettings {
+    bool enabled = false;
+    int tileSize = 64;               // Rounded up to a multiple of 8
+    int sampleStride = 4;            // Compare every Nth pixel in x and y
+    int pixelThreshold = 8;          // Per-channel difference marking a tile dirty
+    float fullFrameRatio = 0.5f;     // Above this dirty ratio process the whole frame; 0..1
+};
+
+enum class GeometryMode {
+    None,
+    Undistort,      // Lens undistortion, as cv::undistort
+    Homography      // Perspective warp, as cv::warpPerspective
+};
+
+// Geometric correction applied while the kernel samples the input, ahead of
+// the colour adjustments. Undistortion samples through a fixed-point remap
+// table; a homography is evaluated per pixel. Output frames keep the input's
+// size and pixels that map outside the input are black. Matrices are
+// row-major 3x3.
+struct DX11_API GeometrySettings {
+    GeometryMode mode = GeometryMode::None;
+    std::array<double, 9> cameraMatrix{ 1, 0, 0, 0, 1, 0, 0, 0, 1 };
+    std::array<double, 8> distortion{};          // k1, k2, p1, p2, k3, k4, k5, k6
+    std::array<double, 9> newCameraMatrix{};     // All zero: use cameraMatrix
+    std::array<double, 9> homography{ 1, 0, 0, 0, 1, 0, 0, 0, 1 };   // Input to output
+};
+
+// Thread group shape of the processing kernel. Any shape of at most 1024
+// threads works; which one is fastest depends on the GPU and the frame size.
+struct DX11_API WorkgroupSize {
+    int x = 8;
+    int y = 8;
+};
+
+// Autotuned workgroup for frames of about width x height pixels
+struct DX11_API WorkgroupProfileEntry {
+    int width = 0;
+    int height = 0;
+    WorkgroupSize workgroup;
+};
+
+// A BGR uint8 frame in the caller's memory, described by byte strides so
+// that crops, flips, channel-reversed and padded views need no copy.
+// Strides may be negative; data points at channel 0 of pixel (0, 0).
+struct DX11_API FrameView {
+    const uint8_t* data = nullptr;
+    int rows = 0;
+    int cols = 0;
+    ptrdiff_t rowStride = 0;
+    ptrdiff_t pixelStride = 3;
+    ptrdiff_t channelStride = 1;
+};
+
+// Main renderer class using PIMPL to hide implementation details.
+// All methods are thread safe: calls are serialized on an internal mutex and
+// getters return snapshots rather than references to live state.
 class DX11_API DX11Renderer {
 public:
-    DX11Renderer();
+    explicit DX11Renderer(Precision precision = Precision::Float32);
     ~DX11Renderer();
 
     // Disable copy operations
@@ -48,8 +239,67 @@ public:
 
     // Public interface
     void processFrame(const cv::Mat& inputFrame, cv::Mat& outputFrame);
+    // Reads the view in place. Only temporal mode, whose change cache keeps
+    // cv::Mats, copies views that no cv::Mat can describe (counted in
+    // RendererStatus::inputCopies).
+    void processFrame(const FrameView& input, cv::Mat& outputFrame);
     void updateProcessingParams(const ProcessingParams& params);
-    const RendererStatus& getStatus() const;
+    RendererStatus getStatus() const;
+
+    // Auto exposure
+    void setAutoExposure(const AutoExposureSettings& settings);
+    AutoExposureSettings getAutoExposure() const;
+    std::vector<uint32_t> getLuminanceHistogram() const;
+    ProcessingParams getAppliedParams() const;
+
+    // Temporal change detection. A fullFrameRatio outside [0, 1] raises
+    // std::invalid_argument.
+    void setTemporalMode(const TemporalSettings& settings);
+    TemporalSettings getTemporalMode() const;
+
+    // Geometric correction. Undistortion remap tables are built once per
+    // (resolution, settings) and the most recently used ones stay cached on
+    // the GPU. A singular homography raises std::invalid_argument.
+    void setGeometry(const GeometrySettings& settings);
+    GeometrySettings getGeometry() const;
+
+    // Kernel workgroup shape. Each shape is compiled once and cached. The
+    // profile overrides the default for the frame sizes it covers: the entry
+    // with the nearest pixel count is used when it is within a factor of two.
+    // Shapes over 1024 threads raise std::invalid_argument.
+    void setWorkgroupSize(const WorkgroupSize& size);
+    WorkgroupSize getWorkgroupSize() const;
+    void setWorkgroupProfile(const std::vector<WorkgroupProfileEntry>& entries);
+    std::vector<WorkgroupProfileEntry> getWorkgroupProfile() const;
+
+    // Allocates textures, compiles kernel variants and runs a dummy
+    // dispatch for each (width, height), so the first real frame at those
+    // sizes costs no more than the next. From then on the renderer keeps
+    // textures for that many sizes besides the current one, so switching
+    // between them allocates nothing. The current size stays current.
+    void warmup(const std::vector<std::pair<int, int>>& resolutions);
+
+    // Identity fast path
+    bool isIdentity() const;
+    void setZeroCopyPassthrough(bool enabled);
+    bool getZeroCopyPassthrough() const;
+    // Returns true, leaving outputFrame untouched, when zero-copy passthrough
+    // applies and the input itself is the result; otherwise processes the frame
+    bool processFrameOrPassthrough(const FrameView& input, cv::Mat& outputFrame);
+
+    // Span tracing into a preallocated ring of `capacity` events; when
+    // disabled the instrumentation costs one branch per span
+    void setTracing(bool enabled, size_t capacity = 4096);
+    bool isTracing() const;
+    std::vector<TraceEvent> drainTraceEvents();   // Oldest first; empties the ring
+
+    // Cap on GPU + host memory held by this renderer (0 = unlimited). Over
+    // budget the temporal cache is evicted first, then idle remap tables,
+    // then textures parked for other frame sizes;
+    // textures for a new frame size that still do not fit raise
+    // MemoryBudgetExceeded.
+    void setMemoryBudget(unsigned long long bytes);
+    unsigned long long getMemoryBudget() const;
 
 private:
     std::unique_ptr<DX11RendererImpl> impl;
@@ -128,6 +128,14 @@ setup(
         "develop": DevelopCommand,
     },
     distclass=BinaryDistribution,
+    entry_points={
+        "console_scripts": [
+            "dx11-render=dx11_renderer.transcode:main",
+            "dx11-batch=dx11_renderer.batch:main",
+            "dx11-tiled=dx11_renderer.tiled:main",
+            "dx11-autotune=dx11_renderer.autotune:main",
+        ],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -1,7 +1,14 @@
 #include "dx11_renderer.h"
 #include <d3dcompiler.h>
 #include <directxmath.h>
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <map>
+#include <mutex>
 #include <stdexcept>
+#include <string>
+#include <unordered_map>
 #include <vector>
 
 // Include DirectXTK
@@ -10,19 +17,175 @@
 
 namespace dx11_renderer {
 
+// Constant buffer layout shared with the compute shader (16-byte aligned)
+struct ShaderConstants {
+    float colorMatrix[12];  // Brightness, contrast, saturation and hue; RGB rows, .w holds an offset
+    float gamma;
+    UINT frameWidth;
+    UINT frameHeight;
+    UINT histogramStride;   // 0 disables histogram collection
+    UINT geometry;          // 1 samples through the remap table, 2 through the homography
+    UINT tileSize;          // 0 processes every pixel, otherwise only dirty tiles
+    UINT tilesX;
+    UINT padding2;
+    float inverseHomography[12];    // Output to input, three rows padded to float4
+};
+static_assert(sizeof(ShaderConstants) % 16 == 0, "Constant buffer size must be a multiple of 16 bytes");
+
+// Auto exposure's tonal contrast: output luma = pivot + gain * (luma - pivot)
+struct LumaContrast {
+    float gain = 1.0f;
+    float pivot = 0.5f;
+};
+
+// Largest parameter deviation from identity whose combined effect stays below
+// half an 8-bit quantisation step, so the output would round to the input
+constexpr float kIdentityTolerance = 0.5f / 255.0f;
+
+// Remap tables kept on the GPU; a resolution or calibration switch back to a
+// cached one costs no rebuild
+constexpr size_t kRemapTableCacheSize = 4;
+
+// Remap tables use OpenCV's fixed-point layout: an int16 source pixel pair
+// plus a 10-bit index of the 1/32-pixel subpixel offset in x and y
+constexpr int kRemapBits = 5;
+
+// D3D11_CS_THREAD_GROUP_MAX_THREADS_PER_GROUP for cs_5_0
+constexpr int kMaxWorkgroupThreads = 1024;
+
+// D3D11_REQ_TEXTURE2D_U_OR_V_DIMENSION
+constexpr int kMaxTextureSize = 16384;
+
+static int64_t traceNow() {
+    return std::chrono::duration_cast<std::chrono::nanoseconds>(
+        std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+// Fixed-size ring of completed spans. Spans are recorded under the renderer
+// mutex, so the ring needs no synchronisation of its own; once full, the
+// oldest events are overwritten and counted as dropped.
+class TraceRing {
+public:
+    void configure(bool on, size_t capacity) {
+        if (on && capacity != events.size()) {
+            events.assign(std::max<size_t>(1, capacity), TraceEvent{});
+            head = 0;
+            count = 0;
+        }
+        enabled = on;
+    }
+
+    void record(const char* name, int64_t startNs, int64_t endNs, uint64_t frameId) {
+        TraceEvent& event = events[head];
+        event.name = name;
+        event.startNs = startNs;
+        event.durationNs = endNs - startNs;
+        event.threadId = static_cast<uint32_t>(GetCurrentThreadId());
+        event.frameId = frameId;
+        head = (head + 1) % events.size();
+        if (count < events.size()) {
+            ++count;
+        } else {
+            ++dropped;
+        }
+        ++recorded;
+    }
+
+    std::vector<TraceEvent> drain() {
+        std::vector<TraceEvent> result;
+        result.reserve(count);
+        size_t start = (head + events.size() - count) % std::max<size_t>(1, events.size());
+        for (size_t i = 0; i < count; ++i) {
+            result.push_back(events[(start + i) % events.size()]);
+        }
+        count = 0;
+        return result;
+    }
+
+    bool enabled = false;
+    unsigned long long recorded = 0;
+    unsigned long long dropped = 0;
+
+private:
+    std::vector<TraceEvent> events;
+    size_t head = 0;
+    size_t count = 0;
+};
+
+// Records the enclosing scope as a span when tracing is enabled
+class TraceSpan {
+public:
+    TraceSpan(TraceRing& ring, const char* name, uint64_t frameId)
+        : ring(ring.enabled ? &ring : nullptr), name(name), frameId(frameId),
+          start(this->ring ? traceNow() : 0) {}
+
+    ~TraceSpan() {
+        if (ring) {
+            ring->record(name, start, traceNow(), frameId);
+        }
+    }
+
+    TraceSpan(const TraceSpan&) = delete;
+    TraceSpan& operator=(const TraceSpan&) = delete;
+
+private:
+    TraceRing* ring;
+    const char* name;
+    uint64_t frameId;
+    int64_t start;
+};
+
+// GPU copy of one remap table: OpenCV's CV_16SC2 source pixels and CV_16UC1
+// subpixel indices, built for one frame size and one GeometrySettings
+struct RemapTable {
+    int width = 0;
+    int height = 0;
+    GeometrySettings settings;
+    ID3D11Texture2D* coords = nullptr;
+    ID3D11ShaderResourceView* coordsSRV = nullptr;
+    ID3D11Texture2D* weights = nullptr;
+    ID3D11ShaderResourceView* weightsSRV = nullptr;
+    uint64_t lastUsed = 0;
+};
+
+// Textures and BGRA host frames for one frame size, parked while another
+// size is current so that switching back allocates nothing
+struct TextureSet {
+    int width = 0;
+    int height = 0;
+    ID3D11Texture2D* inputTexture = nullptr;
+    ID3D11ShaderResourceView* inputTextureSRV = nullptr;
+    ID3D11Texture2D* outputTexture = nullptr;
+    ID3D11UnorderedAccessView* outputTextureUAV = nullptr;
+    ID3D11Texture2D* stagingTexture = nullptr;
+    cv::Mat uploadFrame;
+    cv::Mat readbackFrame;
+    unsigned long long hostBytes = 0;
+    uint64_t lastUsed = 0;
+};
+
 class DX11RendererImpl {
 public:
-    DX11RendererImpl() {
+    explicit DX11RendererImpl(Precision precision) : histogram(kHistogramBins, 0) {
+        auto startTime = std::chrono::high_resolution_clock::now();
+        status.precision = precision;
         try {
             initializeDevice();
+            queryAdapter();
             createConstantBuffer();
-            createShaders();
+            selectWorkgroup();
+            createHistogramBuffers();
+            if (precision == Precision::UInt8) {
+                createGammaLut();
+            }
             status.isInitialized = true;
         }
         catch (const std::exception& e) {
             status.lastError = e.what();
             cleanupResources();
         }
+        status.initializationTime = std::chrono::duration<float, std::milli>(
+            std::chrono::high_resolution_clock::now() - startTime).count();
     }
 
     ~DX11RendererImpl() {
@@ -31,7 +194,10 @@ public:
 
     void initializeDevice() {
         D3D_FEATURE_LEVEL featureLevel = D3D_FEATURE_LEVEL_11_0;
-        UINT createDeviceFlags = D3D11_CREATE_DEVICE_SINGLETHREADED;
+        // The device is shared by every thread calling into the renderer, so it
+        // must not be created single-threaded; the immediate context is still
+        // only used under DX11Renderer's mutex
+        UINT createDeviceFlags = 0;
 #ifdef _DEBUG
         createDeviceFlags |= D3D11_CREATE_DEVICE_DEBUG;
 #endif
@@ -52,55 +218,172 @@ public:
         if (FAILED(hr)) {
             throw std::runtime_error("Failed to create DirectX 11 device");
         }
+
+        D3D11_FEATURE_DATA_SHADER_MIN_PRECISION_SUPPORT minPrecision = {};
+        if (SUCCEEDED(device->CheckFeatureSupport(D3D11_FEATURE_SHADER_MIN_PRECISION_SUPPORT,
+                                                  &minPrecision, sizeof(minPrecision)))) {
+            status.nativeHalfPrecision =
+                (minPrecision.AllOtherShaderStagesMinPrecision & D3D11_SHADER_MIN_PRECISION_16_BIT) != 0;
+        }
+    }
+
+    void queryAdapter() {
+        // Identifies the GPU for autotuned profiles; failure is not fatal
+        IDXGIDevice* dxgiDevice = nullptr;
+        if (FAILED(device->QueryInterface(&dxgiDevice))) {
+            return;
+        }
+        IDXGIAdapter* adapter = nullptr;
+        DXGI_ADAPTER_DESC desc = {};
+        if (SUCCEEDED(dxgiDevice->GetAdapter(&adapter))) {
+            if (SUCCEEDED(adapter->GetDesc(&desc))) {
+                char name[256] = {};
+                WideCharToMultiByte(CP_UTF8, 0, desc.Description, -1, name, sizeof(name) - 1, nullptr, nullptr);
+                status.adapterName = name;
+                status.adapterVendorId = desc.VendorId;
+                status.adapterDeviceId = desc.DeviceId;
+                status.adapterVideoMemory = desc.DedicatedVideoMemory;
+            }
+            adapter->Release();
+        }
+        dxgiDevice->Release();
     }
 
     void createConstantBuffer() {
         D3D11_BUFFER_DESC bufferDesc = {};
-        bufferDesc.ByteWidth = sizeof(ProcessingParams);
+        bufferDesc.ByteWidth = sizeof(ShaderConstants);
         bufferDesc.Usage = D3D11_USAGE_DYNAMIC;
         bufferDesc.BindFlags = D3D11_BIND_CONSTANT_BUFFER;
         bufferDesc.CPUAccessFlags = D3D11_CPU_ACCESS_WRITE;
 
+        ShaderConstants constants = buildConstants();
         D3D11_SUBRESOURCE_DATA initData = {};
-        initData.pSysMem = &params;
+        initData.pSysMem = &constants;
 
         HRESULT hr = device->CreateBuffer(&bufferDesc, &initData, &constBuffer);
         if (FAILED(hr)) {
             throw std::runtime_error("Failed to create constant buffer");
         }
+        trackAllocation(constBuffer, MemoryCategory::ConstantBuffers, bufferDesc.ByteWidth);
+        uploadedConstants = constants;
+        constantsUploaded = true;
     }
 
-    void createShaders() {
+    ID3D11ComputeShader* compileShader(const WorkgroupSize& size) {
         const char* shaderCode = R"(
         cbuffer ProcessingParams : register(b0) {
-            float brightness;
-            float contrast;
-            float saturation;
+            float4 colorMatrix[3];
             float gamma;
+            uint2 frameSize;
+            uint histogramStride;
+            uint geometry;
+            uint tileSize;
+            uint tilesX;
+            uint padding2;
+            float4 inverseHomography[3];
         };
 
         Texture2D<float4> inputTexture : register(t0);
         RWTexture2D<float4> outputTexture : register(u0);
+        StructuredBuffer<uint> tileMask : register(t1);
+        StructuredBuffer<uint> gammaLut : register(t2);
+        RWStructuredBuffer<uint> luminanceHistogram : register(u1);
+        Texture2D<int2> remapCoords : register(t3);
+        Texture2D<uint> remapWeights : register(t4);
+
+#if PRECISION_FLOAT16
+        typedef min16float real;
+        typedef min16float3 real3;
+        typedef min16float3x3 real3x3;
+#else
+        typedef float real;
+        typedef float3 real3;
+        typedef float3x3 real3x3;
+#endif
+
+        // Texels outside the frame are black, like cv::BORDER_CONSTANT
+        float4 loadInput(int2 pixel) {
+            if (any(pixel < 0) || any(pixel >= int2(frameSize))) {
+                return float4(0.0, 0.0, 0.0, 1.0);
+            }
+            return inputTexture[pixel];
+        }
+
+        float4 bilinear(int2 base, float2 f) {
+            float4 top = lerp(loadInput(base), loadInput(base + int2(1, 0)), f.x);
+            float4 bottom = lerp(loadInput(base + int2(0, 1)), loadInput(base + int2(1, 1)), f.x);
+            return lerp(top, bottom, f.y);
+        }
+
+        // Geometric correction fused into the colour pass: lens distortion
+        // reads its fixed-point source position from the remap table, a
+        // homography is evaluated directly
+        float4 sampleInput(uint2 pixel) {
+            if (geometry == 0) {
+                return inputTexture[pixel];
+            }
+            if (geometry == 1) {
+                uint index = remapWeights[pixel];
+                return bilinear(remapCoords[pixel], float2(index & 31, index >> 5) / 32.0);
+            }
+            float3 p = float3(pixel, 1.0);
+            float w = dot(inverseHomography[2].xyz, p);
+            if (w == 0.0) {
+                return float4(0.0, 0.0, 0.0, 1.0);
+            }
+            float2 source = float2(dot(inverseHomography[0].xyz, p), dot(inverseHomography[1].xyz, p)) / w;
+            float2 base = floor(source);
+            return bilinear(int2(base), source - base);
+        }
 
-        [numthreads(8, 8, 1)]
+        [numthreads(THREADS_X, THREADS_Y, 1)]
         void main(uint3 DTid : SV_DispatchThreadID) {
-            float4 color = inputTexture[DTid.xy];
-            
-            // Apply brightness
-            color.rgb *= brightness;
-            
-            // Apply contrast
+            if (DTid.x >= frameSize.x || DTid.y >= frameSize.y) {
+                return;
+            }
+
+            // Temporal mode: leave clean tiles untouched
+            if (tileSize > 0) {
+                if (tileMask[(DTid.y / tileSize) * tilesX + DTid.x / tileSize] == 0) {
+                    return;
+                }
+            }
+
+            float4 color = sampleInput(DTid.xy);
+
+            // Scene luminance before any adjustment, for metering
             float3 lumCoeff = float3(0.2126, 0.7152, 0.0722);
-            float luminance = dot(color.rgb, lumCoeff);
-            color.rgb = lerp(luminance, color.rgb, contrast);
-            
-            // Apply saturation
-            float3 desaturated = float3(luminance, luminance, luminance);
-            color.rgb = lerp(desaturated, color.rgb, saturation);
-            
+            float sceneLuminance = dot(color.rgb, lumCoeff);
+
+            // Strided luminance histogram for auto exposure metering
+            if (histogramStride > 0 &&
+                (DTid.x % histogramStride) == 0 && (DTid.y % histogramStride) == 0) {
+                uint bin = min((uint)(saturate(sceneLuminance) * 255.0 + 0.5), 255u);
+                InterlockedAdd(luminanceHistogram[bin], 1);
+            }
+
+            // Brightness, contrast, saturation, hue and the auto exposure luma
+            // contrast are one affine transform built on the host, so the
+            // colour adjustments cost a single multiply-add
+#if PRECISION_UINT8
+            // Integer pipeline: 8-bit channels, the matrix in Q8 fixed point,
+            // a rounding right shift and a 256 entry gamma table
+            int3 c = int3(color.rgb * 255.0 + 0.5);
+            int3x3 m8 = int3x3(int3(round(colorMatrix[0].xyz * 256.0)),
+                               int3(round(colorMatrix[1].xyz * 256.0)),
+                               int3(round(colorMatrix[2].xyz * 256.0)));
+            int3 offset8 = int3(round(float3(colorMatrix[0].w, colorMatrix[1].w, colorMatrix[2].w) * 65280.0));
+            c = (mul(m8, c) + offset8 + 128) >> 8;
+            c = clamp(c, 0, 255);
+            color.rgb = float3(gammaLut[c.r], gammaLut[c.g], gammaLut[c.b]) / 255.0;
+#else
+            real3x3 m = real3x3((real3)colorMatrix[0].xyz, (real3)colorMatrix[1].xyz, (real3)colorMatrix[2].xyz);
+            real3 rgb = mul(m, (real3)color.rgb) + real3(colorMatrix[0].w, colorMatrix[1].w, colorMatrix[2].w);
+
             // Apply gamma correction
-            color.rgb = pow(color.rgb, 1.0 / gamma);
-            
+            color.rgb = (float3)pow(saturate(rgb), (real)(1.0 / gamma));
+#endif
+
             outputTexture[DTid.xy] = color;
         }
     )";
@@ -108,9 +391,19 @@ public:
         ID3DBlob* shaderBlob = nullptr;
         ID3DBlob* errorBlob = nullptr;
 
+        const std::string threadsX = std::to_string(size.x);
+        const std::string threadsY = std::to_string(size.y);
+        const D3D_SHADER_MACRO defines[] = {
+            { "PRECISION_FLOAT16", status.precision == Precision::Float16 ? "1" : "0" },
+            { "PRECISION_UINT8", status.precision == Precision::UInt8 ? "1" : "0" },
+            { "THREADS_X", threadsX.c_str() },
+            { "THREADS_Y", threadsY.c_str() },
+            { nullptr, nullptr }
+        };
+
         HRESULT hr = D3DCompile(
             shaderCode, strlen(shaderCode),
-            nullptr, nullptr, nullptr,
+            nullptr, defines, nullptr,
             "main", "cs_5_0",
             D3DCOMPILE_ENABLE_STRICTNESS, 0,
             &shaderBlob, &errorBlob
@@ -126,42 +419,322 @@ public:
             throw std::runtime_error(errorMsg);
         }
 
+        ID3D11ComputeShader* shader = nullptr;
         hr = device->CreateComputeShader(
             shaderBlob->GetBufferPointer(),
             shaderBlob->GetBufferSize(),
             nullptr,
-            &computeShader
+            &shader
         );
 
         shaderBlob->Release();
         if (FAILED(hr)) {
             throw std::runtime_error("Failed to create compute shader");
         }
+        return shader;
     }
 
-    void createTextures(int width, int height) {
-        // Release existing textures
+    static void validateWorkgroup(const WorkgroupSize& size) {
+        if (size.x < 1 || size.y < 1 || size.x * size.y > kMaxWorkgroupThreads) {
+            throw std::invalid_argument("Workgroup " + std::to_string(size.x) + "x" + std::to_string(size.y)
+                                        + " must have between 1 and "
+                                        + std::to_string(kMaxWorkgroupThreads) + " threads");
+        }
+    }
+
+    // Workgroup for the current frame size: the profile entry nearest in
+    // pixel count if it is within a factor of two, otherwise the default
+    WorkgroupSize chooseWorkgroup() const {
+        WorkgroupSize chosen = workgroup;
+        double pixels = static_cast<double>(status.textureWidth) * status.textureHeight;
+        if (pixels <= 0.0) {
+            return chosen;
+        }
+        double best = std::log(2.0) + 1e-9;
+        for (const WorkgroupProfileEntry& entry : workgroupProfile) {
+            double distance = std::fabs(std::log(static_cast<double>(entry.width) * entry.height / pixels));
+            if (distance < best) {
+                best = distance;
+                chosen = entry.workgroup;
+            }
+        }
+        return chosen;
+    }
+
+    // Point computeShader at the variant for the current frame size,
+    // compiling it on first use
+    void selectWorkgroup() {
+        WorkgroupSize size = chooseWorkgroup();
+        auto key = std::make_pair(size.x, size.y);
+        auto found = shaders.find(key);
+        if (found == shaders.end()) {
+            found = shaders.emplace(key, compileShader(size)).first;
+            status.shaderVariants = static_cast<int>(shaders.size());
+        }
+        computeShader = found->second;
+        status.workgroupX = size.x;
+        status.workgroupY = size.y;
+    }
+
+    void setWorkgroupSize(const WorkgroupSize& size) {
+        validateWorkgroup(size);
+        workgroup = size;
+        selectWorkgroup();
+    }
+
+    WorkgroupSize getWorkgroupSize() const {
+        return workgroup;
+    }
+
+    void setWorkgroupProfile(const std::vector<WorkgroupProfileEntry>& entries) {
+        for (const WorkgroupProfileEntry& entry : entries) {
+            if (entry.width <= 0 || entry.height <= 0) {
+                throw std::invalid_argument("Workgroup profile entries need a positive frame size");
+            }
+            validateWorkgroup(entry.workgroup);
+        }
+        workgroupProfile = entries;
+        selectWorkgroup();
+    }
+
+    const std::vector<WorkgroupProfileEntry>& getWorkgroupProfile() const {
+        return workgroupProfile;
+    }
+
+    void createHistogramBuffers() {
+        D3D11_BUFFER_DESC bufferDesc = {};
+        bufferDesc.ByteWidth = sizeof(uint32_t) * kHistogramBins;
+        bufferDesc.Usage = D3D11_USAGE_DEFAULT;
+        bufferDesc.BindFlags = D3D11_BIND_UNORDERED_ACCESS;
+        bufferDesc.MiscFlags = D3D11_RESOURCE_MISC_BUFFER_STRUCTURED;
+        bufferDesc.StructureByteStride = sizeof(uint32_t);
+
+        HRESULT hr = device->CreateBuffer(&bufferDesc, nullptr, &histogramBuffer);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create histogram buffer");
+        }
+        trackAllocation(histogramBuffer, MemoryCategory::Buffers, bufferDesc.ByteWidth);
+
+        D3D11_UNORDERED_ACCESS_VIEW_DESC uavDesc = {};
+        uavDesc.Format = DXGI_FORMAT_UNKNOWN;
+        uavDesc.ViewDimension = D3D11_UAV_DIMENSION_BUFFER;
+        uavDesc.Buffer.NumElements = kHistogramBins;
+        hr = device->CreateUnorderedAccessView(histogramBuffer, &uavDesc, &histogramUAV);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create histogram UAV");
+        }
+
+        // CPU readable copy of the histogram
+        bufferDesc.Usage = D3D11_USAGE_STAGING;
+        bufferDesc.BindFlags = 0;
+        bufferDesc.CPUAccessFlags = D3D11_CPU_ACCESS_READ;
+        hr = device->CreateBuffer(&bufferDesc, nullptr, &histogramStaging);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create histogram staging buffer");
+        }
+        trackAllocation(histogramStaging, MemoryCategory::Staging, bufferDesc.ByteWidth);
+    }
+
+    void createGammaLut() {
+        D3D11_BUFFER_DESC bufferDesc = {};
+        bufferDesc.ByteWidth = sizeof(uint32_t) * 256;
+        bufferDesc.Usage = D3D11_USAGE_DYNAMIC;
+        bufferDesc.BindFlags = D3D11_BIND_SHADER_RESOURCE;
+        bufferDesc.CPUAccessFlags = D3D11_CPU_ACCESS_WRITE;
+        bufferDesc.MiscFlags = D3D11_RESOURCE_MISC_BUFFER_STRUCTURED;
+        bufferDesc.StructureByteStride = sizeof(uint32_t);
+
+        HRESULT hr = device->CreateBuffer(&bufferDesc, nullptr, &gammaLutBuffer);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create gamma LUT buffer");
+        }
+        trackAllocation(gammaLutBuffer, MemoryCategory::Buffers, bufferDesc.ByteWidth);
+
+        D3D11_SHADER_RESOURCE_VIEW_DESC srvDesc = {};
+        srvDesc.Format = DXGI_FORMAT_UNKNOWN;
+        srvDesc.ViewDimension = D3D11_SRV_DIMENSION_BUFFER;
+        srvDesc.Buffer.NumElements = 256;
+        hr = device->CreateShaderResourceView(gammaLutBuffer, &srvDesc, &gammaLutSRV);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create gamma LUT view");
+        }
+    }
+
+    // The integer pipeline looks gamma up in a table rebuilt when gamma changes
+    void updateGammaLut(float gamma) {
+        if (gammaLutValid && gamma == gammaLutValue) {
+            return;
+        }
+        D3D11_MAPPED_SUBRESOURCE mapped;
+        HRESULT hr = context->Map(gammaLutBuffer, 0, D3D11_MAP_WRITE_DISCARD, 0, &mapped);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to map gamma LUT buffer");
+        }
+        uint32_t* lut = static_cast<uint32_t*>(mapped.pData);
+        for (int i = 0; i < 256; ++i) {
+            double value = std::pow(i / 255.0, 1.0 / gamma);
+            lut[i] = static_cast<uint32_t>(std::min(255.0, std::floor(value * 255.0 + 0.5)));
+        }
+        context->Unmap(gammaLutBuffer, 0);
+        gammaLutValue = gamma;
+        gammaLutValid = true;
+    }
+
+    void releaseTextures() {
         if (inputTextureSRV) { inputTextureSRV->Release(); inputTextureSRV = nullptr; }
         if (outputTextureUAV) { outputTextureUAV->Release(); outputTextureUAV = nullptr; }
-        if (inputTexture) { inputTexture->Release(); inputTexture = nullptr; }
-        if (outputTexture) { outputTexture->Release(); outputTexture = nullptr; }
+        releaseTracked(inputTexture);
+        releaseTracked(outputTexture);
+        releaseTracked(stagingTexture);
+    }
 
+    // Makes width x height the current frame size. Textures parked for that
+    // size are reused; otherwise new ones are created. Once warmup() has
+    // asked for a cache the current textures are parked for a later switch
+    // back if the memory budget allows; otherwise they are released.
+    void bindTextures(int width, int height) {
+        bool cached = std::any_of(textureSets.begin(), textureSets.end(), [&](const TextureSet& set) {
+            return set.width == width && set.height == height;
+        });
+        if (!cached) {
+            // Input, output and staging textures plus the BGRA upload/readback frames
+            unsigned long long needed = 5 * textureBytes(width, height);
+            unsigned long long current = 3 * textureBytes(status.textureWidth, status.textureHeight)
+                + matBytes(uploadFrame) + matBytes(readbackFrame);
+            if (!reserveMemory(needed, current)) {
+                throw MemoryBudgetExceeded("Memory budget of " + std::to_string(status.memoryBudget)
+                                           + " bytes cannot hold " + std::to_string(width) + "x"
+                                           + std::to_string(height) + " frames");
+            }
+            bool keep = textureSetCapacity > 0
+                && (!status.memoryBudget || totalMemory() + needed <= status.memoryBudget);
+            if (!keep) {
+                releaseTextures();
+                uploadFrame.release();
+                readbackFrame.release();
+                syncHostMemory();
+            }
+        }
+
+        parkTextures();
+        releaseTileResources();
+        if (cached) {
+            unparkTextures(width, height);
+            ++status.textureCacheHits;
+        }
+        else {
+            createTextures(width, height);
+        }
+        while (textureSets.size() > textureSetCapacity) {
+            evictTextureSet();
+        }
+        activeRemap = -1;
+        selectWorkgroup();
+    }
+
+    // Moves the current textures and host frames into the idle cache
+    void parkTextures() {
+        if (!inputTexture) {
+            return;
+        }
+        TextureSet set;
+        set.width = status.textureWidth;
+        set.height = status.textureHeight;
+        std::swap(set.inputTexture, inputTexture);
+        std::swap(set.inputTextureSRV, inputTextureSRV);
+        std::swap(set.outputTexture, outputTexture);
+        std::swap(set.outputTextureUAV, outputTextureUAV);
+        std::swap(set.stagingTexture, stagingTexture);
+        std::swap(set.uploadFrame, uploadFrame);
+        std::swap(set.readbackFrame, readbackFrame);
+        // Parked host frames stay counted, just no longer as the current ones
+        syncHostMemory();
+        set.hostBytes = matBytes(set.uploadFrame) + matBytes(set.readbackFrame);
+        addMemory(MemoryCategory::HostFrames, set.hostBytes);
+        updateMemoryTotals();
+        set.lastUsed = ++textureClock;
+        textureSets.push_back(set);
+        status.textureSetsCached = static_cast<int>(textureSets.size());
+        status.textureWidth = 0;
+        status.textureHeight = 0;
+    }
+
+    void unparkTextures(int width, int height) {
+        auto it = std::find_if(textureSets.begin(), textureSets.end(), [&](const TextureSet& set) {
+            return set.width == width && set.height == height;
+        });
+        TextureSet& set = *it;
+        std::swap(set.inputTexture, inputTexture);
+        std::swap(set.inputTextureSRV, inputTextureSRV);
+        std::swap(set.outputTexture, outputTexture);
+        std::swap(set.outputTextureUAV, outputTextureUAV);
+        std::swap(set.stagingTexture, stagingTexture);
+        std::swap(set.uploadFrame, uploadFrame);
+        std::swap(set.readbackFrame, readbackFrame);
+        removeMemory(MemoryCategory::HostFrames, set.hostBytes);
+        textureSets.erase(it);
+        syncHostMemory();
+        status.textureSetsCached = static_cast<int>(textureSets.size());
+        status.textureWidth = width;
+        status.textureHeight = height;
+    }
+
+    void releaseTextureSet(TextureSet& set) {
+        if (set.inputTextureSRV) { set.inputTextureSRV->Release(); set.inputTextureSRV = nullptr; }
+        if (set.outputTextureUAV) { set.outputTextureUAV->Release(); set.outputTextureUAV = nullptr; }
+        releaseTracked(set.inputTexture);
+        releaseTracked(set.outputTexture);
+        releaseTracked(set.stagingTexture);
+        set.uploadFrame.release();
+        set.readbackFrame.release();
+        removeMemory(MemoryCategory::HostFrames, set.hostBytes);
+        set.hostBytes = 0;
+        updateMemoryTotals();
+    }
+
+    void releaseTextureSets() {
+        for (TextureSet& set : textureSets) {
+            releaseTextureSet(set);
+        }
+        textureSets.clear();
+        status.textureSetsCached = 0;
+    }
+
+    // Drops the least recently parked texture set; false when there is none
+    bool evictTextureSet() {
+        if (textureSets.empty()) {
+            return false;
+        }
+        auto oldest = std::min_element(textureSets.begin(), textureSets.end(),
+                                       [](const TextureSet& a, const TextureSet& b) {
+                                           return a.lastUsed < b.lastUsed;
+                                       });
+        releaseTextureSet(*oldest);
+        textureSets.erase(oldest);
+        status.textureSetsCached = static_cast<int>(textureSets.size());
+        return true;
+    }
+
+    // Creates textures for width x height; the current ones must have been
+    // parked or released
+    void createTextures(int width, int height) {
         // Create texture description
         D3D11_TEXTURE2D_DESC texDesc = {};
         texDesc.Width = width;
         texDesc.Height = height;
         texDesc.MipLevels = 1;
         texDesc.ArraySize = 1;
-        texDesc.Format = DXGI_FORMAT_R8G8B8A8_UNORM;
+        texDesc.Format = DXGI_FORMAT_B8G8R8A8_UNORM;
         texDesc.SampleDesc.Count = 1;
         texDesc.Usage = D3D11_USAGE_DEFAULT;
         texDesc.BindFlags = D3D11_BIND_SHADER_RESOURCE;
 
-        // Create input texture
+        // Create input texture (BGRA so the shader sees correct rgb channels)
         HRESULT hr = device->CreateTexture2D(&texDesc, nullptr, &inputTexture);
         if (FAILED(hr)) {
             throw std::runtime_error("Failed to create input texture");
         }
+        trackAllocation(inputTexture, MemoryCategory::Textures, textureBytes(width, height));
 
         // Create SRV for input texture
         hr = device->CreateShaderResourceView(inputTexture, nullptr, &inputTextureSRV);
@@ -169,12 +742,14 @@ public:
             throw std::runtime_error("Failed to create input texture view");
         }
 
-        // Create output texture
+        // Create output texture (typed UAV stores require RGBA)
+        texDesc.Format = DXGI_FORMAT_R8G8B8A8_UNORM;
         texDesc.BindFlags = D3D11_BIND_UNORDERED_ACCESS;
         hr = device->CreateTexture2D(&texDesc, nullptr, &outputTexture);
         if (FAILED(hr)) {
             throw std::runtime_error("Failed to create output texture");
         }
+        trackAllocation(outputTexture, MemoryCategory::Textures, textureBytes(width, height));
 
         // Create UAV for output texture
         hr = device->CreateUnorderedAccessView(outputTexture, nullptr, &outputTextureUAV);
@@ -182,109 +757,1360 @@ public:
             throw std::runtime_error("Failed to create output texture UAV");
         }
 
+        // Create staging texture for CPU readback
+        texDesc.Usage = D3D11_USAGE_STAGING;
+        texDesc.BindFlags = 0;
+        texDesc.CPUAccessFlags = D3D11_CPU_ACCESS_READ;
+        hr = device->CreateTexture2D(&texDesc, nullptr, &stagingTexture);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create staging texture");
+        }
+        trackAllocation(stagingTexture, MemoryCategory::Staging, textureBytes(width, height));
+
         status.textureWidth = width;
         status.textureHeight = height;
     }
 
+    // Prepares every size in `resolutions` ahead of its first frame:
+    // textures, host frames, the workgroup's kernel variant and remap table,
+    // plus one dispatch and readback of a black frame so that the driver
+    // finishes its lazy allocations too. From then on textures for at least
+    // that many sizes stay parked while another size is current. The current
+    // frame size stays current.
+    void warmup(const std::vector<std::pair<int, int>>& resolutions) {
+        if (!status.isInitialized) {
+            throw std::runtime_error("Renderer not initialized");
+        }
+        for (const auto& resolution : resolutions) {
+            if (resolution.first < 1 || resolution.second < 1
+                || resolution.first > kMaxTextureSize || resolution.second > kMaxTextureSize) {
+                throw std::invalid_argument("Cannot warm up " + std::to_string(resolution.first) + "x"
+                                            + std::to_string(resolution.second) + " frames");
+            }
+        }
+        auto startTime = std::chrono::high_resolution_clock::now();
+        textureSetCapacity = std::max(textureSetCapacity, resolutions.size());
+        int currentWidth = status.textureWidth;
+        int currentHeight = status.textureHeight;
+
+        for (const auto& resolution : resolutions) {
+            TraceSpan span(trace, "dx11.warmup", frameSequence);
+            int width = resolution.first;
+            int height = resolution.second;
+            if (width != status.textureWidth || height != status.textureHeight) {
+                bindTextures(width, height);
+            }
+            if (geometry.mode == GeometryMode::Undistort) {
+                prepareRemapTable();
+            }
+            ShaderConstants constants = buildConstants();
+            constants.histogramStride = 0;
+            cv::Mat black(height, width, CV_8UC3, cv::Scalar(0, 0, 0));
+            cv::Mat output;
+            processFullFrame(viewOf(black), output, constants);
+        }
+
+        if (currentWidth > 0 && (currentWidth != status.textureWidth || currentHeight != status.textureHeight)) {
+            bindTextures(currentWidth, currentHeight);
+        }
+        syncHostMemory();
+        // The next frame is the first real one, whether or not its size was warmed
+        firstFrameDue = true;
+        status.warmupTime = std::chrono::duration<float, std::milli>(
+            std::chrono::high_resolution_clock::now() - startTime).count();
+    }
+
     void cleanupResources() {
-        if (outputTextureUAV) { outputTextureUAV->Release(); outputTextureUAV = nullptr; }
-        if (inputTextureSRV) { inputTextureSRV->Release(); inputTextureSRV = nullptr; }
-        if (outputTexture) { outputTexture->Release(); outputTexture = nullptr; }
-        if (inputTexture) { inputTexture->Release(); inputTexture = nullptr; }
-        if (computeShader) { computeShader->Release(); computeShader = nullptr; }
-        if (constBuffer) { constBuffer->Release(); constBuffer = nullptr; }
+        releaseTextureSets();
+        releaseTextures();
+        releaseTileResources();
+        releaseRemapTables();
+        if (histogramUAV) { histogramUAV->Release(); histogramUAV = nullptr; }
+        releaseTracked(histogramBuffer);
+        releaseTracked(histogramStaging);
+        if (gammaLutSRV) { gammaLutSRV->Release(); gammaLutSRV = nullptr; }
+        releaseTracked(gammaLutBuffer);
+        for (auto& entry : shaders) {
+            entry.second->Release();
+        }
+        shaders.clear();
+        computeShader = nullptr;
+        releaseTracked(constBuffer);
         if (context) { context->Release(); context = nullptr; }
         if (device) { device->Release(); device = nullptr; }
     }
 
-    void processFrame(const cv::Mat& inputFrame, cv::Mat& outputFrame) {
-        if (!status.isInitialized) {
-            throw std::runtime_error("Renderer not initialized");
+    // Brightness, contrast, saturation and hue as one RGB to RGB matrix.
+    // In Rec. 709 YCbCr luma is its own axis: contrast and saturation both
+    // scale chroma around the pixel's luma and hue rotates it, so together
+    // they are diag(1, k * R(hue)) between the two colour conversions.
+    // Brightness then scales everything. Grey stays grey and, with
+    // brightness 1, every pixel keeps its luma.
+    static std::array<std::array<double, 3>, 3> colorMatrix(const ProcessingParams& p) {
+        const double wr = 0.2126, wg = 0.7152, wb = 0.0722;
+        const double toYCbCr[3][3] = {
+            { wr, wg, wb },
+            { -wr / (2 * (1 - wb)), -wg / (2 * (1 - wb)), 0.5 },
+            { 0.5, -wg / (2 * (1 - wr)), -wb / (2 * (1 - wr)) },
+        };
+        const double toRgb[3][3] = {
+            { 1, 0, 2 * (1 - wr) },
+            { 1, -2 * wb * (1 - wb) / wg, -2 * wr * (1 - wr) / wg },
+            { 1, 2 * (1 - wb), 0 },
+        };
+        const double angle = p.hue * 3.14159265358979323846 / 180.0;
+        const double k = static_cast<double>(p.contrast) * p.saturation;
+        const double chroma[3][3] = {
+            { 1, 0, 0 },
+            { 0, k * std::cos(angle), -k * std::sin(angle) },
+            { 0, k * std::sin(angle), k * std::cos(angle) },
+        };
+
+        std::array<std::array<double, 3>, 3> result{};
+        for (int i = 0; i < 3; ++i) {
+            for (int j = 0; j < 3; ++j) {
+                double sum = 0.0;
+                for (int a = 0; a < 3; ++a) {
+                    for (int b = 0; b < 3; ++b) {
+                        sum += toRgb[i][a] * chroma[a][b] * toYCbCr[b][j];
+                    }
+                }
+                result[i][j] = p.brightness * sum;
+            }
         }
+        return result;
+    }
 
-        // Update textures if size changed
-        if (inputFrame.cols != status.textureWidth || inputFrame.rows != status.textureHeight) {
-            createTextures(inputFrame.cols, inputFrame.rows);
+    ShaderConstants buildConstants() const {
+        ShaderConstants constants = {};
+        auto matrix = colorMatrix(appliedParams);
+        // The luma contrast acts on the input, before the matrix. Every
+        // channel moves by (gain - 1) * (luma - pivot), and the matrix maps
+        // grey to brightness * grey, so it adds brightness * (gain - 1) * w
+        // to each row and brightness * (1 - gain) * pivot as the offset
+        const double luma[3] = { 0.2126, 0.7152, 0.0722 };
+        const double slope = static_cast<double>(appliedParams.brightness) * (lumaContrast.gain - 1.0);
+        for (int i = 0; i < 3; ++i) {
+            for (int j = 0; j < 3; ++j) {
+                constants.colorMatrix[i * 4 + j] = static_cast<float>(matrix[i][j] + slope * luma[j]);
+            }
+            constants.colorMatrix[i * 4 + 3] = static_cast<float>(-slope * lumaContrast.pivot);
+        }
+        constants.gamma = appliedParams.gamma;
+        constants.frameWidth = static_cast<UINT>(status.textureWidth);
+        constants.frameHeight = static_cast<UINT>(status.textureHeight);
+        constants.histogramStride = autoExposure.enabled
+            ? static_cast<UINT>(std::max(1, autoExposure.sampleStride))
+            : 0;
+        constants.geometry = static_cast<UINT>(geometry.mode);
+        std::copy(inverseHomography.begin(), inverseHomography.end(), constants.inverseHomography);
+        return constants;
+    }
+
+    void uploadConstants(const ShaderConstants& constants) {
+        // The buffer keeps its contents between dispatches, so identical
+        // constants do not need another map/copy
+        if (constantsUploaded && memcmp(&uploadedConstants, &constants, sizeof(ShaderConstants)) == 0) {
+            ++status.constantUploadsSkipped;
+            return;
         }
 
-        // Update constant buffer
         D3D11_MAPPED_SUBRESOURCE mappedResource;
         HRESULT hr = context->Map(constBuffer, 0, D3D11_MAP_WRITE_DISCARD, 0, &mappedResource);
         if (SUCCEEDED(hr)) {
-            memcpy(mappedResource.pData, &params, sizeof(ProcessingParams));
+            memcpy(mappedResource.pData, &constants, sizeof(ShaderConstants));
             context->Unmap(constBuffer, 0);
+            uploadedConstants = constants;
+            constantsUploaded = true;
+            ++status.constantUploads;
         }
+    }
 
-        // Update input texture
-        context->UpdateSubresource(inputTexture, 0, nullptr, inputFrame.data, inputFrame.step[0], 0);
+    void dispatchKernel(bool collectHistogram, bool useTileMask) {
+        if (collectHistogram) {
+            const UINT zeros[4] = { 0, 0, 0, 0 };
+            context->ClearUnorderedAccessViewUint(histogramUAV, zeros);
+        }
+
+        if (gammaLutSRV) {
+            updateGammaLut(appliedParams.gamma);
+        }
 
         // Set shader resources
+        RemapTable* remap = activeRemapTable();
+        ID3D11ShaderResourceView* srvs[5] = {
+            inputTextureSRV, useTileMask ? tileMaskSRV : nullptr, gammaLutSRV,
+            remap ? remap->coordsSRV : nullptr, remap ? remap->weightsSRV : nullptr
+        };
+        ID3D11UnorderedAccessView* uavs[2] = { outputTextureUAV, histogramUAV };
         context->CSSetShader(computeShader, nullptr, 0);
         context->CSSetConstantBuffers(0, 1, &constBuffer);
-        context->CSSetShaderResources(0, 1, &inputTextureSRV);
-        context->CSSetUnorderedAccessViews(0, 1, &outputTextureUAV, nullptr);
+        context->CSSetShaderResources(0, 5, srvs);
+        context->CSSetUnorderedAccessViews(0, 2, uavs, nullptr);
 
         // Dispatch compute shader
-        UINT x = (inputFrame.cols + 7) / 8;
-        UINT y = (inputFrame.rows + 7) / 8;
+        UINT x = (status.textureWidth + status.workgroupX - 1) / status.workgroupX;
+        UINT y = (status.textureHeight + status.workgroupY - 1) / status.workgroupY;
         context->Dispatch(x, y, 1);
 
-        // Copy result back to CPU
-        outputFrame.create(inputFrame.rows, inputFrame.cols, CV_8UC4);
-        D3D11_BOX box = { 0, 0, 0, static_cast<UINT>(inputFrame.cols), static_cast<UINT>(inputFrame.rows), 1 };
-        context->CopySubresourceRegion(outputTexture, 0, 0, 0, 0, inputTexture, 0, &box);
-        context->CopyResource(outputTexture, inputTexture);
+        ID3D11ShaderResourceView* nullSRVs[5] = { nullptr, nullptr, nullptr, nullptr, nullptr };
+        ID3D11UnorderedAccessView* nullUAVs[2] = { nullptr, nullptr };
+        context->CSSetShaderResources(0, 5, nullSRVs);
+        context->CSSetUnorderedAccessViews(0, 2, nullUAVs, nullptr);
+    }
 
-        D3D11_MAPPED_SUBRESOURCE mapped;
-        hr = context->Map(outputTexture, 0, D3D11_MAP_READ, 0, &mapped);
-        if (SUCCEEDED(hr)) {
-            const BYTE* src = static_cast<const BYTE*>(mapped.pData);
-            BYTE* dst = outputFrame.data;
-            for (int i = 0; i < outputFrame.rows; ++i) {
-                memcpy(dst, src, outputFrame.cols * 4);
-                src += mapped.RowPitch;
-                dst += outputFrame.step[0];
+    static FrameView viewOf(const cv::Mat& frame) {
+        FrameView view;
+        view.data = frame.data;
+        view.rows = frame.rows;
+        view.cols = frame.cols;
+        view.rowStride = static_cast<ptrdiff_t>(frame.step[0]);
+        return view;
+    }
+
+    // The view as a cv::Mat over the same memory, when its pixels are packed
+    // BGR and its rows run forwards: contiguous frames, crops, padded rows
+    static bool wrapView(const FrameView& view, cv::Mat& frame) {
+        if (view.pixelStride != 3 || view.channelStride != 1
+            || view.rowStride < static_cast<ptrdiff_t>(view.cols) * 3) {
+            return false;
+        }
+        frame = cv::Mat(view.rows, view.cols, CV_8UC3, const_cast<uint8_t*>(view.data),
+                        static_cast<size_t>(view.rowStride));
+        return true;
+    }
+
+    // Copies a view of any layout into a contiguous BGR frame
+    static void copyView(const FrameView& view, cv::Mat& frame) {
+        frame.create(view.rows, view.cols, CV_8UC3);
+        const ptrdiff_t c = view.channelStride;
+        for (int y = 0; y < view.rows; ++y) {
+            const uint8_t* src = view.data + y * view.rowStride;
+            uint8_t* dst = frame.ptr<uint8_t>(y);
+            if (view.pixelStride == 3 && c == 1) {
+                memcpy(dst, src, static_cast<size_t>(view.cols) * 3);
+                continue;
+            }
+            for (int x = 0; x < view.cols; ++x, src += view.pixelStride, dst += 3) {
+                dst[0] = src[0];
+                dst[1] = src[c];
+                dst[2] = src[2 * c];
             }
-            context->Unmap(outputTexture, 0);
         }
     }
 
-    void updateProcessingParams(const ProcessingParams& newParams) {
-        params = newParams;
+    // Converts a view to the BGRA upload frame row by row through its
+    // strides. Rows of packed BGR or RGB pixels (vertical flips, channel
+    // reversed views) use OpenCV's vectorized conversion; other layouts are
+    // gathered pixel by pixel.
+    void convertForUpload(const FrameView& view) {
+        cv::Mat packed;
+        if (wrapView(view, packed)) {
+            cv::cvtColor(packed, uploadFrame, cv::COLOR_BGR2BGRA);
+            return;
+        }
+        uploadFrame.create(view.rows, view.cols, CV_8UC4);
+        const ptrdiff_t c = view.channelStride;
+        for (int y = 0; y < view.rows; ++y) {
+            const uint8_t* src = view.data + y * view.rowStride;
+            uint8_t* dst = uploadFrame.ptr<uint8_t>(y);
+            if (view.pixelStride == 3 && (c == 1 || c == -1)) {
+                // Channel -1 runs backwards, so the row starts two bytes earlier in RGB order
+                cv::Mat row(1, view.cols, CV_8UC3, const_cast<uint8_t*>(c == 1 ? src : src - 2));
+                cv::Mat uploadRow(1, view.cols, CV_8UC4, dst);
+                cv::cvtColor(row, uploadRow, c == 1 ? cv::COLOR_BGR2BGRA : cv::COLOR_RGB2BGRA);
+                continue;
+            }
+            for (int x = 0; x < view.cols; ++x, src += view.pixelStride, dst += 4) {
+                dst[0] = src[0];
+                dst[1] = src[c];
+                dst[2] = src[2 * c];
+                dst[3] = 255;
+            }
+        }
     }
 
-    const RendererStatus& getStatus() const {
-        return status;
+    void processFullFrame(const FrameView& input, cv::Mat& outputFrame, const ShaderConstants& constants) {
+        uploadConstants(constants);
+
+        // Update input texture
+        {
+            TraceSpan span(trace, "dx11.upload", frameSequence);
+            convertForUpload(input);
+            context->UpdateSubresource(inputTexture, 0, nullptr, uploadFrame.data,
+                                       static_cast<UINT>(uploadFrame.step[0]), 0);
+        }
+
+        {
+            TraceSpan span(trace, "dx11.dispatch", frameSequence);
+            dispatchKernel(constants.histogramStride > 0, false);
+        }
+
+        // Copy result back to CPU; mapping waits for the GPU, so this span
+        // also covers the kernel's execution
+        TraceSpan span(trace, "dx11.readback", frameSequence);
+        context->CopyResource(stagingTexture, outputTexture);
+        readbackFrame.create(input.rows, input.cols, CV_8UC4);
+
+        D3D11_MAPPED_SUBRESOURCE mapped;
+        HRESULT hr = context->Map(stagingTexture, 0, D3D11_MAP_READ, 0, &mapped);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to map output staging texture");
+        }
+        const BYTE* src = static_cast<const BYTE*>(mapped.pData);
+        BYTE* dst = readbackFrame.data;
+        for (int i = 0; i < readbackFrame.rows; ++i) {
+            memcpy(dst, src, readbackFrame.cols * 4);
+            src += mapped.RowPitch;
+            dst += readbackFrame.step[0];
+        }
+        context->Unmap(stagingTexture, 0);
+        cv::cvtColor(readbackFrame, outputFrame, cv::COLOR_RGBA2BGR);
     }
 
-private:
-    ID3D11Device* device = nullptr;
-    ID3D11DeviceContext* context = nullptr;
-    ID3D11Buffer* constBuffer = nullptr;
-    ID3D11ComputeShader* computeShader = nullptr;
-    ID3D11ShaderResourceView* inputTextureSRV = nullptr;
-    ID3D11UnorderedAccessView* outputTextureUAV = nullptr;
-    ID3D11Texture2D* inputTexture = nullptr;
-    ID3D11Texture2D* outputTexture = nullptr;
+    // Reprocesses only the dirty tiles and patches them into the cached output
+    void processDirtyTiles(const cv::Mat& inputFrame, const ShaderConstants& constants) {
+        uploadConstants(constants);
 
-    RendererStatus status;
-    ProcessingParams params;
-};
+        D3D11_MAPPED_SUBRESOURCE mappedMask;
+        HRESULT hr = context->Map(tileMaskBuffer, 0, D3D11_MAP_WRITE_DISCARD, 0, &mappedMask);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to map tile mask buffer");
+        }
+        memcpy(mappedMask.pData, tileMask.data(), sizeof(uint32_t) * tileMask.size());
+        context->Unmap(tileMaskBuffer, 0);
 
-// Main class implementation
-DX11Renderer::DX11Renderer() : impl(std::make_unique<DX11RendererImpl>()) {}
-DX11Renderer::~DX11Renderer() = default;
+        uploadFrame.create(inputFrame.rows, inputFrame.cols, CV_8UC4);
+        {
+            TraceSpan span(trace, "dx11.upload", frameSequence);
+            forEachDirtyTile([&](const cv::Rect& tile) {
+                cv::Mat uploadTile = uploadFrame(tile);
+                cv::cvtColor(inputFrame(tile), uploadTile, cv::COLOR_BGR2BGRA);
+                D3D11_BOX box = tileBox(tile);
+                context->UpdateSubresource(inputTexture, 0, &box, uploadFrame.ptr(tile.y, tile.x),
+                                           static_cast<UINT>(uploadFrame.step[0]), 0);
+            });
+        }
 
-void DX11Renderer::processFrame(const cv::Mat& inputFrame, cv::Mat& outputFrame) {
-    impl->processFrame(inputFrame, outputFrame);
-}
+        {
+            TraceSpan span(trace, "dx11.dispatch", frameSequence);
+            dispatchKernel(false, true);
+        }
 
-void DX11Renderer::updateProcessingParams(const ProcessingParams& params) {
-    impl->updateProcessingParams(params);
-}
+        TraceSpan span(trace, "dx11.readback", frameSequence);
+        forEachDirtyTile([&](const cv::Rect& tile) {
+            D3D11_BOX box = tileBox(tile);
+            context->CopySubresourceRegion(stagingTexture, 0, tile.x, tile.y, 0, outputTexture, 0, &box);
+        });
 
-const RendererStatus& DX11Renderer::getStatus() const {
-    return impl->getStatus();
+        D3D11_MAPPED_SUBRESOURCE mapped;
+        hr = context->Map(stagingTexture, 0, D3D11_MAP_READ, 0, &mapped);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to map output staging texture");
+        }
+        forEachDirtyTile([&](const cv::Rect& tile) {
+            const BYTE* src = static_cast<const BYTE*>(mapped.pData)
+                + static_cast<size_t>(tile.y) * mapped.RowPitch + static_cast<size_t>(tile.x) * 4;
+            for (int i = 0; i < tile.height; ++i) {
+                memcpy(readbackFrame.ptr(tile.y + i, tile.x), src, tile.width * 4);
+                src += mapped.RowPitch;
+            }
+        });
+        context->Unmap(stagingTexture, 0);
+
+        forEachDirtyTile([&](const cv::Rect& tile) {
+            cv::Mat outputTile = cachedOutput(tile);
+            cv::cvtColor(readbackFrame(tile), outputTile, cv::COLOR_RGBA2BGR);
+        });
+    }
+
+    void processFrame(const cv::Mat& inputFrame, cv::Mat& outputFrame) {
+        if (inputFrame.empty() || inputFrame.type() != CV_8UC3) {
+            throw std::runtime_error("Input must be a non-empty 8-bit BGR image");
+        }
+        processFrame(viewOf(inputFrame), outputFrame);
+    }
+
+    void processFrame(const FrameView& input, cv::Mat& outputFrame) {
+        if (!status.isInitialized) {
+            throw std::runtime_error("Renderer not initialized");
+        }
+        if (!input.data || input.rows <= 0 || input.cols <= 0) {
+            throw std::runtime_error("Input must be a non-empty 8-bit BGR image");
+        }
+
+        ++frameSequence;
+        TraceSpan frameSpan(trace, "dx11.processFrame", frameSequence);
+        auto startTime = std::chrono::high_resolution_clock::now();
+
+        // The input as a cv::Mat, for the paths that need one, when that
+        // takes no copy; everything else reads the view through its strides
+        cv::Mat inputFrame;
+        bool packed = wrapView(input, inputFrame);
+        if (!packed || !inputFrame.isContinuous()) {
+            ++status.stridedFrames;
+        }
+
+        // Identity parameters: the kernel would reproduce the input
+        if (identity) {
+            copyView(input, outputFrame);
+            ++status.identityFrames;
+            auto endTime = std::chrono::high_resolution_clock::now();
+            status.lastProcessingTime =
+                std::chrono::duration<float, std::milli>(endTime - startTime).count();
+            return;
+        }
+
+        // Update textures if size changed
+        bool firstAtSize = input.cols != status.textureWidth || input.rows != status.textureHeight;
+        if (firstAtSize) {
+            bindTextures(input.cols, input.rows);
+        }
+        bool firstFrame = firstFrameDue || firstAtSize;
+        firstFrameDue = false;
+        if (geometry.mode == GeometryMode::Undistort) {
+            prepareRemapTable();
+        }
+
+        ShaderConstants constants = buildConstants();
+        bool fullFrame = true;
+
+        bool useTemporal = temporal.enabled;
+        if (useTemporal && !tileMaskBuffer) {
+            // Without room for the change cache whole frames are processed instead
+            useTemporal = reserveMemory(temporalBytes(), 0);
+            if (useTemporal) {
+                createTileResources();
+            }
+        }
+
+        if (useTemporal && !packed) {
+            // The change cache compares and keeps whole cv::Mats
+            copyView(input, stridedCopy);
+            inputFrame = stridedCopy;
+            ++status.inputCopies;
+        }
+
+        if (useTemporal) {
+            bool cacheUsable = cacheValid && sameParams(appliedParams, cachedParams)
+                && lumaContrast.gain == cachedLumaContrast.gain
+                && lumaContrast.pivot == cachedLumaContrast.pivot;
+            int dirtyTiles;
+            {
+                TraceSpan span(trace, "dx11.tileDiff", frameSequence);
+                dirtyTiles = cacheUsable ? markChangedTiles(inputFrame) : markAllTiles();
+            }
+            int totalTiles = static_cast<int>(tileMask.size());
+            status.dirtyTiles = dirtyTiles;
+            status.totalTiles = totalTiles;
+            status.dirtyTileRatio = static_cast<float>(dirtyTiles) / totalTiles;
+
+            if (dirtyTiles == 0) {
+                // Static frame: reuse the cached output untouched
+                cachedOutput.copyTo(outputFrame);
+                ++status.skippedFrames;
+                auto endTime = std::chrono::high_resolution_clock::now();
+                status.lastProcessingTime =
+                    std::chrono::duration<float, std::milli>(endTime - startTime).count();
+                return;
+            }
+
+            // Without a usable cache there is no reference or output to patch.
+            // A remapped output tile reads from anywhere in the input, so
+            // geometric correction only benefits from fully static frames.
+            fullFrame = !cacheUsable
+                || status.dirtyTileRatio >= temporal.fullFrameRatio
+                || geometry.mode != GeometryMode::None;
+            if (!fullFrame) {
+                // The histogram is only meaningful over a whole frame
+                constants.histogramStride = 0;
+                constants.tileSize = static_cast<UINT>(tileSize);
+                constants.tilesX = static_cast<UINT>(tilesX);
+            }
+        }
+
+        cachedParams = appliedParams;
+        cachedLumaContrast = lumaContrast;
+        if (fullFrame) {
+            processFullFrame(input, outputFrame, constants);
+            if (useTemporal) {
+                inputFrame.copyTo(referenceFrame);
+                outputFrame.copyTo(cachedOutput);
+                cacheValid = true;
+            }
+        } else {
+            forEachDirtyTile([&](const cv::Rect& tile) {
+                inputFrame(tile).copyTo(referenceFrame(tile));
+            });
+            processDirtyTiles(inputFrame, constants);
+            cachedOutput.copyTo(outputFrame);
+        }
+
+        if (constants.histogramStride > 0) {
+            TraceSpan span(trace, "dx11.histogram", frameSequence);
+            readHistogram();
+            updateAutoExposure();
+        }
+        status.autoExposureActive = autoExposure.enabled;
+        syncHostMemory();
+
+        auto endTime = std::chrono::high_resolution_clock::now();
+        status.lastProcessingTime =
+            std::chrono::duration<float, std::milli>(endTime - startTime).count();
+        if (firstFrame) {
+            status.timeToFirstFrame = status.lastProcessingTime;
+        }
+    }
+
+    void createTileResources() {
+        releaseTileResources();
+
+        tileSize = std::max(8, (temporal.tileSize + 7) / 8 * 8);
+        tilesX = (status.textureWidth + tileSize - 1) / tileSize;
+        tilesY = (status.textureHeight + tileSize - 1) / tileSize;
+        tileMask.assign(static_cast<size_t>(tilesX) * tilesY, 1);
+
+        D3D11_BUFFER_DESC bufferDesc = {};
+        bufferDesc.ByteWidth = static_cast<UINT>(sizeof(uint32_t) * tileMask.size());
+        bufferDesc.Usage = D3D11_USAGE_DYNAMIC;
+        bufferDesc.BindFlags = D3D11_BIND_SHADER_RESOURCE;
+        bufferDesc.CPUAccessFlags = D3D11_CPU_ACCESS_WRITE;
+        bufferDesc.MiscFlags = D3D11_RESOURCE_MISC_BUFFER_STRUCTURED;
+        bufferDesc.StructureByteStride = sizeof(uint32_t);
+
+        HRESULT hr = device->CreateBuffer(&bufferDesc, nullptr, &tileMaskBuffer);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create tile mask buffer");
+        }
+        trackAllocation(tileMaskBuffer, MemoryCategory::Buffers, bufferDesc.ByteWidth);
+
+        D3D11_SHADER_RESOURCE_VIEW_DESC srvDesc = {};
+        srvDesc.Format = DXGI_FORMAT_UNKNOWN;
+        srvDesc.ViewDimension = D3D11_SRV_DIMENSION_BUFFER;
+        srvDesc.Buffer.NumElements = static_cast<UINT>(tileMask.size());
+        hr = device->CreateShaderResourceView(tileMaskBuffer, &srvDesc, &tileMaskSRV);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create tile mask view");
+        }
+    }
+
+    static unsigned long long textureBytes(int width, int height) {
+        return 4ull * static_cast<unsigned long long>(width) * static_cast<unsigned long long>(height);
+    }
+
+    static unsigned long long matBytes(const cv::Mat& mat) {
+        return mat.empty() ? 0 : static_cast<unsigned long long>(mat.total() * mat.elemSize());
+    }
+
+    // Reference and cached output frames plus the tile mask
+    unsigned long long temporalBytes() const {
+        unsigned long long pixels = static_cast<unsigned long long>(status.textureWidth) * status.textureHeight;
+        int size = std::max(8, (temporal.tileSize + 7) / 8 * 8);
+        unsigned long long tiles = static_cast<unsigned long long>((status.textureWidth + size - 1) / size)
+            * ((status.textureHeight + size - 1) / size);
+        return 2 * 3 * pixels + sizeof(uint32_t) * tiles;
+    }
+
+    unsigned long long totalMemory() const {
+        return status.gpuMemoryUsage + status.hostMemoryUsage;
+    }
+
+    void updateMemoryTotals() {
+        unsigned long long gpu = 0;
+        for (int i = 0; i < kMemoryCategoryCount; ++i) {
+            if (i != static_cast<int>(MemoryCategory::HostFrames)) {
+                gpu += status.memory[i].residentBytes;
+            }
+        }
+        status.gpuMemoryUsage = gpu;
+        status.hostMemoryUsage = status.memory[static_cast<int>(MemoryCategory::HostFrames)].residentBytes;
+        status.peakMemoryUsage = std::max(status.peakMemoryUsage, totalMemory());
+    }
+
+    void addMemory(MemoryCategory category, unsigned long long bytes) {
+        MemoryCategoryStats& stats = status.memory[static_cast<int>(category)];
+        stats.residentBytes += bytes;
+        stats.peakBytes = std::max(stats.peakBytes, stats.residentBytes);
+        ++stats.allocations;
+    }
+
+    void removeMemory(MemoryCategory category, unsigned long long bytes) {
+        MemoryCategoryStats& stats = status.memory[static_cast<int>(category)];
+        stats.residentBytes -= std::min(stats.residentBytes, bytes);
+        ++stats.releases;
+    }
+
+    void trackAllocation(ID3D11Resource* resource, MemoryCategory category, unsigned long long bytes) {
+        trackedResources[resource] = { category, bytes };
+        addMemory(category, bytes);
+        updateMemoryTotals();
+    }
+
+    // Releases a GPU resource and removes it from the accounting
+    template <typename T>
+    void releaseTracked(T*& resource) {
+        if (!resource) {
+            return;
+        }
+        auto it = trackedResources.find(resource);
+        if (it != trackedResources.end()) {
+            removeMemory(it->second.first, it->second.second);
+            trackedResources.erase(it);
+            updateMemoryTotals();
+        }
+        resource->Release();
+        resource = nullptr;
+    }
+
+    // Host frames are (re)allocated by OpenCV, so their accounting follows
+    // the Mats' sizes after each frame instead of every allocation site
+    void syncHostMemory() {
+        const cv::Mat* frames[] = { &uploadFrame, &readbackFrame, &referenceFrame, &cachedOutput, &stridedCopy };
+        for (size_t i = 0; i < hostFrameBytes.size(); ++i) {
+            unsigned long long bytes = matBytes(*frames[i]);
+            if (bytes == hostFrameBytes[i]) {
+                continue;
+            }
+            if (hostFrameBytes[i]) {
+                removeMemory(MemoryCategory::HostFrames, hostFrameBytes[i]);
+            }
+            if (bytes) {
+                addMemory(MemoryCategory::HostFrames, bytes);
+            }
+            hostFrameBytes[i] = bytes;
+        }
+        updateMemoryTotals();
+    }
+
+    bool hasTemporalCache() const {
+        return tileMaskBuffer || !referenceFrame.empty() || !cachedOutput.empty();
+    }
+
+    void evictTemporalCache() {
+        releaseTileResources();
+        referenceFrame.release();
+        cachedOutput.release();
+        stridedCopy.release();
+        syncHostMemory();
+        ++status.budgetEvictions;
+    }
+
+    // True when `needed` more bytes fit the budget once `freed` bytes have
+    // been released; drops the temporal cache and idle remap tables before
+    // giving up
+    bool reserveMemory(unsigned long long needed, unsigned long long freed) {
+        if (status.memoryBudget == 0) {
+            return true;
+        }
+        auto fits = [&] {
+            return totalMemory() - std::min(freed, totalMemory()) + needed <= status.memoryBudget;
+        };
+        if (fits()) {
+            return true;
+        }
+        if (hasTemporalCache()) {
+            evictTemporalCache();
+            if (fits()) {
+                return true;
+            }
+        }
+        // Then remap tables cached for other frame sizes or calibrations
+        while (evictRemapTable()) {
+            if (fits()) {
+                return true;
+            }
+        }
+        // Then textures parked for other frame sizes
+        while (evictTextureSet()) {
+            if (fits()) {
+                return true;
+            }
+        }
+        ++status.budgetRefusals;
+        return false;
+    }
+
+    void setMemoryBudget(unsigned long long bytes) {
+        status.memoryBudget = bytes;
+        if (bytes && totalMemory() > bytes && hasTemporalCache()) {
+            evictTemporalCache();
+        }
+        while (bytes && totalMemory() > bytes && evictTextureSet()) {
+            // Idle textures for other frame sizes go first
+        }
+    }
+
+    unsigned long long getMemoryBudget() const {
+        return status.memoryBudget;
+    }
+
+    void releaseTileResources() {
+        if (tileMaskSRV) { tileMaskSRV->Release(); tileMaskSRV = nullptr; }
+        releaseTracked(tileMaskBuffer);
+        cacheValid = false;
+    }
+
+    cv::Rect tileRect(int tx, int ty) const {
+        int x = tx * tileSize;
+        int y = ty * tileSize;
+        return cv::Rect(x, y,
+                        std::min(tileSize, status.textureWidth - x),
+                        std::min(tileSize, status.textureHeight - y));
+    }
+
+    static D3D11_BOX tileBox(const cv::Rect& tile) {
+        D3D11_BOX box = {
+            static_cast<UINT>(tile.x), static_cast<UINT>(tile.y), 0,
+            static_cast<UINT>(tile.x + tile.width), static_cast<UINT>(tile.y + tile.height), 1
+        };
+        return box;
+    }
+
+    template <typename Fn>
+    void forEachDirtyTile(Fn&& fn) const {
+        for (int ty = 0; ty < tilesY; ++ty) {
+            for (int tx = 0; tx < tilesX; ++tx) {
+                if (tileMask[static_cast<size_t>(ty) * tilesX + tx]) {
+                    fn(tileRect(tx, ty));
+                }
+            }
+        }
+    }
+
+    int markAllTiles() {
+        std::fill(tileMask.begin(), tileMask.end(), 1u);
+        return static_cast<int>(tileMask.size());
+    }
+
+    // Compares a strided subsample of each tile against the frame the cached
+    // output was produced from; the reference only advances for dirty tiles so
+    // slow drift still accumulates until it crosses the threshold
+    int markChangedTiles(const cv::Mat& inputFrame) {
+        const int stride = std::max(1, temporal.sampleStride);
+        const int threshold = temporal.pixelThreshold;
+        int dirty = 0;
+        for (int ty = 0; ty < tilesY; ++ty) {
+            for (int tx = 0; tx < tilesX; ++tx) {
+                cv::Rect tile = tileRect(tx, ty);
+                bool changed = false;
+                for (int y = tile.y; y < tile.y + tile.height && !changed; y += stride) {
+                    const uint8_t* cur = inputFrame.ptr<uint8_t>(y);
+                    const uint8_t* ref = referenceFrame.ptr<uint8_t>(y);
+                    for (int x = tile.x; x < tile.x + tile.width; x += stride) {
+                        int i = x * 3;
+                        if (std::abs(cur[i] - ref[i]) > threshold ||
+                            std::abs(cur[i + 1] - ref[i + 1]) > threshold ||
+                            std::abs(cur[i + 2] - ref[i + 2]) > threshold) {
+                            changed = true;
+                            break;
+                        }
+                    }
+                }
+                tileMask[static_cast<size_t>(ty) * tilesX + tx] = changed ? 1u : 0u;
+                dirty += changed ? 1 : 0;
+            }
+        }
+        return dirty;
+    }
+
+    static bool sameGeometry(const GeometrySettings& a, const GeometrySettings& b) {
+        return a.mode == b.mode && a.cameraMatrix == b.cameraMatrix && a.distortion == b.distortion
+            && a.newCameraMatrix == b.newCameraMatrix && a.homography == b.homography;
+    }
+
+    // Fixed-point undistortion maps in the format cv::undistort remaps
+    // through, so the kernel samples exactly where OpenCV would
+    void buildRemapMaps(int width, int height, cv::Mat& coords, cv::Mat& weights) const {
+        cv::Mat cameraMatrix(3, 3, CV_64F, const_cast<double*>(geometry.cameraMatrix.data()));
+        cv::Mat distortion(1, 8, CV_64F, const_cast<double*>(geometry.distortion.data()));
+        bool hasNewMatrix = std::any_of(geometry.newCameraMatrix.begin(), geometry.newCameraMatrix.end(),
+                                        [](double value) { return value != 0.0; });
+        cv::Mat newCameraMatrix = hasNewMatrix
+            ? cv::Mat(3, 3, CV_64F, const_cast<double*>(geometry.newCameraMatrix.data()))
+            : cameraMatrix;
+        cv::initUndistortRectifyMap(cameraMatrix, distortion, cv::Mat(), newCameraMatrix,
+                                    cv::Size(width, height), CV_16SC2, coords, weights);
+    }
+
+    void createRemapTexture(const cv::Mat& data, DXGI_FORMAT format, ID3D11Texture2D*& texture,
+                            ID3D11ShaderResourceView*& view) {
+        D3D11_TEXTURE2D_DESC texDesc = {};
+        texDesc.Width = data.cols;
+        texDesc.Height = data.rows;
+        texDesc.MipLevels = 1;
+        texDesc.ArraySize = 1;
+        texDesc.Format = format;
+        texDesc.SampleDesc.Count = 1;
+        texDesc.Usage = D3D11_USAGE_IMMUTABLE;
+        texDesc.BindFlags = D3D11_BIND_SHADER_RESOURCE;
+
+        D3D11_SUBRESOURCE_DATA initData = {};
+        initData.pSysMem = data.data;
+        initData.SysMemPitch = static_cast<UINT>(data.step[0]);
+        HRESULT hr = device->CreateTexture2D(&texDesc, &initData, &texture);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create remap table texture");
+        }
+        trackAllocation(texture, MemoryCategory::Textures, matBytes(data));
+
+        hr = device->CreateShaderResourceView(texture, nullptr, &view);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to create remap table view");
+        }
+    }
+
+    void releaseRemapTable(RemapTable& table) {
+        if (table.coordsSRV) { table.coordsSRV->Release(); table.coordsSRV = nullptr; }
+        if (table.weightsSRV) { table.weightsSRV->Release(); table.weightsSRV = nullptr; }
+        releaseTracked(table.coords);
+        releaseTracked(table.weights);
+    }
+
+    void releaseRemapTables() {
+        for (RemapTable& table : remapTables) {
+            releaseRemapTable(table);
+        }
+        remapTables.clear();
+        activeRemap = -1;
+        status.remapTablesCached = 0;
+    }
+
+    // Drops the least recently used table other than the one in use; false
+    // when there is none
+    bool evictRemapTable() {
+        int oldest = -1;
+        for (int i = 0; i < static_cast<int>(remapTables.size()); ++i) {
+            if (i != activeRemap && (oldest < 0 || remapTables[i].lastUsed < remapTables[oldest].lastUsed)) {
+                oldest = i;
+            }
+        }
+        if (oldest < 0) {
+            return false;
+        }
+        releaseRemapTable(remapTables[oldest]);
+        remapTables.erase(remapTables.begin() + oldest);
+        if (activeRemap > oldest) {
+            --activeRemap;
+        }
+        status.remapTablesCached = static_cast<int>(remapTables.size());
+        return true;
+    }
+
+    RemapTable* activeRemapTable() {
+        return activeRemap >= 0 ? &remapTables[activeRemap] : nullptr;
+    }
+
+    // Selects the cached remap table for the current frame size and geometry,
+    // building it on first use; evicts the least recently used tables to stay
+    // within the cache size and the memory budget
+    void prepareRemapTable() {
+        if (activeRemap >= 0) {
+            return;
+        }
+        const int width = status.textureWidth;
+        const int height = status.textureHeight;
+        for (size_t i = 0; i < remapTables.size(); ++i) {
+            RemapTable& table = remapTables[i];
+            if (table.width == width && table.height == height && sameGeometry(table.settings, geometry)) {
+                table.lastUsed = ++remapClock;
+                activeRemap = static_cast<int>(i);
+                ++status.remapTableCacheHits;
+                return;
+            }
+        }
+
+        TraceSpan span(trace, "dx11.remapTable", frameSequence);
+        // int16 x/y plus a uint16 subpixel index per pixel
+        unsigned long long bytes = 6ull * static_cast<unsigned long long>(width) * height;
+        while (remapTables.size() >= kRemapTableCacheSize) {
+            evictRemapTable();
+        }
+        if (!reserveMemory(bytes, 0)) {
+            throw MemoryBudgetExceeded("Memory budget of " + std::to_string(status.memoryBudget)
+                                       + " bytes cannot hold a " + std::to_string(width) + "x"
+                                       + std::to_string(height) + " remap table");
+        }
+
+        cv::Mat coords, weights;
+        buildRemapMaps(width, height, coords, weights);
+        RemapTable table;
+        table.width = width;
+        table.height = height;
+        table.settings = geometry;
+        table.lastUsed = ++remapClock;
+        try {
+            createRemapTexture(coords, DXGI_FORMAT_R16G16_SINT, table.coords, table.coordsSRV);
+            createRemapTexture(weights, DXGI_FORMAT_R16_UINT, table.weights, table.weightsSRV);
+        }
+        catch (...) {
+            releaseRemapTable(table);
+            throw;
+        }
+        remapTables.push_back(table);
+        activeRemap = static_cast<int>(remapTables.size()) - 1;
+        ++status.remapTableBuilds;
+        status.remapTablesCached = static_cast<int>(remapTables.size());
+    }
+
+    static bool sameParams(const ProcessingParams& a, const ProcessingParams& b) {
+        return a.brightness == b.brightness && a.contrast == b.contrast &&
+               a.saturation == b.saturation && a.gamma == b.gamma && a.hue == b.hue;
+    }
+
+    void readHistogram() {
+        auto startTime = std::chrono::high_resolution_clock::now();
+
+        context->CopyResource(histogramStaging, histogramBuffer);
+        D3D11_MAPPED_SUBRESOURCE mapped;
+        HRESULT hr = context->Map(histogramStaging, 0, D3D11_MAP_READ, 0, &mapped);
+        if (FAILED(hr)) {
+            throw std::runtime_error("Failed to map histogram staging buffer");
+        }
+        memcpy(histogram.data(), mapped.pData, sizeof(uint32_t) * kHistogramBins);
+        context->Unmap(histogramStaging, 0);
+
+        auto endTime = std::chrono::high_resolution_clock::now();
+        status.lastHistogramTime =
+            std::chrono::duration<float, std::milli>(endTime - startTime).count();
+    }
+
+    float histogramPercentile(uint64_t total, float fraction) const {
+        uint64_t threshold = static_cast<uint64_t>(fraction * static_cast<float>(total));
+        uint64_t cumulative = 0;
+        for (int i = 0; i < kHistogramBins; ++i) {
+            cumulative += histogram[i];
+            if (cumulative > threshold) {
+                return (i + 0.5f) / kHistogramBins;
+            }
+        }
+        return 1.0f;
+    }
+
+    void updateAutoExposure() {
+        uint64_t total = 0;
+        double weighted = 0.0;
+        for (int i = 0; i < kHistogramBins; ++i) {
+            total += histogram[i];
+            weighted += static_cast<double>(histogram[i]) * (i + 0.5) / kHistogramBins;
+        }
+        status.histogramSamples = static_cast<unsigned int>(total);
+        if (total == 0) {
+            return;
+        }
+
+        float mean = static_cast<float>(weighted / static_cast<double>(total));
+        float low = histogramPercentile(total, 0.01f);
+        float median = histogramPercentile(total, 0.5f);
+        float high = histogramPercentile(total, 0.99f);
+        status.meanLuminance = mean;
+
+        const AutoExposureSettings& s = autoExposure;
+        float brightnessTarget = std::clamp(
+            s.targetLuminance / std::max(mean, 1e-3f), s.minBrightness, s.maxBrightness);
+        // Tonal contrast is a luma gain around the mean, which brightness
+        // then scales, so the spread reaching gamma is brightness * gain * spread
+        float contrastTarget = std::clamp(
+            s.targetSpread / std::max(brightnessTarget * (high - low), 1e-3f), s.minContrast, s.maxContrast);
+
+        // Gamma maps the (contrast and brightness adjusted) median onto the target luminance
+        float adjustedMedian = std::clamp(
+            (mean + contrastTarget * (median - mean)) * brightnessTarget, 1e-3f, 0.999f);
+        float gammaTarget = std::clamp(
+            std::log(adjustedMedian) / std::log(std::clamp(s.targetLuminance, 1e-3f, 0.999f)),
+            s.minGamma, s.maxGamma);
+
+        // Temporal smoothing towards the targets
+        float k = std::clamp(s.smoothing, 0.0f, 1.0f);
+        appliedParams.brightness += k * (brightnessTarget - appliedParams.brightness);
+        appliedParams.gamma += k * (gammaTarget - appliedParams.gamma);
+        lumaContrast.gain += k * (contrastTarget - lumaContrast.gain);
+        lumaContrast.pivot += k * (mean - lumaContrast.pivot);
+        status.exposureContrast = lumaContrast.gain;
+    }
+
+    bool isIdentity() const {
+        return identity;
+    }
+
+    // Called whenever the applied parameters, auto exposure or geometry
+    // change, so frames only read the cached flag
+    void refreshIdentity() {
+        identity = computeIdentity();
+    }
+
+    // True when the applied parameters leave every 8-bit pixel unchanged and
+    // nothing else (histogram metering) needs the kernel to run
+    bool computeIdentity() const {
+        if (autoExposure.enabled || geometry.mode != GeometryMode::None) {
+            return false;
+        }
+        const ProcessingParams& p = appliedParams;
+        if (p.gamma <= 0.0f) {
+            return false;
+        }
+        // Worst case per-pixel deviation for inputs in [0, 1]: a channel
+        // moves by at most the larger of the positive and the negative parts
+        // of its matrix row minus the identity row, and x^(1/g) - x peaks at
+        // |1/g - 1| / e
+        auto matrix = colorMatrix(p);
+        double matrixDeviation = 0.0;
+        for (int i = 0; i < 3; ++i) {
+            double up = 0.0, down = 0.0;
+            for (int j = 0; j < 3; ++j) {
+                double d = matrix[i][j] - (i == j ? 1.0 : 0.0);
+                (d > 0.0 ? up : down) += std::abs(d);
+            }
+            matrixDeviation = std::max(matrixDeviation, std::max(up, down));
+        }
+        double deviation = matrixDeviation + std::abs(1.0 / p.gamma - 1.0) / 2.718281828;
+        return deviation < kIdentityTolerance;
+    }
+
+    void setZeroCopyPassthrough(bool enabled) {
+        zeroCopyPassthrough = enabled;
+    }
+
+    bool getZeroCopyPassthrough() const {
+        return zeroCopyPassthrough;
+    }
+
+    // For callers that can alias the input: with zero-copy passthrough and
+    // identity parameters the input is the result, so this returns true and
+    // leaves outputFrame untouched
+    bool processFrameOrPassthrough(const FrameView& input, cv::Mat& outputFrame) {
+        if (status.isInitialized && zeroCopyPassthrough && identity) {
+            ++status.passthroughFrames;
+            return true;
+        }
+        processFrame(input, outputFrame);
+        return false;
+    }
+
+    void updateProcessingParams(const ProcessingParams& newParams) {
+        if (sameParams(newParams, params)) {
+            ++status.paramUpdatesSkipped;
+            return;
+        }
+        ++status.paramUpdates;
+        params = newParams;
+        if (autoExposure.enabled) {
+            // Brightness and gamma are owned by the controller
+            appliedParams.contrast = params.contrast;
+            appliedParams.saturation = params.saturation;
+            appliedParams.hue = params.hue;
+        } else {
+            appliedParams = params;
+        }
+        refreshIdentity();
+    }
+
+    void setAutoExposure(const AutoExposureSettings& settings) {
+        bool wasEnabled = autoExposure.enabled;
+        autoExposure = settings;
+        if (!autoExposure.enabled) {
+            appliedParams = params;
+            lumaContrast = LumaContrast();
+            status.autoExposureActive = false;
+            status.exposureContrast = 1.0f;
+        } else if (!wasEnabled) {
+            // Start converging from the manual settings
+            appliedParams = params;
+            lumaContrast = LumaContrast();
+        }
+        refreshIdentity();
+    }
+
+    const AutoExposureSettings& getAutoExposure() const {
+        return autoExposure;
+    }
+
+    void setTemporalMode(const TemporalSettings& settings) {
+        if (!(settings.fullFrameRatio >= 0.0f && settings.fullFrameRatio <= 1.0f)) {
+            throw std::invalid_argument("fullFrameRatio must be between 0 and 1");
+        }
+        temporal = settings;
+        releaseTileResources();
+        if (!temporal.enabled) {
+            cachedOutput.release();
+            referenceFrame.release();
+            stridedCopy.release();
+            status.dirtyTiles = 0;
+            status.totalTiles = 0;
+            status.dirtyTileRatio = 1.0f;
+            syncHostMemory();
+        }
+    }
+
+    const TemporalSettings& getTemporalMode() const {
+        return temporal;
+    }
+
+    void setGeometry(const GeometrySettings& settings) {
+        if (settings.mode == GeometryMode::Homography) {
+            // The kernel maps each output pixel back into the input
+            cv::Matx33d homography(settings.homography.data());
+            if (std::abs(cv::determinant(homography)) < 1e-12) {
+                throw std::invalid_argument("Homography is singular");
+            }
+            cv::Matx33d inverse = homography.inv();
+            for (int row = 0; row < 3; ++row) {
+                for (int col = 0; col < 3; ++col) {
+                    inverseHomography[row * 4 + col] = static_cast<float>(inverse(row, col));
+                }
+            }
+        }
+        if (!sameGeometry(settings, geometry)) {
+            geometry = settings;
+            activeRemap = -1;
+            // The cached temporal output was produced with the old geometry
+            cacheValid = false;
+        }
+        status.geometryActive = geometry.mode != GeometryMode::None;
+        refreshIdentity();
+    }
+
+    const GeometrySettings& getGeometry() const {
+        return geometry;
+    }
+
+    const std::vector<uint32_t>& getLuminanceHistogram() const {
+        return histogram;
+    }
+
+    const ProcessingParams& getAppliedParams() const {
+        return appliedParams;
+    }
+
+    const RendererStatus& getStatus() {
+        status.tracingEnabled = trace.enabled;
+        status.traceEventsRecorded = trace.recorded;
+        status.traceEventsDropped = trace.dropped;
+        return status;
+    }
+
+    void setTracing(bool enabled, size_t capacity) {
+        trace.configure(enabled, capacity);
+    }
+
+    bool isTracing() const {
+        return trace.enabled;
+    }
+
+    std::vector<TraceEvent> drainTraceEvents() {
+        return trace.drain();
+    }
+
+    // Serializes every call made through DX11Renderer
+    mutable std::mutex mutex;
+
+private:
+    ID3D11Device* device = nullptr;
+    ID3D11DeviceContext* context = nullptr;
+    ID3D11Buffer* constBuffer = nullptr;
+    ID3D11ComputeShader* computeShader = nullptr;      // Variant for the current workgroup, owned by shaders
+    std::map<std::pair<int, int>, ID3D11ComputeShader*> shaders;
+    ID3D11ShaderResourceView* inputTextureSRV = nullptr;
+    ID3D11UnorderedAccessView* outputTextureUAV = nullptr;
+    ID3D11Texture2D* inputTexture = nullptr;
+    ID3D11Texture2D* outputTexture = nullptr;
+    ID3D11Texture2D* stagingTexture = nullptr;
+    ID3D11Buffer* histogramBuffer = nullptr;
+    ID3D11UnorderedAccessView* histogramUAV = nullptr;
+    ID3D11Buffer* histogramStaging = nullptr;
+    ID3D11Buffer* tileMaskBuffer = nullptr;
+    ID3D11ShaderResourceView* tileMaskSRV = nullptr;
+    ID3D11Buffer* gammaLutBuffer = nullptr;
+    ID3D11ShaderResourceView* gammaLutSRV = nullptr;
+    float gammaLutValue = 0.0f;
+    bool gammaLutValid = false;
+
+    cv::Mat uploadFrame;
+    cv::Mat readbackFrame;
+
+    // Temporal change detection state
+    TemporalSettings temporal;
+    int tileSize = 0;
+    int tilesX = 0;
+    int tilesY = 0;
+    std::vector<uint32_t> tileMask;
+    cv::Mat referenceFrame;
+    cv::Mat cachedOutput;
+    cv::Mat stridedCopy;             // Contiguous copy of a strided input, for the change cache
+    ProcessingParams cachedParams;
+    LumaContrast cachedLumaContrast;
+    bool cacheValid = false;
+
+    // Texture sets parked for other frame sizes
+    std::vector<TextureSet> textureSets;
+    size_t textureSetCapacity = 0;      // Raised by warmup()
+    bool firstFrameDue = true;          // Next frame sets timeToFirstFrame
+    uint64_t textureClock = 0;
+
+    // Geometric correction
+    GeometrySettings geometry;
+    std::array<float, 12> inverseHomography{};
+    std::vector<RemapTable> remapTables;
+    int activeRemap = -1;            // Index of the table used for the current frame size
+    uint64_t remapClock = 0;
+
+    // Kernel workgroups
+    WorkgroupSize workgroup;
+    std::vector<WorkgroupProfileEntry> workgroupProfile;
+
+    // Memory accounting
+    std::unordered_map<const void*, std::pair<MemoryCategory, unsigned long long>> trackedResources;
+    std::array<unsigned long long, 5> hostFrameBytes{};
+
+    // Span tracing
+    TraceRing trace;
+    uint64_t frameSequence = 0;
+
+    // Change tracking
+    ShaderConstants uploadedConstants = {};
+    bool constantsUploaded = false;
+    bool zeroCopyPassthrough = false;
+    bool identity = true;               // computeIdentity() of the current state
+
+    RendererStatus status;
+    ProcessingParams params;
+    ProcessingParams appliedParams;
+    AutoExposureSettings autoExposure;
+    LumaContrast lumaContrast;
+    std::vector<uint32_t> histogram;
+};
+
+// Main class implementation
+DX11Renderer::DX11Renderer(Precision precision) : impl(std::make_unique<DX11RendererImpl>(precision)) {}
+DX11Renderer::~DX11Renderer() = default;
+
+void DX11Renderer::processFrame(const cv::Mat& inputFrame, cv::Mat& outputFrame) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->processFrame(inputFrame, outputFrame);
+}
+
+void DX11Renderer::processFrame(const FrameView& input, cv::Mat& outputFrame) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->processFrame(input, outputFrame);
+}
+
+void DX11Renderer::updateProcessingParams(const ProcessingParams& params) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->updateProcessingParams(params);
+}
+
+RendererStatus DX11Renderer::getStatus() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getStatus();
+}
+
+void DX11Renderer::setAutoExposure(const AutoExposureSettings& settings) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->setAutoExposure(settings);
+}
+
+AutoExposureSettings DX11Renderer::getAutoExposure() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getAutoExposure();
+}
+
+std::vector<uint32_t> DX11Renderer::getLuminanceHistogram() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getLuminanceHistogram();
+}
+
+void DX11Renderer::setTemporalMode(const TemporalSettings& settings) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->setTemporalMode(settings);
+}
+
+TemporalSettings DX11Renderer::getTemporalMode() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getTemporalMode();
+}
+
+void DX11Renderer::setGeometry(const GeometrySettings& settings) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->setGeometry(settings);
+}
+
+GeometrySettings DX11Renderer::getGeometry() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getGeometry();
+}
+
+void DX11Renderer::setWorkgroupSize(const WorkgroupSize& size) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->setWorkgroupSize(size);
+}
+
+WorkgroupSize DX11Renderer::getWorkgroupSize() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getWorkgroupSize();
+}
+
+void DX11Renderer::setWorkgroupProfile(const std::vector<WorkgroupProfileEntry>& entries) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->setWorkgroupProfile(entries);
+}
+
+std::vector<WorkgroupProfileEntry> DX11Renderer::getWorkgroupProfile() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getWorkgroupProfile();
+}
+
+void DX11Renderer::warmup(const std::vector<std::pair<int, int>>& resolutions) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->warmup(resolutions);
+}
+
+void DX11Renderer::setZeroCopyPassthrough(bool enabled) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->setZeroCopyPassthrough(enabled);
+}
+
+bool DX11Renderer::getZeroCopyPassthrough() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getZeroCopyPassthrough();
+}
+
+bool DX11Renderer::isIdentity() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->isIdentity();
+}
+
+bool DX11Renderer::processFrameOrPassthrough(const FrameView& input, cv::Mat& outputFrame) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->processFrameOrPassthrough(input, outputFrame);
+}
+
+void DX11Renderer::setMemoryBudget(unsigned long long bytes) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->setMemoryBudget(bytes);
+}
+
+unsigned long long DX11Renderer::getMemoryBudget() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getMemoryBudget();
+}
+
+void DX11Renderer::setTracing(bool enabled, size_t capacity) {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    impl->setTracing(enabled, capacity);
+}
+
+bool DX11Renderer::isTracing() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->isTracing();
+}
+
+std::vector<TraceEvent> DX11Renderer::drainTraceEvents() {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->drainTraceEvents();
+}
+
+ProcessingParams DX11Renderer::getAppliedParams() const {
+    std::lock_guard<std::mutex> lock(impl->mutex);
+    return impl->getAppliedParams();
 }
 
 } // namespace dx11_renderer
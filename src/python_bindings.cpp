@@ -1,5 +1,6 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/numpy.h>
+#include <pybind11/stl.h>
 #include "dx11_renderer.h"
 #include <vector>
 
@@ -9,12 +10,57 @@ using namespace dx11_renderer;
 PYBIND11_MODULE(_core, m) {
     m.doc() = "DirectX 11 accelerated image processing module";
 
+    // Subclass of MemoryError so callers can treat it like any failed allocation
+    py::register_exception<MemoryBudgetExceeded>(m, "MemoryBudgetError", PyExc_MemoryError);
+
+    py::enum_<Precision>(m, "Precision")
+        .value("FLOAT32", Precision::Float32)
+        .value("FLOAT16", Precision::Float16)
+        .value("UINT8", Precision::UInt8);
+
     py::class_<ProcessingParams>(m, "ProcessingParams")
         .def(py::init<>())
         .def_readwrite("brightness", &ProcessingParams::brightness)
         .def_readwrite("contrast", &ProcessingParams::contrast)
         .def_readwrite("saturation", &ProcessingParams::saturation)
-        .def_readwrite("gamma", &ProcessingParams::gamma);
+        .def_readwrite("gamma", &ProcessingParams::gamma)
+        .def_readwrite("hue", &ProcessingParams::hue);
+
+    py::class_<AutoExposureSettings>(m, "AutoExposureSettings")
+        .def(py::init<>())
+        .def_readwrite("enabled", &AutoExposureSettings::enabled)
+        .def_readwrite("sample_stride", &AutoExposureSettings::sampleStride)
+        .def_readwrite("target_luminance", &AutoExposureSettings::targetLuminance)
+        .def_readwrite("target_spread", &AutoExposureSettings::targetSpread)
+        .def_readwrite("smoothing", &AutoExposureSettings::smoothing)
+        .def_readwrite("min_brightness", &AutoExposureSettings::minBrightness)
+        .def_readwrite("max_brightness", &AutoExposureSettings::maxBrightness)
+        .def_readwrite("min_contrast", &AutoExposureSettings::minContrast)
+        .def_readwrite("max_contrast", &AutoExposureSettings::maxContrast)
+        .def_readwrite("min_gamma", &AutoExposureSettings::minGamma)
+        .def_readwrite("max_gamma", &AutoExposureSettings::maxGamma);
+
+    py::class_<TemporalSettings>(m, "TemporalSettings")
+        .def(py::init<>())
+        .def_readwrite("enabled", &TemporalSettings::enabled)
+        .def_readwrite("tile_size", &TemporalSettings::tileSize)
+        .def_readwrite("sample_stride", &TemporalSettings::sampleStride)
+        .def_readwrite("pixel_threshold", &TemporalSettings::pixelThreshold)
+        .def_readwrite("full_frame_ratio", &TemporalSettings::fullFrameRatio);
+
+    py::enum_<GeometryMode>(m, "GeometryMode")
+        .value("NONE", GeometryMode::None)
+        .value("UNDISTORT", GeometryMode::Undistort)
+        .value("HOMOGRAPHY", GeometryMode::Homography);
+
+    // Matrices are exposed as flat row-major lists of 9 values
+    py::class_<GeometrySettings>(m, "GeometrySettings")
+        .def(py::init<>())
+        .def_readwrite("mode", &GeometrySettings::mode)
+        .def_readwrite("camera_matrix", &GeometrySettings::cameraMatrix)
+        .def_readwrite("distortion", &GeometrySettings::distortion)
+        .def_readwrite("new_camera_matrix", &GeometrySettings::newCameraMatrix)
+        .def_readwrite("homography", &GeometrySettings::homography);
 
     py::class_<RendererStatus>(m, "RendererStatus")
         .def(py::init<>())
@@ -22,45 +68,193 @@ PYBIND11_MODULE(_core, m) {
         .def_readonly("textureWidth", &RendererStatus::textureWidth)
         .def_readonly("textureHeight", &RendererStatus::textureHeight)
         .def_readonly("lastProcessingTime", &RendererStatus::lastProcessingTime)
-        .def_readonly("lastError", &RendererStatus::lastError);
+        .def_readonly("lastError", &RendererStatus::lastError)
+        .def_readonly("autoExposureActive", &RendererStatus::autoExposureActive)
+        .def_readonly("meanLuminance", &RendererStatus::meanLuminance)
+        .def_readonly("exposureContrast", &RendererStatus::exposureContrast)
+        .def_readonly("histogramSamples", &RendererStatus::histogramSamples)
+        .def_readonly("lastHistogramTime", &RendererStatus::lastHistogramTime)
+        .def_readonly("dirtyTiles", &RendererStatus::dirtyTiles)
+        .def_readonly("totalTiles", &RendererStatus::totalTiles)
+        .def_readonly("dirtyTileRatio", &RendererStatus::dirtyTileRatio)
+        .def_readonly("skippedFrames", &RendererStatus::skippedFrames)
+        .def_readonly("paramUpdates", &RendererStatus::paramUpdates)
+        .def_readonly("paramUpdatesSkipped", &RendererStatus::paramUpdatesSkipped)
+        .def_readonly("constantUploads", &RendererStatus::constantUploads)
+        .def_readonly("constantUploadsSkipped", &RendererStatus::constantUploadsSkipped)
+        .def_readonly("identityFrames", &RendererStatus::identityFrames)
+        .def_readonly("passthroughFrames", &RendererStatus::passthroughFrames)
+        .def_readonly("precision", &RendererStatus::precision)
+        .def_readonly("nativeHalfPrecision", &RendererStatus::nativeHalfPrecision)
+        .def_readonly("tracingEnabled", &RendererStatus::tracingEnabled)
+        .def_readonly("traceEventsRecorded", &RendererStatus::traceEventsRecorded)
+        .def_readonly("traceEventsDropped", &RendererStatus::traceEventsDropped)
+        .def_readonly("gpuMemoryUsage", &RendererStatus::gpuMemoryUsage)
+        .def_readonly("hostMemoryUsage", &RendererStatus::hostMemoryUsage)
+        .def_readonly("peakMemoryUsage", &RendererStatus::peakMemoryUsage)
+        .def_readonly("memoryBudget", &RendererStatus::memoryBudget)
+        .def_readonly("budgetEvictions", &RendererStatus::budgetEvictions)
+        .def_readonly("budgetRefusals", &RendererStatus::budgetRefusals)
+        .def_readonly("geometryActive", &RendererStatus::geometryActive)
+        .def_readonly("remapTableBuilds", &RendererStatus::remapTableBuilds)
+        .def_readonly("remapTableCacheHits", &RendererStatus::remapTableCacheHits)
+        .def_readonly("remapTablesCached", &RendererStatus::remapTablesCached)
+        .def_readonly("workgroupX", &RendererStatus::workgroupX)
+        .def_readonly("workgroupY", &RendererStatus::workgroupY)
+        .def_readonly("shaderVariants", &RendererStatus::shaderVariants)
+        .def_readonly("adapterName", &RendererStatus::adapterName)
+        .def_readonly("adapterVendorId", &RendererStatus::adapterVendorId)
+        .def_readonly("adapterDeviceId", &RendererStatus::adapterDeviceId)
+        .def_readonly("adapterVideoMemory", &RendererStatus::adapterVideoMemory)
+        .def_readonly("initializationTime", &RendererStatus::initializationTime)
+        .def_readonly("timeToFirstFrame", &RendererStatus::timeToFirstFrame)
+        .def_readonly("warmupTime", &RendererStatus::warmupTime)
+        .def_readonly("textureCacheHits", &RendererStatus::textureCacheHits)
+        .def_readonly("textureSetsCached", &RendererStatus::textureSetsCached)
+        .def_readonly("stridedFrames", &RendererStatus::stridedFrames)
+        .def_readonly("inputCopies", &RendererStatus::inputCopies)
+        .def_property_readonly("memory", [](const RendererStatus& status) {
+            // {category: {"resident": bytes, "peak": bytes, "allocations": n, "releases": n}}
+            static const char* names[kMemoryCategoryCount] = {
+                "textures", "staging", "buffers", "constant_buffers", "host_frames"
+            };
+            py::dict memory;
+            for (int i = 0; i < kMemoryCategoryCount; ++i) {
+                const MemoryCategoryStats& stats = status.memory[i];
+                py::dict entry;
+                entry["resident"] = stats.residentBytes;
+                entry["peak"] = stats.peakBytes;
+                entry["allocations"] = stats.allocations;
+                entry["releases"] = stats.releases;
+                memory[names[i]] = entry;
+            }
+            return memory;
+        });
+
+    // Renderer calls wait on the renderer's mutex and the GPU, so they all run
+    // without the GIL; other Python threads keep going meanwhile
+    using release_gil = py::call_guard<py::gil_scoped_release>;
 
     py::class_<DX11Renderer>(m, "DX11Renderer")
-        .def(py::init<>())
-        .def("process_frame", [](DX11Renderer& self, py::array_t<uint8_t, py::array::c_style> input) {
+        .def(py::init<Precision>(), py::arg("precision") = Precision::Float32)
+        .def(py::init([](const std::string& precision) {
+            if (precision == "float32") return std::make_unique<DX11Renderer>(Precision::Float32);
+            if (precision == "float16") return std::make_unique<DX11Renderer>(Precision::Float16);
+            if (precision == "uint8") return std::make_unique<DX11Renderer>(Precision::UInt8);
+            throw py::value_error("precision must be 'float32', 'float16' or 'uint8'");
+        }), py::arg("precision"))
+        .def("process_frame", [](DX11Renderer& self, py::array input) -> py::array {
+            if (input.dtype().kind() != 'u' || input.itemsize() != 1) {
+                throw py::type_error("Input must be a uint8 array");
+            }
             if (input.ndim() != 3 || input.shape(2) != 3) {
                 throw std::runtime_error("Input must be a BGR image (height, width, 3)");
             }
 
-            cv::Mat inputMat(
-                static_cast<int>(input.shape(0)),
-                static_cast<int>(input.shape(1)),
-                CV_8UC3,
-                const_cast<uint8_t*>(input.data())
-            );
-
-            cv::Mat outputMat;
-            self.processFrame(inputMat, outputMat);
+            // Any strides work: crops, flips and padded buffers are read in
+            // place rather than copied to a contiguous array first
+            FrameView view;
+            view.data = static_cast<const uint8_t*>(input.data());
+            view.rows = static_cast<int>(input.shape(0));
+            view.cols = static_cast<int>(input.shape(1));
+            view.rowStride = static_cast<ptrdiff_t>(input.strides(0));
+            view.pixelStride = static_cast<ptrdiff_t>(input.strides(1));
+            view.channelStride = static_cast<ptrdiff_t>(input.strides(2));
 
-            // Create shape and strides containers
-            std::vector<py::ssize_t> shape = {
-                outputMat.rows,
-                outputMat.cols,
-                outputMat.channels()
-            };
-            
-            std::vector<py::ssize_t> strides = {
-                static_cast<py::ssize_t>(outputMat.step[0]),
-                static_cast<py::ssize_t>(outputMat.step[1]),
-                static_cast<py::ssize_t>(1)
-            };
+            // The result is written straight into the array that is returned
+            py::array_t<uint8_t> output({input.shape(0), input.shape(1), static_cast<py::ssize_t>(3)});
+            cv::Mat outputMat(view.rows, view.cols, CV_8UC3, output.mutable_data());
 
-            // Create and return numpy array
-            return py::array_t<uint8_t>(
-                py::array::ShapeContainer(shape.begin(), shape.end()),
-                py::array::StridesContainer(strides.begin(), strides.end()),
-                outputMat.data
+            // `input` keeps the buffer alive while the GIL is released
+            bool passthrough;
+            {
+                py::gil_scoped_release release;
+                // Identity parameters with zero-copy enabled: hand the input back
+                passthrough = self.processFrameOrPassthrough(view, outputMat);
+            }
+            if (passthrough) {
+                return input;
+            }
+            if (outputMat.data != output.data()) {
+                // The renderer reallocated the output; never expected
+                cv::Mat target(view.rows, view.cols, CV_8UC3, output.mutable_data());
+                outputMat.copyTo(target);
+            }
+            return std::move(output);
+        })
+        .def("update_processing_params", &DX11Renderer::updateProcessingParams, release_gil())
+        .def_property_readonly("status", py::cpp_function(&DX11Renderer::getStatus, release_gil()))
+        .def("set_auto_exposure", &DX11Renderer::setAutoExposure, release_gil())
+        .def("get_auto_exposure", &DX11Renderer::getAutoExposure, release_gil())
+        .def("get_histogram", [](const DX11Renderer& self) {
+            std::vector<uint32_t> histogram;
+            {
+                py::gil_scoped_release release;
+                histogram = self.getLuminanceHistogram();
+            }
+            return py::array_t<uint32_t>(
+                static_cast<py::ssize_t>(histogram.size()),
+                histogram.data()
             );
         })
-        .def("update_processing_params", &DX11Renderer::updateProcessingParams)
-        .def_property_readonly("status", &DX11Renderer::getStatus);
+        .def_property_readonly("applied_params", py::cpp_function(&DX11Renderer::getAppliedParams, release_gil()))
+        .def("set_temporal_mode", &DX11Renderer::setTemporalMode, release_gil())
+        .def("get_temporal_mode", &DX11Renderer::getTemporalMode, release_gil())
+        .def("set_geometry", &DX11Renderer::setGeometry, release_gil())
+        .def("get_geometry", &DX11Renderer::getGeometry, release_gil())
+        // Workgroups are (x, y) tuples, profile entries (width, height, x, y)
+        .def("set_workgroup_size", [](DX11Renderer& self, int x, int y) {
+            WorkgroupSize size;
+            size.x = x;
+            size.y = y;
+            self.setWorkgroupSize(size);
+        }, py::arg("x"), py::arg("y"), release_gil())
+        .def("get_workgroup_size", [](const DX11Renderer& self) {
+            WorkgroupSize size = self.getWorkgroupSize();
+            return std::make_pair(size.x, size.y);
+        }, release_gil())
+        .def("set_workgroup_profile", [](DX11Renderer& self, const std::vector<std::array<int, 4>>& entries) {
+            std::vector<WorkgroupProfileEntry> profile;
+            for (const auto& values : entries) {
+                WorkgroupProfileEntry entry;
+                entry.width = values[0];
+                entry.height = values[1];
+                entry.workgroup.x = values[2];
+                entry.workgroup.y = values[3];
+                profile.push_back(entry);
+            }
+            self.setWorkgroupProfile(profile);
+        }, py::arg("entries"), release_gil())
+        .def("get_workgroup_profile", [](const DX11Renderer& self) {
+            std::vector<std::array<int, 4>> entries;
+            for (const WorkgroupProfileEntry& entry : self.getWorkgroupProfile()) {
+                entries.push_back({ entry.width, entry.height, entry.workgroup.x, entry.workgroup.y });
+            }
+            return entries;
+        }, release_gil())
+        .def("warmup", &DX11Renderer::warmup, py::arg("resolutions"), release_gil())
+        .def_property_readonly("is_identity", py::cpp_function(&DX11Renderer::isIdentity, release_gil()))
+        .def_property("zero_copy_passthrough",
+                      py::cpp_function(&DX11Renderer::getZeroCopyPassthrough, release_gil()),
+                      py::cpp_function(&DX11Renderer::setZeroCopyPassthrough, release_gil()))
+        .def_property("memory_budget",
+                      py::cpp_function(&DX11Renderer::getMemoryBudget, release_gil()),
+                      py::cpp_function(&DX11Renderer::setMemoryBudget, release_gil()))
+        .def("set_tracing", &DX11Renderer::setTracing, py::arg("enabled"), py::arg("capacity") = 4096,
+             release_gil())
+        .def_property_readonly("is_tracing", py::cpp_function(&DX11Renderer::isTracing, release_gil()))
+        .def("drain_trace_events", [](DX11Renderer& self) {
+            std::vector<TraceEvent> events;
+            {
+                py::gil_scoped_release release;
+                events = self.drainTraceEvents();
+            }
+            // (name, start_ns, duration_ns, thread_id, frame_id) tuples
+            py::list result;
+            for (const TraceEvent& event : events) {
+                result.append(py::make_tuple(event.name, event.startNs, event.durationNs,
+                                             event.threadId, event.frameId));
+            }
+            return result;
+        });
 }
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+import numpy as np
+import pytest
+from dx11_renderer.aio import AsyncRenderer, RenderPipeline
+
+
+class SlowRenderer:
+    """Stand-in renderer that blocks like a real frame and records its threads"""
+
+    def __init__(self, delay=0.002):
+        self.delay = delay
+        self.params = None
+        self.frames = 0
+        self.threads = set()
+
+    def update_processing_params(self, params):
+        self.params = params
+
+    def process_frame(self, frame):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        self.frames += 1
+        return 255 - frame
+
+
+class Params:
+    pass
+
+
+def frame(value):
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+
+def test_hundreds_of_requests_share_a_few_threads():
+    print("Testing concurrent awaits...")
+    renderers = []
+
+    def factory():
+        renderers.append(SlowRenderer())
+        return renderers[-1]
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        async with AsyncRenderer(workers=2, max_pending=16, renderer_factory=factory) as renderer:
+            ticking = asyncio.ensure_future(ticker())
+            results = await asyncio.gather(*(renderer.process(frame(i % 256)) for i in range(300)))
+            ticking.cancel()
+        return results, ticks
+
+    before = threading.active_count()
+    results, ticks = asyncio.run(main())
+    assert [int(out[0, 0, 0]) for out in results] == [255 - i % 256 for i in range(300)]
+    assert len(renderers) <= 2 and sum(r.frames for r in renderers) == 300
+    assert set().union(*(r.threads for r in renderers)) <= {"dx11-async_0", "dx11-async_1"}
+    # The loop kept running while frames were processed
+    assert ticks > 10
+    assert threading.active_count() <= before + 1
+
+
+def test_params_reach_every_renderer():
+    renderers = []
+
+    def factory():
+        renderers.append(SlowRenderer(delay=0.02))
+        return renderers[-1]
+
+    async def main():
+        async with AsyncRenderer(workers=2, params={"brightness": 1.5}, renderer_factory=factory,
+                                 params_factory=Params) as renderer:
+            await asyncio.gather(renderer.process(frame(1)), renderer.process(frame(2)))
+            await renderer.update_params({"contrast": 0.8})
+            assert len(renderer.renderers) == 2
+
+    asyncio.run(main())
+    assert [vars(r.params) for r in renderers] == [{"contrast": 0.8}] * 2
+
+
+def test_pipeline_is_ordered_and_bounded():
+    pulled = 0
+
+    def source():
+        nonlocal pulled
+        for i in range(20):
+            pulled += 1
+            yield frame(i)
+
+    async def main():
+        seen = []
+        async with AsyncRenderer(SlowRenderer()) as renderer:
+            async for out in RenderPipeline(renderer, concurrency=3).stream(source()):
+                seen.append((int(out[0, 0, 0]), pulled))
+        return seen
+
+    seen = asyncio.run(main())
+    assert [value for value, _ in seen] == [255 - i for i in range(20)]
+    # The consumer is never more than `concurrency` frames behind the source
+    assert all(count <= index + 3 for index, (_, count) in enumerate(seen))
+
+
+def test_async_sources_and_errors():
+    class Failing(SlowRenderer):
+        def process_frame(self, frame):
+            if frame[0, 0, 0] == 3:
+                raise RuntimeError("device removed")
+            return super().process_frame(frame)
+
+    async def source():
+        for i in range(6):
+            yield frame(i)
+
+    async def main():
+        outputs = []
+        async with AsyncRenderer(Failing()) as renderer:
+            with pytest.raises(RuntimeError, match="device removed"):
+                async for out in RenderPipeline(renderer, concurrency=2).stream(source()):
+                    outputs.append(out)
+        return outputs
+
+    assert len(asyncio.run(main())) == 3
+
+
+def test_cancelling_the_consumer_cancels_queued_frames():
+    renderer = SlowRenderer(delay=0.02)
+
+    async def main():
+        async with AsyncRenderer(renderer) as wrapped:
+            async def consume():
+                async for _ in RenderPipeline(wrapped, concurrency=8).stream([frame(i) for i in range(50)]):
+                    pass
+
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert not [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    asyncio.run(main())
+    assert renderer.frames < 20
+
+
+def test_closed_renderer_rejects_frames():
+    async def main():
+        renderer = AsyncRenderer(SlowRenderer())
+        await renderer.aclose()
+        with pytest.raises(RuntimeError):
+            await renderer.process(frame(0))
+
+    asyncio.run(main())
+    with pytest.raises(ValueError):
+        AsyncRenderer(SlowRenderer(), workers=2)
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+dx11_renderer = pytest.importorskip("dx11_renderer")
+if not hasattr(dx11_renderer, "DX11Renderer"):
+    pytest.skip("Native renderer module is not available", allow_module_level=True)
+
+
+@pytest.fixture
+def renderer():
+    renderer = dx11_renderer.DX11Renderer()
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    return renderer
+
+
+def auto_exposure(stride=8, smoothing=0.3):
+    settings = dx11_renderer.AutoExposureSettings()
+    settings.enabled = True
+    settings.sample_stride = stride
+    settings.smoothing = smoothing
+    return settings
+
+
+def grey_ramp(low, high, width=320, height=240):
+    """A BGR grey ramp running from ``low`` to ``high`` across the frame"""
+    row = np.linspace(low, high, width).round().astype(np.uint8)
+    return np.repeat(np.tile(row, (height, 1))[..., None], 3, axis=2)
+
+
+def luma(frame):
+    return frame.astype(np.float64) @ np.array([0.0722, 0.7152, 0.2126]) / 255.0
+
+
+def test_histogram_counts_subsampled_luminance(renderer):
+    print("Testing luminance histogram...")
+    renderer.set_auto_exposure(auto_exposure(stride=8))
+    renderer.process_frame(np.full((240, 320, 3), 100, dtype=np.uint8))
+    histogram = renderer.get_histogram()
+    assert histogram.shape == (256,)
+    assert renderer.status.histogramSamples == (240 // 8) * (320 // 8)
+    assert histogram[100] == renderer.status.histogramSamples
+    assert renderer.status.meanLuminance == pytest.approx(100.5 / 256, abs=1e-3)
+
+
+def test_exposure_converges_on_the_targets(renderer):
+    settings = auto_exposure()
+    renderer.set_auto_exposure(settings)
+    # Dark and flat: mean ~0.25, 1st..99th percentile spread ~0.19
+    frame = grey_ramp(40, 90)
+    for _ in range(40):
+        output = renderer.process_frame(frame)
+
+    assert renderer.status.exposureContrast > 1.5
+    y = luma(output)
+    assert y.mean() == pytest.approx(settings.target_luminance, abs=0.03)
+    assert np.percentile(y, 99) - np.percentile(y, 1) == pytest.approx(settings.target_spread, abs=0.05)
+
+
+def test_luma_contrast_leaves_colour_parameters_alone(renderer):
+    params = dx11_renderer.ProcessingParams()
+    params.contrast = 1.3
+    params.saturation = 0.7
+    renderer.update_processing_params(params)
+    renderer.set_auto_exposure(auto_exposure())
+    frame = grey_ramp(40, 90)
+    for _ in range(20):
+        output = renderer.process_frame(frame)
+
+    applied = renderer.applied_params
+    assert (applied.contrast, applied.saturation) == pytest.approx((1.3, 0.7))
+    # Grey input stays grey: the exposure gain only moves luma
+    assert np.abs(output.astype(int) - output[..., :1]).max() <= 1
+
+    renderer.set_auto_exposure(dx11_renderer.AutoExposureSettings())
+    assert renderer.status.exposureContrast == 1.0
+    assert renderer.applied_params.brightness == params.brightness
@@ -0,0 +1,159 @@
+import json
+import logging
+import time
+import types
+import numpy as np
+import pytest
+from dx11_renderer.autotune import (DEFAULT_WORKGROUP, _pick, apply_profile, autotune, load_profile,
+                                    tune_decode_workers, tuned_setting, tuned_workgroups)
+from dx11_renderer.process_pool import ShardedRenderPool
+from dx11_renderer.precision import synthetic_frame
+
+
+def make_status(precision="float32", adapter="Test GPU"):
+    return types.SimpleNamespace(precision=precision, adapterName=adapter, adapterVendorId=0x10DE,
+                                 adapterDeviceId=0x2204, adapterVideoMemory=8 << 30, isInitialized=True)
+
+
+class ShapedRenderer:
+    """Stand-in renderer whose frame time depends on its workgroup shape"""
+
+    def __init__(self, precision="float32", adapter="Test GPU", fastest=(16, 8)):
+        self.status = make_status(precision, adapter)
+        self.fastest = fastest
+        self.workgroup = DEFAULT_WORKGROUP
+        self.profile = None
+
+    def set_workgroup_size(self, x, y):
+        if x * y > 1024:
+            raise ValueError("too many threads")
+        self.workgroup = (x, y)
+
+    def set_workgroup_profile(self, entries):
+        self.profile = list(entries)
+
+    def update_processing_params(self, params):
+        pass
+
+    def process_frame(self, frame):
+        time.sleep(0.001 if self.workgroup == self.fastest else 0.004)
+        return 255 - frame
+
+
+class InvertRenderer:
+    def update_processing_params(self, params):
+        pass
+
+    def process_frame(self, frame):
+        return 255 - frame
+
+
+class Params:
+    pass
+
+
+def test_tuned_workgroups_beat_the_default_and_persist(tmp_path):
+    print("Testing workgroup autotuning...")
+    path = str(tmp_path / "profile.json")
+    report = autotune([(64, 48), (160, 120)], ["float32", "uint8"], frames=2, repeats=1, path=path,
+                      renderer_factory=lambda precision: ShapedRenderer(precision))
+    for rows in report["workgroups"].values():
+        for row in rows:
+            assert (row["x"], row["y"]) == (16, 8) and row["ms"] < row["default_ms"]
+
+    profile = load_profile(path)
+    renderer = ShapedRenderer("uint8")
+    assert apply_profile(renderer, profile) == [(64, 48, 16, 8), (160, 120, 16, 8)]
+    assert renderer.profile == [(64, 48, 16, 8), (160, 120, 16, 8)]
+    # Another GPU or precision has its own entries
+    assert tuned_workgroups(make_status(adapter="Other GPU"), profile) == []
+    assert tuned_workgroups(make_status("float16"), profile) == []
+
+    # Tuning another resolution later keeps the earlier ones
+    autotune([(320, 240)], ["float32"], workgroups=((16, 8),), frames=2, repeats=1, path=path,
+             renderer_factory=lambda precision: ShapedRenderer(precision))
+    assert [entry[:2] for entry in tuned_workgroups(make_status(), load_profile(path))] == \
+        [(64, 48), (160, 120), (320, 240)]
+
+
+def test_default_is_kept_within_noise():
+    timings = {(8, 8): 1.00, (16, 8): 0.99, (32, 8): 1.20}
+    assert _pick([(16, 8), (32, 8)], (8, 8), timings.get, min_gain=0.03)[0] == (8, 8)
+    assert _pick([(16, 8), (32, 8)], (8, 8), timings.get, min_gain=0.0)[0] == (16, 8)
+
+
+def test_bad_profiles_are_ignored(tmp_path, caplog):
+    path = tmp_path / "profile.json"
+    path.write_text("{not json")
+    with caplog.at_level(logging.WARNING):
+        assert load_profile(str(path))["machines"] == {}
+    path.write_text(json.dumps({"version": 99, "machines": {}}))
+    assert load_profile(str(path))["machines"] == {}
+    assert load_profile(str(tmp_path / "missing.json"))["machines"] == {}
+
+    class Rejecting(ShapedRenderer):
+        def set_workgroup_profile(self, entries):
+            raise ValueError("bad workgroup")
+
+    good = tmp_path / "good.json"
+    autotune([(64, 48)], ["float32"], workgroups=((16, 8),), frames=1, repeats=1, path=str(good),
+             renderer_factory=lambda precision: ShapedRenderer(precision))
+    assert apply_profile(Rejecting(), load_profile(str(good))) == []
+
+
+def test_worker_counts_are_tuned_and_used_by_default(tmp_path, monkeypatch):
+    path = str(tmp_path / "profile.json")
+    monkeypatch.setenv("DX11_RENDERER_PROFILE", path)
+    report = autotune([(64, 48)], ["float32"], workgroups=(), render_workers=(1, 2), decode_workers=(1, 2),
+                      frames=4, repeats=1, min_gain=-1.0, renderer_factory=lambda precision: ShapedRenderer(precision),
+                      worker_renderer_factory=InvertRenderer, params_factory=Params)
+    render = report["settings"]["render_workers"]
+    assert render["value"] in (1, 2) and render["resolution"] == [64, 48]
+    assert tuned_setting("render_workers") == render["value"]
+    assert tuned_setting("decode_workers") == report["settings"]["decode_workers"]["value"]
+    assert tuned_setting("unknown", 7) == 7
+
+    with ShardedRenderPool(renderer_factory=InvertRenderer, params_factory=Params,
+                           max_frame_shape=(48, 64, 3)) as pool:
+        assert pool.num_workers == render["value"]
+
+
+def test_decode_workers_report_every_candidate():
+    best, timings = tune_decode_workers((1, 2), (32, 24), images=4, repeats=1,
+                                        renderer_factory=InvertRenderer, params_factory=Params)
+    assert best in timings and {1, 2} <= set(timings)
+
+
+@pytest.fixture
+def native():
+    dx11_renderer = pytest.importorskip("dx11_renderer")
+    if not hasattr(dx11_renderer, "DX11Renderer"):
+        pytest.skip("Native renderer module is not available")
+    renderer = dx11_renderer.DX11Renderer(autotune=False)
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    return renderer
+
+
+def test_native_workgroups_give_identical_output(native):
+    frame = synthetic_frame(333, 199)
+    expected = native.process_frame(frame).copy()
+    for x, y in ((16, 8), (32, 32), (7, 3)):
+        native.set_workgroup_size(x, y)
+        np.testing.assert_array_equal(native.process_frame(frame), expected)
+        assert (native.status.workgroupX, native.status.workgroupY) == (x, y)
+    assert native.status.shaderVariants == 4
+    with pytest.raises(ValueError):
+        native.set_workgroup_size(64, 64)
+
+
+def test_native_profile_is_chosen_by_frame_size(native):
+    native.set_workgroup_profile([(320, 240, 16, 16), (1920, 1080, 32, 8)])
+    native.process_frame(synthetic_frame(320, 240))
+    assert (native.status.workgroupX, native.status.workgroupY) == (16, 16)
+    native.process_frame(synthetic_frame(1600, 900))
+    assert (native.status.workgroupX, native.status.workgroupY) == (32, 8)
+    # Nothing within a factor of two: the default
+    native.process_frame(synthetic_frame(64, 48))
+    assert (native.status.workgroupX, native.status.workgroupY) == DEFAULT_WORKGROUP
+    assert native.status.adapterName
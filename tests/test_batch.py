@@ -0,0 +1,88 @@
+import cv2
+import numpy as np
+from dx11_renderer.batch import BatchJob, iter_inputs
+
+
+class InvertRenderer:
+    """Stand-in renderer so batch jobs can be tested without a GPU"""
+
+    def __init__(self):
+        self.frames = 0
+
+    def update_processing_params(self, params):
+        pass
+
+    def process_frame(self, frame):
+        self.frames += 1
+        return 255 - frame
+
+
+class Params:
+    pass
+
+
+def make_tree(root):
+    (root / "nested").mkdir(parents=True)
+    for i in range(5):
+        cv2.imwrite(str(root / f"small_{i}.png"), np.full((24, 32, 3), 10 * i, dtype=np.uint8))
+    for i in range(3):
+        cv2.imwrite(str(root / "nested" / f"large_{i}.png"), np.full((48, 64, 3), 20 * i, dtype=np.uint8))
+    (root / "notes.txt").write_text("not an image")
+
+
+def test_iter_inputs_directory_and_manifest(tmp_path):
+    make_tree(tmp_path / "in")
+    rels = [rel for _, rel in iter_inputs(str(tmp_path / "in"))]
+    assert len(rels) == 8 and "notes.txt" not in rels
+
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# shots\nin/small_0.png\n\nin/nested/large_1.png\n")
+    entries = list(iter_inputs(str(manifest)))
+    assert [rel.replace("\\", "/") for _, rel in entries] == ["in/small_0.png", "in/nested/large_1.png"]
+
+
+def test_batch_job_processes_tree(tmp_path):
+    print("Testing batch job...")
+    make_tree(tmp_path / "in")
+    job = BatchJob(str(tmp_path / "in"), str(tmp_path / "out"), batch_size=2, decode_workers=2,
+                   write_workers=2, renderer_factory=InvertRenderer, params_factory=Params)
+    stats = job.run()
+    print(stats)
+    assert (stats.processed, stats.failed) == (8, 0)
+    # 5 small images in batches of 2 plus 3 large ones: at least 3 + 2 batches
+    assert stats.batches >= 5
+    out = cv2.imread(str(tmp_path / "out" / "nested" / "large_2.png"))
+    assert out.shape == (48, 64, 3) and (out == 255 - 40).all()
+
+
+def test_batch_job_resumes_from_journal(tmp_path):
+    make_tree(tmp_path / "in")
+    journal = tmp_path / "done.journal"
+    journal.write_text("small_0.png\nsmall_1.png\n")
+    (tmp_path / "in" / "broken.jpg").write_bytes(b"not a jpeg")
+
+    job = BatchJob(str(tmp_path / "in"), str(tmp_path / "out"), journal=str(journal),
+                   output_extension=".jpg", renderer_factory=InvertRenderer, params_factory=Params)
+    stats = job.run()
+    assert (stats.processed, stats.skipped, stats.failed) == (6, 2, 1)
+    assert not (tmp_path / "out" / "small_0.jpg").exists()
+    assert (tmp_path / "out" / "small_4.jpg").exists()
+
+    # Everything except the undecodable file is now journaled
+    stats = job.run()
+    assert (stats.processed, stats.skipped, stats.failed) == (0, 8, 1)
+
+
+def test_mixed_sizes_stay_bounded(tmp_path):
+    root = tmp_path / "in"
+    root.mkdir()
+    # Every image has its own size, so no shape group ever fills up
+    for i in range(40):
+        cv2.imwrite(str(root / f"still_{i:02d}.png"), np.full((16 + i, 16, 3), i, dtype=np.uint8))
+    job = BatchJob(str(root), str(tmp_path / "out"), batch_size=8, decode_workers=2, prefetch=4,
+                   renderer_factory=InvertRenderer, params_factory=Params)
+    stats = job.run()
+    assert (stats.processed, stats.failed) == (40, 0)
+    assert stats.peak_buffered <= 9
+    out = cv2.imread(str(tmp_path / "out" / "still_39.png"))
+    assert out.shape == (55, 16, 3) and (out == 255 - 39).all()
@@ -0,0 +1,106 @@
+import threading
+import time
+import numpy as np
+import pytest
+from dx11_renderer.detection_log import DETECTION_DTYPE, DetectionLog, DetectionLogReader
+from dx11_renderer.sinks import DetectionLogSink
+
+
+def detections(count, frame):
+    rng = np.random.default_rng(frame)
+    boxes = rng.uniform(0, 600, (count, 2))
+    return np.column_stack([boxes, boxes + 40, rng.uniform(0.2, 1.0, count), np.arange(count) % 4])
+
+
+def test_chunks_roundtrip_through_memory_mapped_reader(tmp_path):
+    print("Testing detection log...")
+    with DetectionLog(str(tmp_path), chunk_rows=100, format="npy") as log:
+        for frame in range(30):
+            log.append(detections(12, frame), stream=frame % 2, frame=frame, timestamp=1000.0 + frame)
+    assert log.rows == 360 and log.chunks_written == 4
+
+    reader = DetectionLogReader(str(tmp_path))
+    assert len(reader) == 360 and len(reader.chunks) == 4
+    assert isinstance(reader.column(reader.chunks[0], "score"), np.memmap)
+
+    rows = reader.query()
+    assert rows.dtype == DETECTION_DTYPE
+    np.testing.assert_array_equal(rows["frame"], np.repeat(np.arange(30), 12))
+    np.testing.assert_allclose(rows["x1"][:12], detections(12, 0)[:, 0], rtol=1e-6)
+    assert (rows["track"] == -1).all()
+
+
+def test_query_filters_and_prunes_chunks(tmp_path):
+    with DetectionLog(str(tmp_path), chunk_rows=120, format="npy") as log:
+        for frame in range(40):
+            log.append(detections(12, frame), stream=frame // 20, frame=frame, timestamp=float(frame))
+
+    reader = DetectionLogReader(str(tmp_path))
+    opened = []
+    column = reader.column
+    reader.column = lambda chunk, field: opened.append(chunk[0]) or column(chunk, field)
+
+    rows = reader.query(stream=1, frames=(25, 30), min_score=0.5, classes=[1, 2],
+                        columns=["frame", "score", "class"])
+    assert rows.dtype.names == ("frame", "score", "class")
+    assert ((rows["frame"] >= 25) & (rows["frame"] < 30)).all()
+    assert (rows["score"] >= 0.5).all() and np.isin(rows["class"], [1, 2]).all()
+    expected = sum(int(((d[:, 4] >= 0.5) & np.isin(d[:, 5], [1, 2])).sum())
+                   for d in (detections(12, f) for f in range(25, 30)))
+    assert len(rows) == expected
+    # Frames 25-29 are in chunk 2 (frames 20-29); no other chunk is opened
+    assert set(opened) == {"chunk_000002"}
+    assert len(reader.query(time_range=(10.0, 12.0))) == 24
+
+
+def test_partial_chunks_are_flushed_and_log_reopens(tmp_path):
+    log = DetectionLog(str(tmp_path), chunk_rows=1000, format="npy")
+    log.append(detections(5, 0), frame=0)
+    log.flush()
+    assert len(DetectionLogReader(str(tmp_path))) == 5
+    log.close()
+
+    with DetectionLog(str(tmp_path), chunk_rows=1000, format="npy") as log:
+        tracks = np.column_stack([detections(3, 1), [7, 8, 9]])
+        log.append(tracks, frame=1)
+    rows = DetectionLogReader(str(tmp_path)).query()
+    assert len(rows) == 8 and rows["track"][-3:].tolist() == [7, 8, 9]
+
+
+def test_concurrent_streams_and_backpressure(tmp_path):
+    log = DetectionLog(str(tmp_path), chunk_rows=64, ring_chunks=2, format="npy")
+
+    def camera(stream):
+        for frame in range(50):
+            log.append(detections(10, frame), stream=stream, frame=frame)
+
+    threads = [threading.Thread(target=camera, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.close()
+    rows = DetectionLogReader(str(tmp_path)).query()
+    assert len(rows) == 4 * 50 * 10 and not log.errors
+    for stream in range(4):
+        assert (rows["stream"] == stream).sum() == 500
+
+
+def test_invalid_detections_are_rejected(tmp_path):
+    with DetectionLog(str(tmp_path), format="npy") as log:
+        with pytest.raises(ValueError):
+            log.append(np.zeros((3, 4)))
+        log.append(np.zeros((0, 6)))
+    assert log.rows == 0
+
+
+def test_sink_logs_only_fresh_detections(tmp_path):
+    sink = DetectionLogSink(str(tmp_path / "log"), stream=3)
+    result = detections(4, 0)
+    for index in range(6):
+        if index == 3:
+            result = detections(4, 3)
+        sink.write(None, {"index": index, "timestamp": time.time(), "detections": result})
+    sink.close()
+    rows = DetectionLogReader(str(tmp_path / "log")).query()
+    assert rows["frame"].tolist() == [0] * 4 + [3] * 4 and (rows["stream"] == 3).all()
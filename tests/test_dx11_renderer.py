@@ -27,6 +27,8 @@ print("Looking for dx11_renderer in:", release_dir)
 try:
     print("\nImporting dx11_renderer module...")
     import dx11_renderer
+    from dx11_renderer.recording import open_capture
+    from dx11_renderer.writer import ClipBuffer, FrameWriter
     print("Successfully imported dx11_renderer module")
 except ImportError as e:
     print(f"Failed to import dx11_renderer module: {e}")
@@ -92,13 +94,11 @@ def main():
 
     print("\nOpening video capture...")
     try:
-        cap = cv2.VideoCapture(0)
+        # Optional argument: camera index, video file or a .dx11raw recording to replay
+        cap = open_capture(sys.argv[1] if len(sys.argv) > 1 else None)
         if not cap.isOpened():
-            print("Trying alternative video source...")
-            cap = cv2.VideoCapture(1)
-            if not cap.isOpened():
-                print("Error: Unable to open any video source.")
-                return
+            print("Error: Unable to open any video source.")
+            return
         
         print("Video capture properties:")
         print(f"Frame width: {cap.get(cv2.CAP_PROP_FRAME_WIDTH)}")
@@ -129,6 +129,9 @@ def main():
             print("- Press 'r' to reset parameters")
             print("- Press 's' to save current preset")
             print("- Press 'l' to load last preset")
+            print("- Press 'a' to toggle auto exposure")
+            print("- Press 'p' to save a screenshot")
+            print("- Press 'c' to save the last 10 seconds as a clip")
             print("- Press 'q' to quit")
 
         except Exception as e:
@@ -138,6 +141,9 @@ def main():
 
         print("\nStarting main processing loop...")
         frame_count = 0
+        auto_exposure = dx11_renderer.AutoExposureSettings()
+        writer = FrameWriter()
+        clip_buffer = ClipBuffer(seconds=10.0)
         while True:
             try:
                 ret, frame = cap.read()
@@ -164,6 +170,7 @@ def main():
                     
                     # Display frames
                     combined_frame = np.hstack((frame, processed_frame))
+                    clip_buffer.append(combined_frame)
                     cv2.imshow("Original vs Processed", combined_frame)
                     
                     # Create info display with parameters and instructions
@@ -209,13 +216,25 @@ def main():
                     if loaded_params:
                         params = loaded_params
                         update_trackbars('Controls', params)
+                elif key == ord('a'):
+                    # Toggle histogram driven auto exposure
+                    auto_exposure.enabled = not auto_exposure.enabled
+                    renderer.set_auto_exposure(auto_exposure)
+                    print(f"\nAuto exposure: {'On' if auto_exposure.enabled else 'Off'}")
                 elif key == ord('p'):
                     # Save screenshot
-                    os.makedirs("screenshots", exist_ok=True)
                     timestamp = time.strftime("%Y%m%d-%H%M%S")
                     filename = f"screenshots/processed_{timestamp}.png"
-                    cv2.imwrite(filename, combined_frame)
-                    print(f"\nSaved screenshot to {filename}")
+                    if writer.save_image(filename, combined_frame):
+                        print(f"\nSaving screenshot to {filename}")
+                    else:
+                        print("\nScreenshot dropped: writer is busy")
+                elif key == ord('c'):
+                    # Export the last 10 seconds of processed frames
+                    timestamp = time.strftime("%Y%m%d-%H%M%S")
+                    filename = f"screenshots/clip_{timestamp}.avi"
+                    if writer.save_clip(filename, clip_buffer.last(10.0)):
+                        print(f"\nSaving clip to {filename}")
 
             except Exception as e:
                 print(f"Error in main loop: {e}")
@@ -228,6 +247,8 @@ def main():
     finally:
         print("\nCleaning up...")
         try:
+            if 'writer' in locals():
+                writer.close()
             cap.release()
             cv2.destroyAllWindows()
             print("Cleanup complete")
@@ -0,0 +1,110 @@
+import json
+import types
+import cv2
+import numpy as np
+import pytest
+from dx11_renderer.geometry import (compare, emulate, load_calibration, make_geometry, reference,
+                                    remap_tables)
+from dx11_renderer.precision import accuracy, synthetic_frame
+
+WIDTH, HEIGHT = 320, 240
+WIDE_ANGLE = {
+    "camera_matrix": [[260.0, 0.0, 161.5], [0.0, 255.0, 118.0], [0.0, 0.0, 1.0]],
+    "dist_coeffs": [-0.32, 0.11, 0.001, -0.0015, -0.018],
+}
+KEYSTONE = {"homography": [[1.05, 0.08, -12.0], [0.02, 0.97, 6.0], [0.0004, 0.0001, 1.0]]}
+
+
+@pytest.mark.parametrize("calibration", [WIDE_ANGLE, KEYSTONE], ids=["undistort", "homography"])
+def test_emulated_correction_matches_opencv(calibration):
+    print("Testing geometric correction...")
+    frame = synthetic_frame(WIDTH, HEIGHT)
+    output = emulate(frame, calibration)
+    # Same sample positions as OpenCV; only the bilinear weights' rounding differs
+    result = accuracy(output, reference(frame, calibration).astype(np.float64))
+    assert result["max_error"] <= 1 and result["psnr"] > 50
+
+
+def test_undistortion_tables_are_opencvs():
+    frame = synthetic_frame(WIDTH, HEIGHT)
+    coords, weights = remap_tables(frame.shape, WIDE_ANGLE)
+    assert coords.dtype == np.int16 and coords.shape == (HEIGHT, WIDTH, 2)
+    assert weights.dtype == np.uint16 and weights.max() < 1024
+    remapped = cv2.remap(frame, coords, weights, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+    np.testing.assert_array_equal(remapped, reference(frame, WIDE_ANGLE))
+    np.testing.assert_array_equal(emulate(frame, WIDE_ANGLE, (coords, weights)), emulate(frame, WIDE_ANGLE))
+    with pytest.raises(ValueError):
+        remap_tables(frame.shape, KEYSTONE)
+
+
+def test_out_of_frame_pixels_are_black():
+    frame = np.full((HEIGHT, WIDTH, 3), 200, dtype=np.uint8)
+    shift = {"homography": [[1.0, 0.0, 40.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]}
+    output = emulate(frame, shift)
+    assert (output[:, :39] == 0).all() and (output[:, 41:] == 200).all()
+
+
+def test_calibration_files_build_geometry_settings(tmp_path):
+    path = tmp_path / "camera.json"
+    path.write_text(json.dumps(WIDE_ANGLE))
+    calibration = load_calibration(str(path))
+    settings = make_geometry(calibration, settings_factory=types.SimpleNamespace)
+    assert settings.mode == "undistort"
+    assert settings.camera_matrix == np.ravel(WIDE_ANGLE["camera_matrix"]).tolist()
+    assert settings.distortion == WIDE_ANGLE["dist_coeffs"] + [0.0, 0.0, 0.0]
+    assert settings.new_camera_matrix == [0.0] * 9
+
+    settings = make_geometry(KEYSTONE, settings_factory=types.SimpleNamespace)
+    assert settings.mode == "homography" and len(settings.homography) == 9
+
+    path.write_text(json.dumps(dict(WIDE_ANGLE, focal=3.0)))
+    with pytest.raises(ValueError):
+        load_calibration(str(path))
+    with pytest.raises(ValueError):
+        make_geometry(dict(WIDE_ANGLE, **KEYSTONE), settings_factory=types.SimpleNamespace)
+    with pytest.raises(ValueError):
+        remap_tables((HEIGHT, WIDTH), dict(WIDE_ANGLE, dist_coeffs=[0.1] * 12))
+
+
+def test_compare_reports_accuracy_and_timings():
+    result = compare(WIDE_ANGLE, synthetic_frame(160, 120), frames=2, emulated=True)
+    assert result["max_error"] <= 1 and result["opencv_cached_ms"] > 0
+    assert compare(KEYSTONE, synthetic_frame(160, 120), frames=2, emulated=True)["opencv_cached_ms"] is None
+
+
+@pytest.fixture
+def native():
+    dx11_renderer = pytest.importorskip("dx11_renderer")
+    if not hasattr(dx11_renderer, "DX11Renderer"):
+        pytest.skip("Native renderer module is not available")
+    renderer = dx11_renderer.DX11Renderer()
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    return renderer
+
+
+@pytest.mark.parametrize("calibration", [WIDE_ANGLE, KEYSTONE], ids=["undistort", "homography"])
+def test_native_correction_matches_opencv(native, calibration):
+    native.set_geometry(make_geometry(calibration))
+    assert not native.is_identity and native.status.geometryActive
+    frame = synthetic_frame(WIDTH, HEIGHT)
+    output = native.process_frame(frame)
+    result = accuracy(output, reference(frame, calibration).astype(np.float64))
+    assert result["max_error"] <= 1
+
+
+def test_native_tables_are_cached_per_resolution(native):
+    native.set_geometry(make_geometry(WIDE_ANGLE))
+    frame = synthetic_frame(WIDTH, HEIGHT)
+    native.process_frame(frame)
+    native.process_frame(frame)
+    native.process_frame(synthetic_frame(160, 120))
+    native.process_frame(frame)
+    status = native.status
+    assert status.remapTableBuilds == 2
+    assert status.remapTableCacheHits == 1 and status.remapTablesCached == 2
+
+
+def test_native_rejects_singular_homography(native):
+    with pytest.raises(ValueError):
+        native.set_geometry(make_geometry({"homography": np.zeros((3, 3))}))
@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+import types
+import numpy as np
+from dx11_renderer.headless import ConfigParams, FrameClock, HeadlessRunner, send_control
+from dx11_renderer.recording import FrameRecorder
+from dx11_renderer.sinks import CallbackSink, SharedMemoryFrameReader, SharedMemorySink
+
+
+class OffsetRenderer:
+    """Stand-in renderer: adds the brightness parameter to every pixel"""
+
+    def __init__(self):
+        self.offset = 0
+        self.status = types.SimpleNamespace(isInitialized=True)
+
+    def update_processing_params(self, params):
+        self.offset = int(params.brightness)
+
+    def process_frame(self, frame):
+        return (frame.astype(np.int16) + self.offset).clip(0, 255).astype(np.uint8)
+
+
+class Params:
+    brightness = 0.0
+
+
+def make_recording(path, count=20):
+    with FrameRecorder(str(path), (8, 8, 3), fps=100.0) as recorder:
+        for i in range(count):
+            recorder.write(np.full((8, 8, 3), 10, dtype=np.uint8), timestamp=i / 100.0)
+    return str(path)
+
+
+def test_runner_applies_config_and_detects(tmp_path):
+    print("Testing headless runner...")
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"processing": {"brightness": 5.0}}))
+    frames, detections = [], []
+    sink = CallbackSink(lambda frame, info: (frames.append(int(frame[0, 0, 0])),
+                                             detections.append(info["detections"])))
+    runner = HeadlessRunner(make_recording(tmp_path / "feed.dx11raw"), [sink], config=str(config),
+                            detector=lambda frame: [int(frame.mean())], detect_every=5,
+                            renderer_factory=OffsetRenderer, params_factory=Params)
+    status = runner.run()
+    assert status["frames"] == 20 and status["params"] == {"brightness": 5.0}
+    assert frames == [15] * 20
+    assert detections[0] == [15] and detections[4] is detections[0]
+
+
+def test_config_params_reload_on_change(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"processing": {"gamma": 1.5, "contrast": 1.0}}))
+    params = ConfigParams(str(path), poll_interval=0)
+    assert params.poll() == {"gamma": 1.5, "contrast": 1.0}
+    assert params.poll() is None
+    time.sleep(0.01)
+    path.write_text(json.dumps({"processing": {"gamma": 2.0}}))
+    assert params.poll() == {"gamma": 2.0}
+
+
+def test_control_socket_updates_params_and_stops(tmp_path):
+    class Endless:
+        def read(self):
+            return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+        def release(self):
+            pass
+
+    seen = []
+    runner = HeadlessRunner(Endless(), [CallbackSink(lambda frame, info: seen.append(int(frame[0, 0, 0])))],
+                            fps=200, control_address=("127.0.0.1", 0),
+                            renderer_factory=OffsetRenderer, params_factory=Params)
+    thread = threading.Thread(target=runner.run)
+    thread.start()
+    address = runner.control_address
+    assert send_control(("params", {"brightness": 42}), address, runner.authkey) == ("ok",)
+    assert send_control(("params", {"hue_shift": 1}), address, runner.authkey)[0] == "error"
+    time.sleep(0.05)
+    kind, status = send_control(("status",), address, runner.authkey)
+    assert kind == "status" and status["params"]["brightness"] == 42.0
+    assert send_control(("stop",), address, runner.authkey) == ("ok",)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert seen[0] == 0 and seen[-1] == 42
+
+
+def test_control_trace_dumps_stay_in_the_trace_directory(tmp_path):
+    trace_dir = tmp_path / "traces"
+    trace_dir.mkdir()
+    runner = HeadlessRunner(make_recording(tmp_path / "feed.dx11raw"), [], control_address=("127.0.0.1", 0),
+                            renderer_factory=OffsetRenderer, params_factory=Params, trace_dir=str(trace_dir))
+    address, key = runner.control_address, runner.authkey
+    try:
+        assert send_control(("trace", "run.json"), address, key)[0] == "ok"
+        assert (trace_dir / "run.json").exists()
+        for name in ("../escape.json", str(tmp_path / "abs.json"), "sub/x.json", ".."):
+            assert send_control(("trace", name), address, key)[0] == "error"
+        assert not (tmp_path / "escape.json").exists() and not (tmp_path / "abs.json").exists()
+    finally:
+        runner.stop()
+        runner.close()
+
+    unconfigured = HeadlessRunner(make_recording(tmp_path / "feed2.dx11raw"), [], control_address=("127.0.0.1", 0),
+                                  renderer_factory=OffsetRenderer, params_factory=Params)
+    try:
+        assert send_control(("trace", "run.json"), unconfigured.control_address, unconfigured.authkey)[0] == "error"
+    finally:
+        unconfigured.stop()
+        unconfigured.close()
+
+
+def test_frame_clock_paces_and_counts_late_frames():
+    clock = FrameClock(fps=100)
+    start = time.perf_counter()
+    for _ in range(6):
+        clock.wait()
+    assert time.perf_counter() - start >= 0.045
+    time.sleep(0.05)
+    clock.wait()
+    assert clock.late_frames == 1
+
+
+def test_shared_memory_sink_roundtrip():
+    name = f"dx11_test_{id(object())}"
+    sink = SharedMemorySink(name, max_frame_bytes=1024)
+    reader = SharedMemoryFrameReader(name)
+    try:
+        assert reader.read() == (0, None)
+        sink.write(np.full((8, 8, 3), 7, dtype=np.uint8), {"index": 0})
+        sequence, frame = reader.read()
+        assert frame.shape == (8, 8, 3) and (frame == 7).all()
+        assert reader.read(sequence) == (sequence, None)
+    finally:
+        reader.close()
+        sink.close()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+dx11_renderer = pytest.importorskip("dx11_renderer")
+if not hasattr(dx11_renderer, "DX11Renderer"):
+    pytest.skip("Native renderer module is not available", allow_module_level=True)
+
+CATEGORIES = {"textures", "staging", "buffers", "constant_buffers", "host_frames"}
+
+
+@pytest.fixture
+def renderer():
+    renderer = dx11_renderer.DX11Renderer()
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    params = dx11_renderer.ProcessingParams()
+    params.brightness = 1.2
+    renderer.update_processing_params(params)
+    return renderer
+
+
+def test_memory_is_accounted_per_category(renderer):
+    print("Testing memory accounting...")
+    renderer.process_frame(np.zeros((240, 320, 3), dtype=np.uint8))
+    status = renderer.status
+    memory = status.memory
+    assert set(memory) == CATEGORIES
+    assert memory["textures"]["resident"] == 2 * 4 * 320 * 240
+    assert memory["staging"]["resident"] >= 4 * 320 * 240
+    assert memory["host_frames"]["resident"] == 2 * 4 * 320 * 240
+    assert status.gpuMemoryUsage == sum(memory[name]["resident"] for name in CATEGORIES - {"host_frames"})
+
+    renderer.process_frame(np.zeros((120, 160, 3), dtype=np.uint8))
+    memory = renderer.status.memory
+    assert memory["textures"]["resident"] == 2 * 4 * 160 * 120
+    assert memory["textures"]["peak"] == 2 * 4 * 320 * 240
+    assert memory["textures"]["releases"] == 2
+    assert renderer.status.peakMemoryUsage >= status.gpuMemoryUsage + status.hostMemoryUsage
+
+
+def test_budget_refuses_frames_that_do_not_fit(renderer):
+    renderer.process_frame(np.zeros((120, 160, 3), dtype=np.uint8))
+    renderer.memory_budget = renderer.status.gpuMemoryUsage + renderer.status.hostMemoryUsage + 1024
+    with pytest.raises(MemoryError):
+        renderer.process_frame(np.zeros((1080, 1920, 3), dtype=np.uint8))
+    assert renderer.status.budgetRefusals == 1
+    # The renderer keeps working at the size it already holds
+    assert renderer.process_frame(np.zeros((120, 160, 3), dtype=np.uint8)).shape == (120, 160, 3)
+
+
+def test_budget_evicts_temporal_cache_first(renderer):
+    settings = dx11_renderer.TemporalSettings()
+    settings.enabled = True
+    renderer.set_temporal_mode(settings)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    renderer.process_frame(frame)
+    renderer.process_frame(frame)
+    with_cache = renderer.status.hostMemoryUsage
+
+    renderer.memory_budget = renderer.status.gpuMemoryUsage + with_cache - 1
+    status = renderer.status
+    assert status.budgetEvictions == 1 and status.hostMemoryUsage < with_cache
+    # Without room for the cache whole frames are processed
+    renderer.process_frame(frame)
+    assert renderer.status.budgetRefusals >= 1
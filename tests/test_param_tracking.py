@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+dx11_renderer = pytest.importorskip("dx11_renderer")
+if not hasattr(dx11_renderer, "DX11Renderer"):
+    pytest.skip("Native renderer module is not available", allow_module_level=True)
+
+from dx11_renderer.precision import synthetic_frame
+
+
+@pytest.fixture
+def renderer():
+    renderer = dx11_renderer.DX11Renderer()
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    return renderer
+
+
+def params(**fields):
+    p = dx11_renderer.ProcessingParams()
+    for name, value in fields.items():
+        setattr(p, name, value)
+    return p
+
+
+def test_identical_param_updates_are_skipped(renderer):
+    print("Testing parameter change tracking...")
+    renderer.update_processing_params(params(brightness=1.2))
+    before = renderer.status
+    renderer.update_processing_params(params(brightness=1.2))
+    after = renderer.status
+    assert after.paramUpdatesSkipped == before.paramUpdatesSkipped + 1
+    assert after.paramUpdates == before.paramUpdates
+
+    renderer.update_processing_params(params(brightness=1.3))
+    assert renderer.status.paramUpdates == after.paramUpdates + 1
+
+
+def test_unchanged_constants_are_not_uploaded_again(renderer):
+    renderer.update_processing_params(params(brightness=1.2, saturation=1.3))
+    frame = synthetic_frame(320, 240)
+    renderer.process_frame(frame)
+    before = renderer.status
+    renderer.process_frame(frame)
+    after = renderer.status
+    assert after.constantUploadsSkipped == before.constantUploadsSkipped + 1
+    assert after.constantUploads == before.constantUploads
+
+    renderer.update_processing_params(params(brightness=1.1, saturation=1.3))
+    renderer.process_frame(frame)
+    assert renderer.status.constantUploads == after.constantUploads + 1
+
+
+@pytest.mark.parametrize("fields", [{}, {"brightness": 1.0005}, {"saturation": 1.001, "gamma": 1.0005}])
+def test_identity_params_return_the_input_unchanged(renderer, fields):
+    renderer.update_processing_params(params(**fields))
+    frame = synthetic_frame(320, 240)
+    before = renderer.status
+    output = renderer.process_frame(frame)
+    after = renderer.status
+
+    assert output is not frame
+    np.testing.assert_array_equal(output, frame)
+    assert after.identityFrames == before.identityFrames + 1
+    # The GPU was never touched
+    assert after.constantUploads == before.constantUploads
+    assert after.constantUploadsSkipped == before.constantUploadsSkipped
+
+
+def test_visible_changes_are_not_identity(renderer):
+    renderer.update_processing_params(params(brightness=1.01))
+    frame = synthetic_frame(320, 240)
+    assert not np.array_equal(renderer.process_frame(frame), frame)
+    assert renderer.status.identityFrames == 0
+
+
+def test_passthrough_returns_the_input_array(renderer):
+    renderer.zero_copy_passthrough = True
+    frame = synthetic_frame(320, 240)
+    assert renderer.process_frame(frame) is frame
+    status = renderer.status
+    assert status.passthroughFrames == 1 and status.identityFrames == 0
+
+    renderer.update_processing_params(params(brightness=1.2))
+    assert renderer.process_frame(frame) is not frame
+    assert renderer.status.passthroughFrames == 1
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+from dx11_renderer.precision import (PRECISIONS, accuracy, bench, cheapest_meeting, color_matrix, emulate,
+                                     format_report, gamma_lut, reference_process, synthetic_frame)
+
+PARAMS = {"brightness": 1.2, "contrast": 1.1, "saturation": 1.3, "gamma": 0.8}
+HUE_PARAMS = dict(PARAMS, hue=-75.0)
+
+# Accuracy floor per mode against the float64 reference (PSNR dB, max error in levels)
+THRESHOLDS = {"float32": (55.0, 1), "float16": (50.0, 2), "uint8": (45.0, 4)}
+
+
+def test_identity_params_reproduce_input():
+    print("Testing precision modes with identity parameters...")
+    frame = synthetic_frame(64, 48)
+    np.testing.assert_allclose(reference_process(frame, {}), frame, atol=1e-9)
+    for precision in PRECISIONS:
+        np.testing.assert_array_equal(emulate(frame, {}, precision), frame)
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_emulated_modes_meet_accuracy_thresholds(precision):
+    frame = synthetic_frame(320, 240)
+    result = accuracy(emulate(frame, PARAMS, precision), reference_process(frame, PARAMS))
+    min_psnr, max_error = THRESHOLDS[precision]
+    print(f"{precision}: {result['psnr']:.2f} dB, max error {result['max_error']}")
+    assert result["psnr"] >= min_psnr
+    assert result["max_error"] <= max_error
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_hue_costs_no_accuracy(precision):
+    frame = synthetic_frame(320, 240)
+    result = accuracy(emulate(frame, HUE_PARAMS, precision), reference_process(frame, HUE_PARAMS))
+    min_psnr, max_error = THRESHOLDS[precision]
+    assert result["psnr"] >= min_psnr
+    assert result["max_error"] <= max_error
+
+
+def test_hue_matrix_keeps_luma_and_grey():
+    luma = np.array([0.2126, 0.7152, 0.0722])
+    matrix = color_matrix({"hue": 77.0})
+    np.testing.assert_allclose(luma @ matrix, luma, atol=1e-12)
+    np.testing.assert_allclose(matrix @ np.ones(3), np.ones(3), atol=1e-12)
+    np.testing.assert_allclose(color_matrix({"hue": 360.0}), np.eye(3), atol=1e-12)
+    np.testing.assert_allclose(color_matrix({"hue": 50.0}) @ color_matrix({"hue": 70.0}),
+                               color_matrix({"hue": 120.0}), atol=1e-12)
+    # Positive angles run red -> green -> blue, like HSV hue
+    assert np.argmax(color_matrix({"hue": 120.0}) @ [1.0, 0.0, 0.0]) == 1
+    # Without hue the matrix is the old brightness/contrast/saturation chain
+    grey = np.outer(np.ones(3), luma)
+    np.testing.assert_allclose(color_matrix(PARAMS), 1.2 * (grey + 1.1 * 1.3 * (np.eye(3) - grey)), atol=1e-12)
+
+
+def test_gamma_lut_matches_pow():
+    lut = gamma_lut(2.2)
+    assert lut[0] == 0 and lut[255] == 255
+    assert np.all(np.diff(lut) >= 0)
+    assert lut[128] == round(255 * (128 / 255) ** (1 / 2.2))
+
+
+def test_unknown_precision_is_rejected():
+    with pytest.raises(ValueError, match="Unknown precision"):
+        emulate(synthetic_frame(8, 8), PARAMS, "int4")
+
+
+def test_bench_report_recommends_cheapest_mode_meeting_threshold():
+    rows = bench(resolutions=[(64, 48)], frames=1, emulated=True)
+    assert [row["precision"] for row in rows] == list(PRECISIONS)
+
+    rows = [dict(row, ms_per_frame=ms) for row, ms in zip(rows, (3.0, 2.0, 1.0))]
+    assert cheapest_meeting(rows, min_psnr=0)[(64, 48)]["precision"] == "uint8"
+    assert cheapest_meeting(rows, max_error_levels=1)[(64, 48)]["precision"] == "float16"
+    report = format_report(rows, min_psnr=1000)
+    assert "| uint8 | 64x48 |" in report
+    assert "Cheapest mode at 64x48: none meets the threshold" in report
+
+
+@pytest.fixture
+def native():
+    dx11_renderer = pytest.importorskip("dx11_renderer")
+    if not hasattr(dx11_renderer, "DX11Renderer"):
+        pytest.skip("Native renderer module is not available")
+    return dx11_renderer
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_native_modes_match_emulation(native, precision):
+    renderer = native.DX11Renderer(precision)
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    assert renderer.status.precision == getattr(native.Precision, precision.upper())
+
+    params = native.ProcessingParams()
+    for name, value in PARAMS.items():
+        setattr(params, name, value)
+    renderer.update_processing_params(params)
+    frame = synthetic_frame(320, 240)
+    output = renderer.process_frame(frame)
+
+    result = accuracy(output, reference_process(frame, PARAMS))
+    min_psnr, max_error = THRESHOLDS[precision]
+    assert result["psnr"] >= min_psnr
+    assert result["max_error"] <= max_error
+    if precision == "uint8":
+        # The integer pipeline is exact, so the model must match bit for bit
+        np.testing.assert_array_equal(output, emulate(frame, PARAMS, precision))
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_native_hue_matches_emulation(native, precision):
+    renderer = native.DX11Renderer(precision)
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    params = native.ProcessingParams()
+    for name, value in HUE_PARAMS.items():
+        setattr(params, name, value)
+    renderer.update_processing_params(params)
+    frame = synthetic_frame(320, 240)
+    output = renderer.process_frame(frame)
+
+    result = accuracy(output, reference_process(frame, HUE_PARAMS))
+    min_psnr, max_error = THRESHOLDS[precision]
+    assert result["psnr"] >= min_psnr
+    assert result["max_error"] <= max_error
+    if precision == "uint8":
+        np.testing.assert_array_equal(output, emulate(frame, HUE_PARAMS, precision))
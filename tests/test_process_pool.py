@@ -0,0 +1,189 @@
+import os
+import time
+import numpy as np
+import pytest
+from dx11_renderer.process_pool import ShardedRenderPool
+
+
+class InvertRenderer:
+    """Stand-in renderer so the pool can be exercised without a GPU"""
+
+    def __init__(self):
+        self.brightness = 1.0
+
+    def update_processing_params(self, params):
+        self.brightness = params.brightness
+
+    def process_frame(self, frame):
+        if frame[0, 0, 0] == 13:
+            os._exit(3)
+        return 255 - frame
+
+
+class WarmingRenderer(InvertRenderer):
+    """Stand-in that fills each frame with the number of sizes it warmed"""
+
+    def __init__(self):
+        super().__init__()
+        self.warmed = []
+
+    def warmup(self, resolutions):
+        if (0, 0) in resolutions:
+            raise ValueError("Cannot warm up 0x0 frames")
+        self.warmed.extend(resolutions)
+
+    def process_frame(self, frame):
+        frame = super().process_frame(frame)
+        frame[...] = len(self.warmed)
+        return frame
+
+
+class Params:
+    brightness = 1.0
+
+
+def count_pixels(frame):
+    return [[0, 0, frame.shape[1], frame.shape[0], 1.0, 0]]
+
+
+def frame_detector():
+    return count_pixels
+
+
+def collect(pool, count, timeout=10.0):
+    results = []
+    deadline = time.monotonic() + timeout
+    while len(results) < count and time.monotonic() < deadline:
+        result = pool.get(timeout=0.5)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def test_sharded_processing():
+    print("Testing sharded rendering over shared memory...")
+    with ShardedRenderPool(num_workers=2, renderer_factory=InvertRenderer,
+                           params_factory=Params, detector_factory=frame_detector,
+                           max_frame_shape=(120, 160, 3)) as pool:
+        submitted = {}
+        for i in range(12):
+            stream = f"camera-{i % 4}"
+            frame = np.full((120, 160, 3), i, dtype=np.uint8)
+            submitted[pool.submit(stream, frame)] = (stream, i)
+
+        results = collect(pool, len(submitted))
+        assert len(results) == len(submitted)
+        for result in results:
+            stream, value = submitted[result.frame_id]
+            assert result.error is None
+            assert result.stream_id == stream
+            assert (result.frame == 255 - value).all()
+            assert result.detections[0][2:4] == [160, 120]
+        print(f"Processed {len(results)} frames, stats: {dict(pool.stats)}")
+
+
+def test_stream_assignment_is_stable():
+    with ShardedRenderPool(num_workers=3, renderer_factory=InvertRenderer,
+                           params_factory=Params, max_frame_shape=(8, 8, 3)) as pool:
+        for stream in ["a", "b", "camera-7", 42]:
+            assert pool.worker_for(stream) == pool.worker_for(stream)
+            assert 0 <= pool.worker_for(stream) < 3
+
+
+def test_worker_respawn():
+    print("Testing worker respawn...")
+    with ShardedRenderPool(num_workers=1, renderer_factory=InvertRenderer,
+                           params_factory=Params, max_frame_shape=(8, 8, 3)) as pool:
+        crashed = pool.submit("cam", np.full((8, 8, 3), 13, dtype=np.uint8))
+        failed = collect(pool, 1)
+        assert failed and failed[0].frame_id == crashed and failed[0].error
+
+        ok = pool.submit("cam", np.zeros((8, 8, 3), dtype=np.uint8), timeout=10.0)
+        results = collect(pool, 1)
+        assert results and results[0].frame_id == ok and results[0].error is None
+        assert pool.stats["respawned"] == 1
+
+
+def test_warmup_reaches_every_worker_before_its_next_frame():
+    with ShardedRenderPool(num_workers=2, renderer_factory=WarmingRenderer,
+                           params_factory=Params, max_frame_shape=(8, 8, 3)) as pool:
+        pool.warmup([(8, 8), (4, 4)])
+        for stream in range(8):
+            pool.submit(stream, np.zeros((8, 8, 3), dtype=np.uint8))
+        results = collect(pool, 8)
+        assert len(results) == 8 and all((result.frame == 2).all() for result in results)
+
+        # A respawned worker warms up again
+        crashed = pool.submit(0, np.full((8, 8, 3), 13, dtype=np.uint8))
+        assert collect(pool, 1)[0].frame_id == crashed
+        pool.submit(0, np.zeros((8, 8, 3), dtype=np.uint8), timeout=10.0)
+        results = collect(pool, 1)
+        assert results and results[0].error is None and (results[0].frame == 2).all()
+
+        # A failed warmup leaves the worker running
+        pool.warmup([(0, 0)])
+        pool.submit(0, np.zeros((8, 8, 3), dtype=np.uint8))
+        results = collect(pool, 1)
+        assert results and results[0].error is None and (results[0].frame == 2).all()
+
+
+def test_worker_dying_during_submit_keeps_slots_consistent():
+    with ShardedRenderPool(num_workers=1, renderer_factory=InvertRenderer, params_factory=Params,
+                           slots_per_worker=2, max_frame_shape=(8, 8, 3)) as pool:
+        worker = pool._workers[0]
+        write = worker.in_ring.write
+
+        def dying_write(slot, frame):
+            # The collector fails the frame and respawns the worker mid-write
+            worker.process.kill()
+            deadline = time.monotonic() + 10.0
+            while pool.stats["respawned"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            write(slot, frame)
+
+        worker.in_ring.write = dying_write
+        lost = pool.submit("cam", np.zeros((8, 8, 3), dtype=np.uint8))
+        worker.in_ring.write = write
+        failed = collect(pool, 1)
+        assert failed and failed[0].frame_id == lost and failed[0].error
+
+        ids = [pool.submit("cam", np.full((8, 8, 3), i, dtype=np.uint8), timeout=10.0) for i in range(6)]
+        results = collect(pool, 6)
+        assert [result.frame_id for result in results] == ids
+        assert all(result.error is None for result in results)
+        assert pool.get(timeout=0.5) is None
+        assert sorted(worker.free_slots) == [0, 1]
+
+
+def test_rejected_frames_do_not_hold_slots():
+    with ShardedRenderPool(num_workers=1, renderer_factory=InvertRenderer, params_factory=Params,
+                           slots_per_worker=2, max_frame_shape=(8, 8, 3)) as pool:
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                pool.submit("cam", np.zeros((16, 16, 3), dtype=np.uint8))
+        # A write that fails gives its slot back
+        worker = pool._workers[0]
+        write = worker.in_ring.write
+
+        def failing_write(slot, frame):
+            raise OSError("shared memory unavailable")
+
+        worker.in_ring.write = failing_write
+        for _ in range(3):
+            with pytest.raises(OSError):
+                pool.submit("cam", np.zeros((8, 8, 3), dtype=np.uint8), timeout=1.0)
+        worker.in_ring.write = write
+        assert pool.pending() == 0
+        ids = [pool.submit("cam", np.zeros((8, 8, 3), dtype=np.uint8), timeout=5.0) for _ in range(3)]
+        results = collect(pool, 3)
+        assert [result.frame_id for result in results] == ids
+        assert all(result.error is None for result in results)
+
+
+if __name__ == "__main__":
+    test_sharded_processing()
+    test_stream_assignment_is_stable()
+    test_worker_respawn()
+    test_warmup_reaches_every_worker_before_its_next_frame()
+    test_worker_dying_during_submit_keeps_slots_consistent()
+    test_rejected_frames_do_not_hold_slots()
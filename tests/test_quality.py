@@ -0,0 +1,73 @@
+import logging
+import numpy as np
+from dx11_renderer.headless import HeadlessRunner
+from dx11_renderer.quality import AdaptiveQualityController, QualityLevel
+from dx11_renderer.sinks import CallbackSink
+
+LADDER = (QualityLevel("full"), QualityLevel("detect/2", detect_every=2), QualityLevel("half", scale=0.5))
+
+
+def run_frames(controller, count, ms):
+    for _ in range(count):
+        controller.end_frame(ms / 1000.0)
+
+
+def test_degrades_and_recovers_with_hysteresis(caplog):
+    print("Testing adaptive quality ladder...")
+    controller = AdaptiveQualityController(budget_ms=10.0, ladder=LADDER, window=5, cooldown=5,
+                                           recover_ratio=0.7, recover_frames=10)
+    with caplog.at_level(logging.INFO, logger="dx11_renderer.quality"):
+        run_frames(controller, 5, 15.0)
+        assert controller.level.name == "detect/2"
+        # Cooldown: the next window must fill before another step
+        run_frames(controller, 4, 15.0)
+        assert controller.index == 1
+        run_frames(controller, 1, 15.0)
+        assert controller.level.name == "half"
+        run_frames(controller, 20, 15.0)
+        assert controller.level.name == "half"
+
+        # Just under budget is not enough headroom to step back up
+        run_frames(controller, 50, 9.0)
+        assert controller.level.name == "half"
+        run_frames(controller, 14, 5.0)
+        assert controller.level.name == "detect/2"
+
+    status = controller.status()
+    assert [(c["from"], c["to"], c["reason"]) for c in status["changes"]] == [
+        ("full", "detect/2", "over budget"), ("detect/2", "half", "over budget"), ("half", "detect/2", "headroom")]
+    assert len([r for r in caplog.records if "Quality" in r.getMessage()]) == 3
+
+
+def test_runner_applies_levels():
+    class Endless:
+        def read(self):
+            return True, np.zeros((40, 60, 3), dtype=np.uint8)
+
+        def release(self):
+            pass
+
+    class Renderer:
+        shapes = []
+
+        def update_processing_params(self, params):
+            pass
+
+        def process_frame(self, frame):
+            self.shapes.append(frame.shape)
+            return frame
+
+    class Params:
+        pass
+
+    controller = AdaptiveQualityController(budget_ms=10.0, ladder=LADDER, window=3, cooldown=3)
+    # Force the slowest level
+    controller.index = 2
+    outputs, detected = [], []
+    runner = HeadlessRunner(Endless(), [CallbackSink(lambda frame, info: outputs.append(frame.shape))],
+                            detector=lambda frame: detected.append(1), max_frames=4, quality=controller,
+                            renderer_factory=Renderer, params_factory=Params)
+    status = runner.run()
+    assert Renderer.shapes[0] == (20, 30, 3)
+    assert outputs[0] == (40, 60, 3)
+    assert set(status["quality"]["stages_ms"]) >= {"capture", "process", "detect", "sinks"}
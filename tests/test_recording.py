@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+import pytest
+from dx11_renderer.recording import FrameRecorder, ReplaySource, open_capture, read_header
+
+
+def record_frames(path, count=10, shape=(24, 40, 3), chunk_frames=4):
+    with FrameRecorder(str(path), shape, fps=50.0, chunk_frames=chunk_frames) as recorder:
+        for i in range(count):
+            recorder.write(np.full(shape, i, dtype=np.uint8), timestamp=i * 0.02)
+    return recorder
+
+
+def test_roundtrip_is_zero_copy(tmp_path):
+    print("Testing recording roundtrip...")
+    path = tmp_path / "feed.dx11raw"
+    record_frames(path)
+    assert read_header(str(path)) == ((24, 40, 3), 10, 50.0)
+
+    source = ReplaySource(str(path), realtime=False)
+    assert source.isOpened()
+    assert source.get(cv2.CAP_PROP_FRAME_WIDTH) == 40
+    assert source.get(cv2.CAP_PROP_FRAME_COUNT) == 10
+    frames = []
+    while True:
+        ok, frame = source.read()
+        if not ok:
+            break
+        assert frame.flags.c_contiguous and not frame.flags.writeable
+        assert isinstance(frame.base, np.memmap) or isinstance(frame, np.memmap)
+        frames.append(int(frame[0, 0, 0]))
+    assert frames == list(range(10))
+    source.release()
+
+
+def test_realtime_replay_follows_timestamps(tmp_path):
+    path = tmp_path / "feed.dx11raw"
+    record_frames(path, count=6)
+    source = open_capture(str(path))
+    start = cv2.getTickCount()
+    while source.read()[0]:
+        pass
+    elapsed = (cv2.getTickCount() - start) / cv2.getTickFrequency()
+    assert elapsed >= 0.09
+
+
+def test_seek_and_loop(tmp_path):
+    path = tmp_path / "feed.dx11raw"
+    record_frames(path, count=3)
+    source = ReplaySource(str(path), realtime=False, loop=True)
+    assert source.set(cv2.CAP_PROP_POS_FRAMES, 2)
+    assert [int(source.read()[1][0, 0, 0]) for _ in range(3)] == [2, 0, 1]
+
+
+def test_rejects_mismatched_frames(tmp_path):
+    with FrameRecorder(str(tmp_path / "feed.dx11raw"), (8, 8, 3)) as recorder:
+        with pytest.raises(ValueError):
+            recorder.write(np.zeros((8, 9, 3), dtype=np.uint8))
+
+
+def test_unclosed_recording_keeps_its_frames(tmp_path):
+    path = str(tmp_path / "feed.dx11raw")
+    recorder = FrameRecorder(path, (8, 8, 3), chunk_frames=4)
+    for i in range(6):
+        recorder.write(np.full((8, 8, 3), i, dtype=np.uint8), timestamp=i * 0.02)
+    # Growing past the first chunk recorded the frames written until then
+    assert read_header(path)[1] == 4
+    recorder.flush()
+    assert read_header(path)[1] == 6
+
+    # As if the process died here: the file was never closed or trimmed
+    source = ReplaySource(path, realtime=False)
+    assert [int(source.read()[1][0, 0, 0]) for _ in range(6)] == list(range(6))
+    assert not source.read()[0]
+    source.release()
+    recorder.close()
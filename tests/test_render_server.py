@@ -0,0 +1,188 @@
+import socket
+import threading
+import time
+import types
+from multiprocessing.connection import Client
+import numpy as np
+import pytest
+from dx11_renderer.process_pool import FrameRing
+from dx11_renderer.server import RenderClient, RenderServer
+
+
+class OffsetRenderer:
+    """Stand-in renderer: adds the brightness parameter to every pixel"""
+
+    def __init__(self):
+        self.offset = 0
+        self.status = types.SimpleNamespace(isInitialized=True, textureWidth=0, textureHeight=0)
+
+    def update_processing_params(self, params):
+        self.offset = int(params.brightness)
+
+    def process_frame(self, frame):
+        self.status.textureWidth = frame.shape[1]
+        self.status.textureHeight = frame.shape[0]
+        return (frame.astype(np.int16) + self.offset).clip(0, 255).astype(np.uint8)
+
+
+class Params:
+    brightness = 0.0
+
+
+@pytest.fixture
+def server():
+    with RenderServer(("127.0.0.1", 0), renderer_factory=OffsetRenderer,
+                      params_factory=Params, num_renderers=2,
+                      max_slots_per_client=3) as server:
+        server.start()
+        yield server
+
+
+def test_process_frame_roundtrip(server):
+    print("Testing render server roundtrip...")
+    with RenderClient(server.address, server.authkey, max_frame_shape=(48, 64, 3)) as client:
+        frame = np.full((48, 64, 3), 10, dtype=np.uint8)
+        assert (client.process_frame(frame) == 10).all()
+
+        params = types.SimpleNamespace(brightness=5.0, contrast=1.0, saturation=1.0, gamma=1.0)
+        client.update_processing_params(params)
+        assert (client.process_frame(frame) == 15).all()
+
+        status = client.status
+        assert status.isInitialized
+        assert (status.textureWidth, status.textureHeight) == (64, 48)
+
+
+def test_pipelined_requests_respect_quota(server):
+    with RenderClient(server.address, server.authkey, slots=8, max_frame_shape=(16, 16, 3)) as client:
+        assert client.quota == 3
+        ids = [client.submit(np.full((16, 16, 3), i, dtype=np.uint8)) for i in range(10)]
+        for i, request_id in enumerate(ids):
+            assert (client.result(request_id) == i).all()
+    assert server.stats["rejected"] == 0
+
+
+def test_clients_are_isolated(server):
+    with RenderClient(server.address, server.authkey, max_frame_shape=(8, 8, 3)) as a, \
+         RenderClient(server.address, server.authkey, max_frame_shape=(8, 8, 3)) as b:
+        a.update_processing_params(types.SimpleNamespace(brightness=100.0))
+        frame = np.zeros((8, 8, 3), dtype=np.uint8)
+        assert (a.process_frame(frame) == 100).all()
+        assert (b.process_frame(frame) == 0).all()
+
+
+def test_oversized_frame_is_rejected(server):
+    with RenderClient(server.address, server.authkey, max_frame_shape=(8, 8, 3)) as client:
+        with pytest.raises(ValueError):
+            client.process_frame(np.zeros((16, 16, 3), dtype=np.uint8))
+
+
+class BudgetedRenderer(OffsetRenderer):
+    """Stand-in renderer refusing frames larger than its memory budget"""
+
+    memory_budget = 0
+
+    def process_frame(self, frame):
+        if self.memory_budget and frame.nbytes * 5 > self.memory_budget:
+            raise MemoryError(f"Memory budget of {self.memory_budget} bytes cannot hold {frame.shape}")
+        return super().process_frame(frame)
+
+
+def test_memory_budget_refusals_are_reported_per_frame():
+    with RenderServer(("127.0.0.1", 0), renderer_factory=BudgetedRenderer, params_factory=Params,
+                      memory_budget=5 * 16 * 16 * 3) as server:
+        server.start()
+        with RenderClient(server.address, server.authkey, max_frame_shape=(32, 32, 3)) as client:
+            with pytest.raises(RuntimeError, match="MemoryError"):
+                client.process_frame(np.zeros((32, 32, 3), dtype=np.uint8))
+            # The renderer keeps serving frames that fit
+            assert (client.process_frame(np.zeros((16, 16, 3), dtype=np.uint8)) == 0).all()
+        assert server.stats["failed"] == 1
+
+
+def test_connections_need_the_server_key(server, monkeypatch):
+    monkeypatch.delenv("DX11_RENDER_AUTHKEY", raising=False)
+    with pytest.raises(ValueError):
+        RenderClient(server.address)
+    with pytest.raises(Exception):
+        RenderClient(server.address, b"dx11_renderer", max_frame_shape=(8, 8, 3))
+    assert len(server.authkey) == 32
+    with RenderServer(("127.0.0.1", 0), renderer_factory=OffsetRenderer) as other:
+        assert other.authkey != server.authkey
+
+
+def test_silent_connection_does_not_block_other_clients():
+    with RenderServer(("127.0.0.1", 0), renderer_factory=OffsetRenderer, params_factory=Params,
+                      handshake_timeout=0.5) as server:
+        server.start()
+        # Connects but never answers the authentication challenge
+        with socket.create_connection(server.address, timeout=5):
+            start = time.monotonic()
+            with RenderClient(server.address, server.authkey, max_frame_shape=(8, 8, 3)) as client:
+                assert (client.process_frame(np.zeros((8, 8, 3), dtype=np.uint8)) == 0).all()
+            assert time.monotonic() - start < 0.5
+            deadline = time.monotonic() + 5
+            while not server.stats["unauthenticated"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert server.stats["unauthenticated"] == 1
+
+
+def test_ring_larger_than_its_segment_is_refused(server):
+    ring = FrameRing(2, 64)
+    try:
+        with Client(server.address, authkey=server.authkey) as conn:
+            conn.send(("hello", ring.name, 1000, 1 << 20))
+            kind, message = conn.recv()
+        assert kind == "error" and "holds" in message
+        with Client(server.address, authkey=server.authkey) as conn:
+            conn.send(("hello", ring.name, -1, 64))
+            assert conn.recv()[0] == "error"
+    finally:
+        ring.close()
+    assert server.stats["refused"] == 2
+
+
+class GatedRenderer(OffsetRenderer):
+    """Stand-in renderer that holds every frame until the gate opens"""
+
+    gate = threading.Event()
+
+    def process_frame(self, frame):
+        self.gate.wait(5)
+        return super().process_frame(frame)
+
+
+def test_bad_requests_are_rejected():
+    GatedRenderer.gate.clear()
+    with RenderServer(("127.0.0.1", 0), renderer_factory=GatedRenderer, params_factory=Params,
+                      max_slots_per_client=2, max_frame_bytes=8 * 8 * 3) as server:
+        server.start()
+        ring = FrameRing(4, 16 * 16 * 3)
+        try:
+            with Client(server.address, authkey=server.authkey) as conn:
+                conn.send(("hello", ring.name, 4, ring.slot_bytes))
+                assert conn.recv() == ("welcome", 2)
+                conn.send(("process", 0, 9, (8, 8, 3)))
+                conn.send(("process", 1, 0, (16, 16, 3)))
+                conn.send(("process", 2, 0, (8, -8, 3)))
+                replies = {conn.recv()[1]: None for _ in range(3)}
+                assert sorted(replies) == [0, 1, 2]
+
+                # Two requests fill the quota while the renderer is held; the third bounces
+                for request_id in (3, 4, 5):
+                    conn.send(("process", request_id, request_id - 3, (8, 8, 3)))
+                rejected = conn.recv()
+                assert rejected[1] == 5 and "Quota" in rejected[3]
+                GatedRenderer.gate.set()
+                results = sorted(conn.recv()[1:4:2] for _ in range(2))
+                assert results == [(3, None), (4, None)]
+                conn.send(("close",))
+        finally:
+            GatedRenderer.gate.set()
+            ring.close()
+        time.sleep(0.05)
+        assert server.stats["rejected"] == 4 and server.stats["processed"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
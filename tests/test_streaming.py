@@ -0,0 +1,116 @@
+import http.client
+import socket
+import threading
+import time
+import cv2
+import numpy as np
+import pytest
+from dx11_renderer.streaming import StreamingSink, read_raw_frame
+
+
+@pytest.fixture
+def sink():
+    sink = StreamingSink(http_address=("127.0.0.1", 0), raw_address=("127.0.0.1", 0), encode_workers=1)
+    stop = threading.Event()
+
+    def feed():
+        index = 0
+        while not stop.is_set():
+            sink.write(np.full((480, 640, 3), index % 256, dtype=np.uint8), {"index": index})
+            index += 1
+            time.sleep(0.002)
+
+    thread = threading.Thread(target=feed, daemon=True)
+    thread.start()
+    yield sink
+    stop.set()
+    thread.join()
+    sink.close()
+
+
+def read_mjpeg_parts(response, count):
+    parts = []
+    while len(parts) < count:
+        line = response.fp.readline()
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+            response.fp.readline()
+            parts.append(response.fp.read(length))
+    return parts
+
+
+def test_mjpeg_clients_share_one_encode(sink):
+    print("Testing MJPEG streaming...")
+    connections = [http.client.HTTPConnection("127.0.0.1", sink.http_port, timeout=5) for _ in range(3)]
+    responses = []
+    for conn in connections:
+        conn.request("GET", "/stream.mjpg")
+        response = conn.getresponse()
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("multipart/x-mixed-replace")
+        responses.append(response)
+    for response in responses:
+        for data in read_mjpeg_parts(response, 3):
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            assert image.shape == (480, 640, 3)
+    for conn in connections:
+        conn.close()
+    print(dict(sink.stats))
+
+
+def count_encodes(monkeypatch, viewers, frames=8):
+    """JPEG encodes for ``frames`` frames streamed to ``viewers`` MJPEG clients"""
+    calls = []
+    imencode = cv2.imencode
+
+    def counting_imencode(*args):
+        calls.append(args[0])
+        return imencode(*args)
+
+    monkeypatch.setattr(cv2, "imencode", counting_imencode)
+    # Enough encoders that no frame is dropped for a busy one
+    sink = StreamingSink(http_address=("127.0.0.1", 0), encode_workers=frames)
+    connections = [http.client.HTTPConnection("127.0.0.1", sink.http_port, timeout=5) for _ in range(viewers)]
+    responses = []
+    try:
+        for conn in connections:
+            conn.request("GET", "/stream.mjpg")
+            responses.append(conn.getresponse())
+            assert responses[-1].status == 200
+        deadline = time.monotonic() + 5.0
+        while sink.stats["clients"] < viewers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for index in range(frames):
+            sink.write(np.full((48, 64, 3), index, dtype=np.uint8), {"index": index})
+            while sink.stats["encoded"] <= index and time.monotonic() < deadline:
+                time.sleep(0.001)
+        assert sink.stats["encode_dropped"] == 0
+    finally:
+        for conn in connections:
+            conn.close()
+        sink.close()
+    return len(calls)
+
+
+def test_encode_count_does_not_depend_on_viewers(monkeypatch):
+    assert count_encodes(monkeypatch, viewers=1) == 8
+    assert count_encodes(monkeypatch, viewers=4) == 8
+
+
+def test_snapshot(sink):
+    conn = http.client.HTTPConnection("127.0.0.1", sink.http_port, timeout=5)
+    conn.request("GET", "/snapshot.jpg")
+    response = conn.getresponse()
+    assert response.status == 200 and response.getheader("Content-Type") == "image/jpeg"
+    assert cv2.imdecode(np.frombuffer(response.read(), dtype=np.uint8), cv2.IMREAD_COLOR) is not None
+    conn.close()
+
+
+def test_slow_raw_client_drops_frames(sink):
+    with socket.create_connection(("127.0.0.1", sink.raw_port), timeout=5) as sock:
+        first = read_raw_frame(sock)
+        assert first.shape == (480, 640, 3)
+        time.sleep(0.2)
+        read_raw_frame(sock)
+        read_raw_frame(sock)
+    assert sink.stats["client_dropped"] > 0
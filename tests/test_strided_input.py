@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+dx11_renderer = pytest.importorskip("dx11_renderer")
+if not hasattr(dx11_renderer, "DX11Renderer"):
+    pytest.skip("Native renderer module is not available", allow_module_level=True)
+
+from dx11_renderer.precision import synthetic_frame
+
+
+@pytest.fixture
+def renderer():
+    renderer = dx11_renderer.DX11Renderer()
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    params = dx11_renderer.ProcessingParams()
+    params.brightness = 1.2
+    params.saturation = 1.3
+    renderer.update_processing_params(params)
+    return renderer
+
+
+def strided_views():
+    frame = synthetic_frame(320, 240)
+    bgra = np.dstack([frame, np.full(frame.shape[:2], 7, dtype=np.uint8)])
+    padded = np.zeros((240, 400, 3), dtype=np.uint8)
+    padded[:, :320] = frame
+    return {
+        "crop": frame[16:200, 24:296],
+        "padded rows": padded[:, :320],
+        "vertical flip": frame[::-1],
+        "horizontal flip": frame[:, ::-1],
+        "channels reversed": frame[..., ::-1],
+        "bgra backed": bgra[..., :3],
+        "every other pixel": frame[::2, ::2],
+    }
+
+
+@pytest.mark.parametrize("name", list(strided_views()))
+def test_strided_views_match_contiguous_copies(renderer, name):
+    view = strided_views()[name]
+    assert not view.flags.c_contiguous
+    expected = renderer.process_frame(np.ascontiguousarray(view)).copy()
+    before = renderer.status.stridedFrames
+
+    np.testing.assert_array_equal(renderer.process_frame(view), expected)
+    status = renderer.status
+    assert status.stridedFrames == before + 1
+    assert status.inputCopies == 0
+
+
+def test_contiguous_frames_are_not_counted(renderer):
+    renderer.process_frame(synthetic_frame(160, 120))
+    assert renderer.status.stridedFrames == 0
+
+
+def test_temporal_mode_counts_its_copies(renderer):
+    settings = dx11_renderer.TemporalSettings()
+    settings.enabled = True
+    renderer.set_temporal_mode(settings)
+    frame = synthetic_frame(320, 240)
+    # A crop is still a cv::Mat; a flip has to be copied for the change cache
+    renderer.process_frame(frame[8:200, 8:300])
+    assert renderer.status.inputCopies == 0
+    expected = renderer.process_frame(np.ascontiguousarray(frame[::-1])).copy()
+    np.testing.assert_array_equal(renderer.process_frame(frame[::-1]), expected)
+    assert renderer.status.inputCopies == 1
+
+
+def test_passthrough_returns_the_view_itself(renderer):
+    renderer.update_processing_params(dx11_renderer.ProcessingParams())
+    renderer.zero_copy_passthrough = True
+    view = synthetic_frame(320, 240)[:, ::-1]
+    assert renderer.process_frame(view) is view
+    renderer.zero_copy_passthrough = False
+    np.testing.assert_array_equal(renderer.process_frame(view), view)
+
+
+def test_other_dtypes_are_rejected(renderer):
+    with pytest.raises(TypeError):
+        renderer.process_frame(np.zeros((120, 160, 3), dtype=np.float32))
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+dx11_renderer = pytest.importorskip("dx11_renderer")
+if not hasattr(dx11_renderer, "DX11Renderer"):
+    pytest.skip("Native renderer module is not available", allow_module_level=True)
+
+from dx11_renderer.precision import synthetic_frame
+
+
+def make_renderer(temporal=None):
+    renderer = dx11_renderer.DX11Renderer()
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    params = dx11_renderer.ProcessingParams()
+    params.brightness = 1.2
+    params.saturation = 1.3
+    renderer.update_processing_params(params)
+    if temporal is not None:
+        renderer.set_temporal_mode(temporal)
+    return renderer
+
+
+def temporal_settings(full_frame_ratio=0.5):
+    settings = dx11_renderer.TemporalSettings()
+    settings.enabled = True
+    settings.tile_size = 64
+    settings.sample_stride = 1
+    settings.full_frame_ratio = full_frame_ratio
+    return settings
+
+
+def test_static_frames_are_skipped():
+    print("Testing temporal change detection...")
+    renderer = make_renderer(temporal_settings())
+    frame = synthetic_frame(320, 240)
+    first = renderer.process_frame(frame).copy()
+    assert renderer.status.dirtyTileRatio == 1.0
+    np.testing.assert_array_equal(renderer.process_frame(frame), first)
+    status = renderer.status
+    assert status.skippedFrames == 1 and status.dirtyTiles == 0
+    assert status.totalTiles == 5 * 4
+
+
+def test_partial_frames_match_full_processing():
+    temporal = make_renderer(temporal_settings())
+    reference = make_renderer()
+    frame = synthetic_frame(320, 240)
+    temporal.process_frame(frame)
+
+    changed = frame.copy()
+    changed[10:50, 200:260] = 255 - changed[10:50, 200:260]
+    output = temporal.process_frame(changed)
+    status = temporal.status
+    assert 0 < status.dirtyTiles < status.totalTiles
+    assert status.dirtyTileRatio < 0.5
+    np.testing.assert_array_equal(output, reference.process_frame(changed))
+
+
+def test_first_frame_and_resize_process_whole_frames():
+    # Even a ratio that never triggers full frames cannot patch an empty cache
+    renderer = make_renderer(temporal_settings(full_frame_ratio=1.0))
+    reference = make_renderer()
+    for width, height in ((320, 240), (160, 120), (320, 240)):
+        frame = synthetic_frame(width, height)
+        np.testing.assert_array_equal(renderer.process_frame(frame), reference.process_frame(frame))
+    assert renderer.status.dirtyTileRatio == 1.0
+
+
+def test_parameter_change_invalidates_the_cache():
+    renderer = make_renderer(temporal_settings())
+    frame = synthetic_frame(320, 240)
+    renderer.process_frame(frame)
+    params = dx11_renderer.ProcessingParams()
+    params.gamma = 0.8
+    renderer.update_processing_params(params)
+    renderer.process_frame(frame)
+    assert renderer.status.skippedFrames == 0 and renderer.status.dirtyTileRatio == 1.0
+
+
+def test_full_frame_ratio_is_validated():
+    renderer = make_renderer()
+    for ratio in (-0.1, 1.5, float("nan")):
+        with pytest.raises(ValueError):
+            renderer.set_temporal_mode(temporal_settings(ratio))
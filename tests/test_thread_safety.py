@@ -0,0 +1,121 @@
+import threading
+import time
+import numpy as np
+import pytest
+
+dx11_renderer = pytest.importorskip("dx11_renderer")
+if not hasattr(dx11_renderer, "DX11Renderer"):
+    pytest.skip("Native renderer module is not available", allow_module_level=True)
+
+THREADS = 8
+ITERATIONS = 40
+
+
+@pytest.fixture
+def renderer():
+    renderer = dx11_renderer.DX11Renderer()
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    return renderer
+
+
+def hammer(worker, threads=THREADS):
+    errors = []
+
+    def run(index):
+        try:
+            worker(index)
+        except Exception as e:
+            errors.append(e)
+
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def test_concurrent_frames_match_serial_results(renderer):
+    print("Testing concurrent process_frame...")
+    params = dx11_renderer.ProcessingParams()
+    params.brightness, params.contrast, params.gamma = 1.2, 1.1, 0.9
+    renderer.update_processing_params(params)
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (120 + 8 * i, 160 + 8 * i, 3), dtype=np.uint8) for i in range(THREADS)]
+    expected = [renderer.process_frame(frame) for frame in frames]
+
+    def worker(index):
+        # Alternate sizes across threads so texture re-creation races too
+        for i in range(ITERATIONS):
+            k = (index + i) % THREADS
+            assert np.array_equal(renderer.process_frame(frames[k]), expected[k])
+
+    hammer(worker)
+
+
+def test_concurrent_params_status_and_frames(renderer):
+    frame = np.full((240, 320, 3), 128, dtype=np.uint8)
+
+    def worker(index):
+        params = dx11_renderer.ProcessingParams()
+        for i in range(ITERATIONS):
+            params.brightness = 0.5 + (index * ITERATIONS + i) % 10 / 10.0
+            renderer.update_processing_params(params)
+            assert renderer.process_frame(frame).shape == frame.shape
+            status = renderer.status
+            assert (status.textureWidth, status.textureHeight) == (320, 240)
+            assert renderer.get_histogram().shape == (256,)
+
+    hammer(worker)
+    assert renderer.status.lastError == ""
+
+
+def test_passthrough_path_from_many_threads(renderer):
+    # Identity parameters with zero-copy never touch the GPU
+    renderer.update_processing_params(dx11_renderer.ProcessingParams())
+    renderer.zero_copy_passthrough = True
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    before = renderer.status.passthroughFrames
+
+    def worker(index):
+        for _ in range(ITERATIONS * 10):
+            assert renderer.process_frame(frame) is frame
+
+    hammer(worker)
+    assert renderer.status.passthroughFrames - before == THREADS * ITERATIONS * 10
+
+
+def test_gil_is_released_during_processing(renderer):
+    params = dx11_renderer.ProcessingParams()
+    params.brightness = 1.3
+    renderer.update_processing_params(params)
+    frame = np.random.default_rng(1).integers(0, 255, (2160, 3840, 3), dtype=np.uint8)
+    renderer.process_frame(frame)
+
+    ticks = []
+    running = threading.Event()
+    running.set()
+
+    def ticker():
+        while running.is_set():
+            ticks.append(time.perf_counter())
+
+    thread = threading.Thread(target=ticker)
+    thread.start()
+    try:
+        started = time.perf_counter()
+        for _ in range(5):
+            renderer.process_frame(frame)
+        call_time = (time.perf_counter() - started) / 5
+    finally:
+        running.clear()
+        thread.join()
+
+    if call_time < 0.02:
+        pytest.skip(f"Frames process too fast ({call_time * 1000:.1f} ms) to observe GIL hand-off")
+    gaps = np.diff([t for t in ticks if t >= started])
+    # With the GIL held, the ticker would stall for a whole call at a time
+    assert gaps.max() < call_time * 0.5
@@ -0,0 +1,110 @@
+import tracemalloc
+import cv2
+import numpy as np
+import pytest
+from dx11_renderer.tiled import (MAX_TEXTURE_SIZE, TiledProcessor, create_image, iter_tiles, open_image,
+                                 tile_size_for_budget)
+
+
+class BlurRenderer:
+    """Stand-in renderer with a neighbourhood operation, recording frame shapes"""
+
+    def __init__(self):
+        self.shapes = set()
+
+    def update_processing_params(self, params):
+        pass
+
+    def process_frame(self, frame):
+        self.shapes.add(frame.shape)
+        return cv2.blur(frame, (5, 5), borderType=cv2.BORDER_REPLICATE)
+
+
+class InvertRenderer(BlurRenderer):
+    def process_frame(self, frame):
+        return 255 - frame
+
+
+class Params:
+    pass
+
+
+def make_image(height, width, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def test_halo_makes_tiles_seamless(tmp_path):
+    print("Testing tiled processing...")
+    image = make_image(300, 500)
+    np.save(tmp_path / "in.npy", image)
+    source = open_image(str(tmp_path / "in.npy"))
+    output = create_image(str(tmp_path / "out.npy"), source.shape)
+
+    renderer = BlurRenderer()
+    processor = TiledProcessor(128, halo=2, renderer_factory=lambda: renderer, params_factory=Params)
+    stats = processor.process(source, output)
+    print(stats)
+    assert stats.tiles == 3 * 4 and stats.pixels == 300 * 500
+    # Edge tiles are padded too, so the renderer only ever sees one frame size
+    assert renderer.shapes == {(132, 132, 3)}
+    del output
+    expected = cv2.blur(image, (5, 5), borderType=cv2.BORDER_REPLICATE)
+    np.testing.assert_array_equal(np.load(tmp_path / "out.npy"), expected)
+
+
+def test_without_halo_tile_seams_differ():
+    image = make_image(64, 64)
+    output = np.zeros_like(image)
+    TiledProcessor(32, renderer_factory=BlurRenderer, params_factory=Params).process(image, output)
+    expected = cv2.blur(image, (5, 5), borderType=cv2.BORDER_REPLICATE)
+    assert not np.array_equal(output[30:34], expected[30:34])
+    np.testing.assert_array_equal(output[:30, :30], expected[:30, :30])
+
+
+def test_raw_images_round_trip(tmp_path):
+    image = make_image(40, 70)
+    image.tofile(tmp_path / "in.raw")
+    source = open_image(str(tmp_path / "in.raw"), size=(70, 40))
+    output = create_image(str(tmp_path / "out.raw"), source.shape)
+    TiledProcessor((16, 32), renderer_factory=InvertRenderer, params_factory=Params).process(source, output)
+    del output
+    result = np.fromfile(tmp_path / "out.raw", dtype=np.uint8).reshape(40, 70, 3)
+    np.testing.assert_array_equal(result, 255 - image)
+    with pytest.raises(ValueError):
+        open_image(str(tmp_path / "in.raw"), size=(70, 41))
+    with pytest.raises(ValueError):
+        open_image(str(tmp_path / "in.raw"))
+
+
+def test_peak_memory_is_independent_of_image_size(tmp_path):
+    def peak(height, width):
+        path = str(tmp_path / f"{height}x{width}.raw")
+        make_image(height, width).tofile(path)
+        source = open_image(path, size=(width, height))
+        output = create_image(path + ".out", source.shape)
+        processor = TiledProcessor(128, halo=4, renderer_factory=BlurRenderer, params_factory=Params)
+        tracemalloc.start()
+        try:
+            processor.process(source, output)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small, large = peak(256, 256), peak(2048, 2048)
+    tile_bytes = 136 * 136 * 3
+    assert large < 12 * tile_bytes
+    assert large < small + 4 * tile_bytes
+
+
+def test_tile_layout_and_budget():
+    assert list(iter_tiles(5, 7, 4, 4)) == [(0, 0, 4, 4), (0, 4, 4, 3), (4, 0, 1, 4), (4, 4, 1, 3)]
+    side = tile_size_for_budget(256 * 2 ** 20, halo=8)
+    assert side % 64 == 0 and 29 * (side + 16) ** 2 <= 256 * 2 ** 20
+    assert tile_size_for_budget(2 ** 40) == MAX_TEXTURE_SIZE
+    with pytest.raises(ValueError):
+        tile_size_for_budget(1000)
+    with pytest.raises(ValueError):
+        TiledProcessor(MAX_TEXTURE_SIZE, halo=1)
+    with pytest.raises(ValueError):
+        TiledProcessor(64, renderer_factory=BlurRenderer, params_factory=Params).process(
+            np.zeros((8, 8, 3), np.uint8), np.zeros((8, 9, 3), np.uint8))
@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+import types
+import numpy as np
+from dx11_renderer import tracing
+from dx11_renderer.headless import HeadlessRunner
+from dx11_renderer.recording import FrameRecorder
+from dx11_renderer.tracing import Tracer
+
+
+class TracingRenderer:
+    """Stand-in renderer recording native-style spans inside process_frame"""
+
+    def __init__(self):
+        self.status = types.SimpleNamespace(isInitialized=True)
+        self.tracing = False
+        self.calls = 0
+        self._events = []
+
+    def set_tracing(self, enabled, capacity=4096):
+        self.tracing = enabled
+
+    def drain_trace_events(self):
+        events, self._events = self._events, []
+        return events
+
+    def update_processing_params(self, params):
+        pass
+
+    def process_frame(self, frame):
+        self.calls += 1
+        start = time.perf_counter_ns()
+        output = frame.copy()
+        if self.tracing:
+            self._events.append(("dx11.dispatch", start, time.perf_counter_ns() - start,
+                                 threading.get_native_id(), self.calls))
+        return output
+
+
+def test_spans_carry_frame_and_thread_ids(tmp_path):
+    print("Testing trace export...")
+    tracer = Tracer(capacity=64, enabled=True)
+    renderer = tracer.attach(TracingRenderer())
+    assert renderer.tracing
+
+    def worker(frame_id):
+        with tracer.frame(frame_id):
+            with tracer.span("process"):
+                renderer.process_frame(np.zeros((4, 4, 3), dtype=np.uint8))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    path = tmp_path / "trace.json"
+    count = tracer.dump(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert count == len(events)
+    spans = [event for event in events if event["ph"] == "X"]
+    assert sorted(event["args"]["frame"] for event in spans if event["name"] == "frame") == [0, 1, 2, 3]
+    for native in (event for event in spans if event["name"] == "dx11.dispatch"):
+        # Native spans take the frame id of the Python span around them on their thread
+        process = next(event for event in spans if event["name"] == "process"
+                       and event["args"]["frame"] == native["args"]["frame"])
+        assert process["tid"] == native["tid"] and native["cat"] == "dx11"
+    assert len({event["tid"] for event in spans}) == 4
+
+
+def test_ring_keeps_most_recent_spans():
+    tracer = Tracer(capacity=8, enabled=True)
+    for i in range(20):
+        with tracer.span(f"span{i}"):
+            pass
+    assert [event[0] for event in tracer.events()] == [f"span{i}" for i in range(12, 20)]
+    assert tracer.dropped == 12
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(capacity=8)
+    renderer = tracer.attach(TracingRenderer())
+
+    @tracer.traced()
+    def work(x):
+        return x * 2
+
+    assert work(3) == 6
+    with tracer.span("idle"):
+        pass
+    assert tracer.span("idle") is tracer.span("other")
+    assert tracer.events() == [] and not renderer.tracing
+
+    tracer.enable()
+    assert work(4) == 8 and renderer.tracing
+    assert [event[0] for event in tracer.events()] == [work.__qualname__]
+    tracer.disable()
+    assert not renderer.tracing
+
+
+def test_headless_runner_records_stage_spans(tmp_path):
+    path = str(tmp_path / "feed.dx11raw")
+    with FrameRecorder(path, (8, 8, 3), fps=100.0) as recorder:
+        for i in range(3):
+            recorder.write(np.zeros((8, 8, 3), dtype=np.uint8))
+    tracing.tracer.clear()
+    tracing.enable()
+    try:
+        HeadlessRunner(path, renderer_factory=TracingRenderer, params_factory=types.SimpleNamespace).run()
+    finally:
+        tracing.disable()
+    events = [event for event in tracing.tracer.trace_events() if event["ph"] == "X"]
+    tracing.tracer.clear()
+    names = [(event["name"], event["args"].get("frame")) for event in events]
+    for frame_id in range(3):
+        for name in ("frame", "capture", "process", "sinks", "dx11.dispatch"):
+            assert (name, frame_id) in names
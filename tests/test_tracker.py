@@ -0,0 +1,119 @@
+import time
+import numpy as np
+import pytest
+from dx11_renderer.tracker import Tracker, greedy_assignment, iou_matrix
+
+
+def moving_boxes(count, frame, speed=3.0, size=20.0, spacing=50.0):
+    """``count`` boxes on a grid, each moving right by ``speed`` px per frame"""
+    index = np.arange(count)
+    x = (index % 20) * spacing + frame * speed
+    y = (index // 20) * spacing
+    return np.column_stack([x, y, x + size, y + size, np.full(count, 0.9), index % 3])
+
+
+def test_iou_matrix_matches_direct_computation():
+    print("Testing tracker association...")
+    a = np.array([[0, 0, 10, 10], [5, 5, 15, 15]], dtype=float)
+    b = np.array([[0, 0, 10, 10], [10, 10, 20, 20], [100, 100, 110, 110]], dtype=float)
+    iou = iou_matrix(a, b)
+    assert iou.shape == (2, 3)
+    assert iou[0, 0] == 1.0 and iou[0, 2] == 0.0
+    assert iou[1, 0] == pytest.approx(25 / 175)
+    assert iou[1, 1] == pytest.approx(25 / 175)
+
+
+def test_greedy_assignment_prefers_best_pairs():
+    scores = np.array([[0.9, 0.8], [0.85, 0.1]])
+    rows, cols = greedy_assignment(scores, 0.3)
+    assert dict(zip(rows.tolist(), cols.tolist())) == {0: 0}
+    rows, cols = greedy_assignment(scores, 0.05)
+    assert dict(zip(rows.tolist(), cols.tolist())) == {0: 0, 1: 1}
+
+
+def test_ids_stay_stable_and_boxes_are_predicted_between_detections():
+    tracker = Tracker()
+    tracks = tracker.update(moving_boxes(5, 0))
+    ids = tracks[:, 6].copy()
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+    for frame in range(1, 13):
+        if frame % 4 == 0:
+            tracks = tracker.update(moving_boxes(5, frame))
+        else:
+            tracks = tracker.predict()
+        np.testing.assert_array_equal(tracks[:, 6], ids)
+    # After two detection runs the velocity is known, so predictions follow the motion
+    tracks = tracker.predict()
+    np.testing.assert_allclose(tracks[:, :4], moving_boxes(5, 13)[:, :4], atol=1e-6)
+
+
+def test_fast_objects_match_by_centroid_and_stale_tracks_expire():
+    tracker = Tracker(max_age=3)
+    tracker.update(np.array([[0, 0, 10, 10, 0.9, 0]]))
+    # Moved past its own width: no overlap, but close in units of its diagonal
+    tracks = tracker.update(np.array([[12, 0, 22, 10, 0.9, 0]]))
+    assert tracks[:, 6].tolist() == [1]
+    # A different class is never associated
+    tracks = tracker.update(np.array([[24, 0, 34, 10, 0.9, 1]]))
+    assert sorted(tracks[:, 6].tolist()) == [1, 2]
+    for _ in range(4):
+        tracks = tracker.predict()
+    assert len(tracks) == 0 and len(tracker) == 0
+
+
+def test_min_hits_hides_unconfirmed_tracks():
+    tracker = Tracker(min_hits=2)
+    assert len(tracker.update(moving_boxes(3, 0))) == 0
+    assert len(tracker.update(moving_boxes(3, 1))) == 3
+
+
+def test_per_frame_cost_for_hundreds_of_tracks():
+    tracker = Tracker()
+    tracker.update(moving_boxes(300, 1))
+    started = time.perf_counter()
+    for _ in range(20):
+        tracks = tracker.update(moving_boxes(300, tracker.frame + 1))
+    update_ms = (time.perf_counter() - started) * 50
+    started = time.perf_counter()
+    for _ in range(100):
+        tracker.predict()
+    predict_ms = (time.perf_counter() - started) * 10
+    print(f"300 tracks: predict {predict_ms:.3f} ms, update {update_ms:.3f} ms")
+    assert len(tracks) == 300 and tracks[:, 6].max() == 300
+    assert predict_ms < 1.0 and update_ms < 10.0
+
+
+def test_headless_runner_predicts_between_detections(tmp_path):
+    import types
+    from dx11_renderer.headless import HeadlessRunner
+    from dx11_renderer.recording import FrameRecorder
+    from dx11_renderer.sinks import CallbackSink
+
+    path = str(tmp_path / "feed.dx11raw")
+    with FrameRecorder(path, (8, 8, 3), fps=100.0) as recorder:
+        for _ in range(8):
+            recorder.write(np.zeros((8, 8, 3), dtype=np.uint8))
+
+    class Renderer:
+        status = types.SimpleNamespace(isInitialized=True)
+
+        def update_processing_params(self, params):
+            pass
+
+        def process_frame(self, frame):
+            return frame
+
+    calls = []
+
+    def detector(frame):
+        calls.append(len(calls))
+        return moving_boxes(2, 4 * (len(calls) - 1))
+
+    tracks = []
+    HeadlessRunner(path, [CallbackSink(lambda frame, info: tracks.append(info["detections"]))],
+                   detector=detector, detect_every=4, tracker=Tracker(),
+                   renderer_factory=Renderer, params_factory=types.SimpleNamespace).run()
+    assert len(calls) == 2 and len(tracks) == 8
+    assert all(t[:, 6].tolist() == [1, 2] for t in tracks)
+    # Frames 5-7 are predicted from the velocity measured across the two runs
+    np.testing.assert_allclose(tracks[6][:, :4], moving_boxes(2, 6)[:, :4], atol=1e-6)
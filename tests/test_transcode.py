@@ -0,0 +1,105 @@
+import cv2
+import numpy as np
+import pytest
+from dx11_renderer.transcode import plan_segments, probe, transcode, transcode_range
+
+
+class InvertRenderer:
+    """Stand-in renderer so transcoding can be tested without a GPU"""
+
+    def update_processing_params(self, params):
+        pass
+
+    def process_frame(self, frame):
+        return 255 - frame
+
+
+class Params:
+    pass
+
+
+def write_test_video(path, frames=90, size=(64, 48)):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30.0, size)
+    for i in range(frames):
+        frame = np.full((size[1], size[0], 3), 40 + i, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+def read_frames(path):
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def test_plan_segments():
+    assert plan_segments(1000, 4, min_segment_frames=100) == [(0, 250), (250, 500), (500, 750), (750, None)]
+    assert plan_segments(1000, 4, keyframes=[0, 240, 480, 800], min_segment_frames=100) == \
+        [(0, 240), (240, 480), (480, 800), (800, None)]
+    assert plan_segments(50, 4, min_segment_frames=100) == [(0, None)]
+
+
+def test_single_pass_transcode(tmp_path):
+    print("Testing single pass transcode...")
+    src, dst = tmp_path / "in.avi", tmp_path / "out.avi"
+    write_test_video(src)
+    stats = transcode(str(src), str(dst), renderer_factory=InvertRenderer, params_factory=Params)
+    print(stats)
+    assert stats.frames == 90
+    assert stats.fps > 0 and stats.realtime_factor > 0
+    frames = read_frames(dst)
+    assert len(frames) == 90
+    assert abs(int(frames[0].mean()) - (255 - 40)) <= 3
+
+
+def test_segmented_transcode_preserves_order(tmp_path):
+    print("Testing segmented transcode...")
+    src, dst = tmp_path / "in.avi", tmp_path / "out.avi"
+    write_test_video(src)
+    stats = transcode(str(src), str(dst), segments=3, workers=3, min_segment_frames=10,
+                      renderer_factory=InvertRenderer, params_factory=Params)
+    print(stats)
+    assert stats.segments == 3
+    assert stats.frames == 90
+    frames = read_frames(dst)
+    assert len(frames) == probe(str(src))[0]
+    means = [int(frame.mean()) for frame in frames]
+    assert all(abs(m - (255 - 40 - i)) <= 3 for i, m in enumerate(means))
+
+
+def test_failure_stops_the_decoder(tmp_path, monkeypatch):
+    VideoCapture = cv2.VideoCapture
+
+    class CountingCapture:
+        reads = 0
+
+        def __init__(self, *args):
+            self._cap = VideoCapture(*args)
+
+        def __getattr__(self, name):
+            return getattr(self._cap, name)
+
+        def read(self):
+            CountingCapture.reads += 1
+            return self._cap.read()
+
+    class FailingRenderer(InvertRenderer):
+        def process_frame(self, frame):
+            if CountingCapture.reads > 3:
+                raise RuntimeError("device removed")
+            return super().process_frame(frame)
+
+    src, dst = tmp_path / "in.avi", tmp_path / "out.avi"
+    write_test_video(src, frames=200)
+    monkeypatch.setattr(cv2, "VideoCapture", CountingCapture)
+    with pytest.raises(RuntimeError, match="device removed"):
+        transcode_range(str(src), str(dst), renderer_factory=FailingRenderer,
+                        params_factory=Params, queue_size=4)
+    # At most the two queues' worth of frames past the failure were decoded
+    assert CountingCapture.reads < 20
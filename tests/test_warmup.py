@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+dx11_renderer = pytest.importorskip("dx11_renderer")
+if not hasattr(dx11_renderer, "DX11Renderer"):
+    pytest.skip("Native renderer module is not available", allow_module_level=True)
+
+
+@pytest.fixture
+def renderer():
+    renderer = dx11_renderer.DX11Renderer()
+    if not renderer.status.isInitialized:
+        pytest.skip(f"No DirectX 11 device: {renderer.status.lastError}")
+    params = dx11_renderer.ProcessingParams()
+    params.brightness = 1.2
+    renderer.update_processing_params(params)
+    return renderer
+
+
+def test_warmup_prepares_every_size(renderer):
+    print("Testing warmup...")
+    assert renderer.status.initializationTime > 0
+    renderer.process_frame(np.zeros((120, 160, 3), dtype=np.uint8))
+    renderer.warmup([(320, 240), (640, 480)])
+    status = renderer.status
+    # The current size stays current and the warmed ones are parked
+    assert (status.textureWidth, status.textureHeight) == (160, 120)
+    assert status.textureSetsCached == 2 and status.warmupTime > 0
+
+    for width, height in ((320, 240), (640, 480), (160, 120)):
+        output = renderer.process_frame(np.full((height, width, 3), 100, dtype=np.uint8))
+        assert output.shape == (height, width, 3) and (output == 120).all()
+    status = renderer.status
+    assert status.textureCacheHits == 3 and status.textureSetsCached == 2
+    assert status.timeToFirstFrame > 0
+
+
+def test_without_warmup_sizes_are_not_kept(renderer):
+    renderer.process_frame(np.zeros((120, 160, 3), dtype=np.uint8))
+    renderer.process_frame(np.zeros((240, 320, 3), dtype=np.uint8))
+    renderer.process_frame(np.zeros((120, 160, 3), dtype=np.uint8))
+    status = renderer.status
+    assert status.textureCacheHits == 0 and status.textureSetsCached == 0
+
+
+def test_budget_evicts_warmed_sizes(renderer):
+    renderer.warmup([(320, 240), (640, 480)])
+    status = renderer.status
+    renderer.memory_budget = status.gpuMemoryUsage + status.hostMemoryUsage - 1
+    assert renderer.status.textureSetsCached < status.textureSetsCached
+    assert renderer.process_frame(np.zeros((480, 640, 3), dtype=np.uint8)).shape == (480, 640, 3)
+
+
+def test_warmup_rejects_impossible_sizes(renderer):
+    with pytest.raises(ValueError):
+        renderer.warmup([(0, 720)])
+    with pytest.raises(ValueError):
+        renderer.warmup([(32768, 16)])
+
+
+def test_first_frame_after_warmup_is_timed(renderer):
+    # A fresh renderer keeps the last warmed size current, so the first real
+    # frame needs no new textures but is still the first frame
+    renderer.warmup([(320, 240)])
+    assert renderer.status.timeToFirstFrame == 0
+    renderer.process_frame(np.zeros((240, 320, 3), dtype=np.uint8))
+    first = renderer.status.timeToFirstFrame
+    assert first > 0
+
+    renderer.process_frame(np.zeros((240, 320, 3), dtype=np.uint8))
+    assert renderer.status.timeToFirstFrame == first
+    renderer.warmup([(640, 480)])
+    renderer.process_frame(np.zeros((240, 320, 3), dtype=np.uint8))
+    assert renderer.status.timeToFirstFrame != first
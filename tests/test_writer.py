@@ -0,0 +1,52 @@
+import threading
+import cv2
+import numpy as np
+from dx11_renderer.recording import ReplaySource
+from dx11_renderer.writer import ClipBuffer, FrameWriter
+
+
+def test_images_in_each_format(tmp_path):
+    print("Testing background image writes...")
+    frame = np.random.default_rng(0).integers(0, 255, (32, 48, 3), dtype=np.uint8)
+    with FrameWriter(workers=2, png_compression=1, jpeg_quality=80) as writer:
+        for extension in (".png", ".jpg", ".npy"):
+            assert writer.save_image(str(tmp_path / "shots" / f"frame{extension}"), frame)
+        writer.flush()
+        assert writer.written == 3 and not writer.errors
+    assert (cv2.imread(str(tmp_path / "shots" / "frame.png")) == frame).all()
+    assert cv2.imread(str(tmp_path / "shots" / "frame.jpg")).shape == frame.shape
+    assert (np.load(tmp_path / "shots" / "frame.npy") == frame).all()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    release = threading.Event()
+    writer = FrameWriter(max_queue=2, on_complete=lambda path, error: release.wait(5))
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+    results = [writer.save_image(str(tmp_path / f"{i}.png"), frame) for i in range(10)]
+    assert results[:2] == [True, True] and not all(results)
+    assert writer.dropped == results.count(False)
+    release.set()
+    writer.close()
+    assert writer.written == results.count(True)
+
+
+def test_clip_buffer_exports_last_seconds(tmp_path):
+    buffer = ClipBuffer(seconds=1.0)
+    for i in range(60):
+        buffer.append(np.full((16, 16, 3), i, dtype=np.uint8), timestamp=i / 30.0)
+    # Only the last second (31 frames at 30 fps) is retained
+    assert len(buffer) == 31
+    clip = buffer.last(0.5)
+    assert len(clip) == 16 and int(clip[0][1][0, 0, 0]) == 44
+
+    with FrameWriter() as writer:
+        assert writer.save_clip(str(tmp_path / "clip.dx11raw"), clip)
+        assert writer.save_clip(str(tmp_path / "clip.avi"), clip)
+        writer.flush()
+        assert not writer.errors
+    replay = ReplaySource(str(tmp_path / "clip.dx11raw"), realtime=False)
+    assert replay.frame_count == 16 and abs(replay.fps - 30.0) < 0.01
+    assert int(replay.read()[1][0, 0, 0]) == 44
+    cap = cv2.VideoCapture(str(tmp_path / "clip.avi"))
+    assert cap.read()[0]
+    cap.release()
@@ -29,6 +29,9 @@ print("Looking for dx11_renderer in:", release_dir)
 try:
     print("\nImporting dx11_renderer module...")
     import dx11_renderer
+    from dx11_renderer.recording import open_capture
+    from dx11_renderer.tracker import Tracker, draw_tracks
+    from dx11_renderer.writer import ClipBuffer, FrameWriter
     print("Successfully imported dx11_renderer module")
 except ImportError as e:
     print(f"Failed to import dx11_renderer module: {e}")
@@ -45,6 +48,11 @@ class YOLOProcessor:
         results = self.model(frame, stream=True)
         return next(results)
 
+    def detections(self, result, confidence_threshold=0.3):
+        """(N, 6) x1, y1, x2, y2, score, class rows above the threshold"""
+        data = result.boxes.data.cpu().numpy()
+        return data[data[:, 4] > confidence_threshold]
+
     def draw_detections(self, frame, result, confidence_threshold=0.3):
         for r in result.boxes.data.tolist():
             x1, y1, x2, y2, score, class_id = r
@@ -114,13 +122,11 @@ def main():
 
     print("\nOpening video capture...")
     try:
-        cap = cv2.VideoCapture(0)
+        # Optional argument: camera index, video file or a .dx11raw recording to replay
+        cap = open_capture(sys.argv[1] if len(sys.argv) > 1 else None)
         if not cap.isOpened():
-            print("Trying alternative video source...")
-            cap = cv2.VideoCapture(1)
-            if not cap.isOpened():
-                print("Error: Unable to open any video source.")
-                return
+            print("Error: Unable to open any video source.")
+            return
         
         print("Video capture properties:")
         print(f"Frame width: {cap.get(cv2.CAP_PROP_FRAME_WIDTH)}")
@@ -145,7 +151,9 @@ def main():
         print("- Press 's' to save current preset")
         print("- Press 'l' to load last preset")
         print("- Press 'p' to save screenshot")
+        print("- Press 'c' to save the last 10 seconds as a clip")
         print("- Press 'd' to toggle detection overlay")
+        print("- Press 't' to toggle tracking between detection runs")
         print("- Press 'q' to quit")
 
         print("\nStarting main processing loop...")
@@ -153,6 +161,13 @@ def main():
         fps = 0
         last_time = time.time()
         show_detections = True
+        # With tracking on, YOLO runs every DETECT_EVERY frames and the tracker
+        # predicts boxes for the frames in between
+        use_tracking = True
+        DETECT_EVERY = 3
+        tracker = Tracker()
+        writer = FrameWriter()
+        clip_buffer = ClipBuffer(seconds=10.0)
         
         while True:
             ret, frame = cap.read()
@@ -175,7 +190,14 @@ def main():
             processed_frame = renderer.process_frame(frame)
 
             # Run YOLO detection on processed frame
-            if show_detections:
+            if show_detections and use_tracking:
+                if frame_count % DETECT_EVERY == 0:
+                    result = yolo.process_frame(processed_frame)
+                    tracks = tracker.update(yolo.detections(result, confidence_threshold))
+                else:
+                    tracks = tracker.predict()
+                draw_tracks(processed_frame, tracks, yolo.classes)
+            elif show_detections:
                 result = yolo.process_frame(processed_frame)
                 yolo.draw_detections(processed_frame, result, confidence_threshold)
 
@@ -193,6 +215,7 @@ def main():
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
             cv2.putText(combined_frame, f"GPU Time: {status.lastProcessingTime:.1f}ms", (10, 60),
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            clip_buffer.append(combined_frame)
             cv2.imshow("Original vs Processed", combined_frame)
 
             # Create info display with performance metrics
@@ -237,14 +260,25 @@ def main():
                     params = loaded_params
                     update_trackbars('Controls', params)
             elif key == ord('p'):
-                os.makedirs("screenshots", exist_ok=True)
                 timestamp = time.strftime("%Y%m%d-%H%M%S")
                 filename = f"screenshots/processed_{timestamp}.png"
-                cv2.imwrite(filename, combined_frame)
-                print(f"\nSaved screenshot to {filename}")
+                if writer.save_image(filename, combined_frame):
+                    print(f"\nSaving screenshot to {filename}")
+                else:
+                    print("\nScreenshot dropped: writer is busy")
+            elif key == ord('c'):
+                # Export the last 10 seconds of processed frames
+                timestamp = time.strftime("%Y%m%d-%H%M%S")
+                filename = f"screenshots/clip_{timestamp}.avi"
+                if writer.save_clip(filename, clip_buffer.last(10.0)):
+                    print(f"\nSaving clip to {filename}")
             elif key == ord('d'):
                 show_detections = not show_detections
                 print(f"\nDetection overlay: {'On' if show_detections else 'Off'}")
+            elif key == ord('t'):
+                use_tracking = not use_tracking
+                tracker.reset()
+                print(f"\nTracking: {'On' if use_tracking else 'Off'}")
 
     except Exception as e:
         print(f"Error in main loop: {e}")
@@ -252,6 +286,8 @@ def main():
         print(traceback.format_exc())
     finally:
         print("\nCleaning up...")
+        if 'writer' in locals():
+            writer.close()
         cap.release()
         cv2.destroyAllWindows()
 
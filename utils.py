@@ -1,5 +1,6 @@
 import os
 import json
+import time
 import cv2
 import numpy as np
 from pathlib import Path
@@ -46,6 +47,7 @@ class DisplayManager:
             f"Contrast: {params.contrast:.2f}",
             f"Saturation: {params.saturation:.2f}",
             f"Gamma: {params.gamma:.2f}",
+            f"Hue: {params.hue:.0f}",
             f"Detection: {'On' if show_detections else 'Off'}",
             "",
             f"Controls:",
@@ -89,10 +91,20 @@ class DisplayManager:
         cv2.createTrackbar('Gamma', 'Controls', 100, 1000, lambda x: None)
         cv2.createTrackbar('Detection Confidence', 'Controls', 30, 100, lambda x: None)
 
-def save_screenshot(frame, config: Config):
-    """Save a screenshot with timestamp"""
-    timestamp = time.strftime("%Y%m%d-%H%M%S")
+_screenshot_writer = None
+
+def get_screenshot_writer():
+    """Shared background writer used by save_screenshot"""
+    global _screenshot_writer
+    if _screenshot_writer is None:
+        from dx11_renderer.writer import FrameWriter
+        _screenshot_writer = FrameWriter(max_queue=8)
+    return _screenshot_writer
+
+def save_screenshot(frame, config: Config, writer=None, extension=".png"):
+    """Queue a screenshot with timestamp; returns the filename or None if dropped"""
+    timestamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
     filename = os.path.join(config.get_path("screenshots"), 
-                          f"processed_{timestamp}.png")
-    cv2.imwrite(filename, frame)
-    return filename
+                          f"processed_{timestamp}{extension}")
+    writer = writer or get_screenshot_writer()
+    return filename if writer.save_image(filename, frame) else None